@@ -12,24 +12,30 @@ Usage:
 """
 
 import os
+import re
 import sys
 import json
+import time
 import argparse
+import threading
 import traceback
+import contextvars
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
-
-from dotenv import load_dotenv
-from openai import OpenAI
-
-# Load environment variables
-load_dotenv()
-load_dotenv(Path(__file__).parent / ".env")
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
 
 # Add current directory for imports
 sys.path.insert(0, str(Path(__file__).parent))
-from tamarind_client import TamarindClient
+from tamarind_client import TamarindClient, JobManager, COMPLETE_STATUSES
+from python_kernel import KernelPool
+from context_manager import (
+    ContextManager, CONTEXT_BUDGET_TOKENS, HANDLE_PAGE_CHARS, is_handle, llm_summarizer, message_field
+)
+from event_log import EventLog, to_jsonable
+from checkpoint import write_checkpoint, load_checkpoint, output_manifest, diff_manifest
+from llm_cache import CachedChatClient
+from file_tools import MAX_CHARS, read_lines, head_lines, tail_lines, grep_lines, summarize_file, format_summary
 
 
 # =============================================================================
@@ -41,7 +47,70 @@ TOOLS = [
         "type": "function",
         "function": {
             "name": "read_file",
-            "description": "Read the contents of a file (PDB, JSON, CSV, Python, etc.).",
+            "description": "Read a file (PDB, JSON, CSV, Python, etc.). Large files are returned in pages: pass offset/limit to read a line range.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Path to the file (relative to task directory)"
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Optional first line to read (0-based)"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Optional number of lines to read"
+                    },
+                    "column": {
+                        "type": "integer",
+                        "description": "Optional byte offset into line `offset`, to continue a very long line that was cut"
+                    }
+                },
+                "required": ["path"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "view_file",
+            "description": "Show the head or tail of a file, or grep it for a regular expression (with line numbers), without reading the whole file.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Path to the file (relative to task directory)"
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["head", "tail", "grep"],
+                        "description": "head, tail or grep"
+                    },
+                    "n": {
+                        "type": "integer",
+                        "description": "Lines to show for head/tail, or max matches for grep (default 20)"
+                    },
+                    "pattern": {
+                        "type": "string",
+                        "description": "Regular expression for grep"
+                    },
+                    "ignore_case": {
+                        "type": "boolean",
+                        "description": "Case-insensitive grep"
+                    }
+                },
+                "required": ["path", "mode"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "summarize_file",
+            "description": "Structured summary of a file in one streaming pass: for CSV/TSV the delimiter, row count and per-column type, missing values, min/max/mean/std or top values; for PDB the chains with residue/atom counts, ligands and waters; otherwise size, line count and the first lines.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -96,13 +165,21 @@ TOOLS = [
         "type": "function",
         "function": {
             "name": "run_python",
-            "description": "Execute Python code. Available: numpy (np), pandas (pd), BioPython (Bio, PDBParser, ShrakeRupley, seq1, SeqIO), json, Path, os. Use print() for output.",
+            "description": "Execute Python code in a persistent session: variables, imports and loaded data survive between calls. Available: numpy (np), pandas (pd), BioPython (Bio, PDBParser, ShrakeRupley, seq1, SeqIO), json, Path, os, load_dataset(path) for fast cached loading of CSV/TSV tables, glucose_cube/cgm_responses for vectorized CGM meal responses, and load_features for batched metabolomics/lipidomics statistics. Use print() for output. Runs in a sandboxed worker with a time and memory limit.",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "code": {
                         "type": "string",
                         "description": "Python code to execute"
+                    },
+                    "session": {
+                        "type": "string",
+                        "description": "Optional session name (default 'default'). Each session has its own variables; different sessions can run concurrently."
+                    },
+                    "timeout": {
+                        "type": "number",
+                        "description": "Optional wall-clock limit in seconds (default 300)"
                     }
                 },
                 "required": ["code"]
@@ -155,7 +232,7 @@ TOOLS = [
         "type": "function",
         "function": {
             "name": "tamarind_submit_job",
-            "description": "Submit a job to Tamarind Bio and wait for results. Pass all parameters inside the 'params' dict.",
+            "description": "Submit a job to Tamarind Bio and wait for results (blocks up to 10 minutes). Pass all parameters inside the 'params' dict; they are checked against the tool spec before submission. For several or long-running jobs prefer tamarind_submit_jobs.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -172,6 +249,76 @@ TOOLS = [
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "tamarind_submit_jobs",
+            "description": "Submit one or more Tamarind jobs in the background and return immediately with their job names. Results download automatically when jobs finish; keep working and check with tamarind_job_status / tamarind_collect_results.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "jobs": {
+                        "type": "array",
+                        "description": "Jobs to submit",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "tool_name": {"type": "string", "description": "Tool name (e.g., 'esmfold')"},
+                                "params": {"type": "object", "description": "Job parameters"},
+                                "job_name": {"type": "string", "description": "Optional unique job name"}
+                            },
+                            "required": ["tool_name", "params"]
+                        }
+                    }
+                },
+                "required": ["jobs"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "tamarind_job_status",
+            "description": "Show the status of background Tamarind jobs (all jobs submitted with tamarind_submit_jobs by default).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "job_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional job names to check"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "tamarind_collect_results",
+            "description": "Get result locations for finished background jobs. Set wait=true to block until the requested jobs finish.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "job_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional job names to collect (default: all)"
+                    },
+                    "wait": {
+                        "type": "boolean",
+                        "description": "Block until the jobs finish (default false)"
+                    },
+                    "timeout": {
+                        "type": "number",
+                        "description": "Max seconds to wait when wait=true (default 600)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -192,6 +339,59 @@ TOOLS = [
 ]
 
 
+# Max concurrent calls per tool when one assistant turn issues several tool calls
+TOOL_CONCURRENCY = {
+    "tamarind_submit_job": 8,
+    "tamarind_upload_file": 4,
+    "run_python": 4,
+    "write_file": 1,
+}
+DEFAULT_TOOL_CONCURRENCY = 4
+MAX_PARALLEL_TOOLS = 16
+
+FILE_READ_TOOLS = ("read_file", "view_file", "summarize_file")
+ANY_FILE = "file:*"  # run_python code can read or write any file
+
+
+def resources_overlap(a: set, b: set) -> bool:
+    """True if two resource sets share a key; ANY_FILE matches every specific file."""
+    if (a & b) - {ANY_FILE}:
+        return True
+    if ANY_FILE in a and any(k.startswith("file:") and k != ANY_FILE for k in b):
+        return True
+    return ANY_FILE in b and any(k.startswith("file:") and k != ANY_FILE for k in a)
+
+
+def tool_resources(tool_name: str, arguments: dict) -> tuple[set, set]:
+    """
+    (reads, writes): the resources a tool call touches, used to order one turn's calls.
+    
+    A call waits for every earlier call of the turn that writes something it
+    reads or writes, or reads something it writes; everything else runs
+    concurrently. A run_python session is written by each call, so calls to one
+    session run in the order they were issued. Python code may touch any file, so
+    run_python also reads and writes ANY_FILE and stays ordered with the file
+    tools; run_python calls in different sessions still run concurrently.
+    """
+    path = arguments.get("path") or arguments.get("filepath")
+    file = f"file:{os.path.normpath(path)}" if isinstance(path, str) else None
+    if tool_name in FILE_READ_TOOLS and file:
+        return {file}, set()
+    if tool_name == "write_file" and file:
+        return set(), {file}
+    if tool_name == "run_python":
+        return {ANY_FILE}, {f"python:{arguments.get('session', 'default')}", ANY_FILE}
+    if tool_name == "tamarind_upload_file":
+        return ({file} if file else set()), {"tamarind:files"}
+    if tool_name == "tamarind_submit_job":
+        return {"tamarind:files"}, set()
+    if tool_name == "tamarind_submit_jobs":
+        return {"tamarind:files"}, {"tamarind:jobs"}
+    if tool_name in ("tamarind_job_status", "tamarind_collect_results"):
+        return {"tamarind:jobs"}, set()
+    return set(), set()
+
+
 # =============================================================================
 # Tool Implementations
 # =============================================================================
@@ -199,33 +399,135 @@ TOOLS = [
 class AgentTools:
     """Tool implementations for the agent."""
     
-    def __init__(self, task_dir: Path, output_dir: Path):
+    def __init__(
+        self,
+        task_dir: Path,
+        output_dir: Path,
+        tamarind: Optional[TamarindClient] = None,
+        jobs: Optional[JobManager] = None
+    ):
+        """
+        Args:
+            tamarind: Shared Tamarind client (default: created on first use)
+            jobs: Shared background job tracker; this session only sees the jobs it submitted
+        """
         self.task_dir = task_dir
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self._tamarind: Optional[TamarindClient] = None
+        self._tamarind: Optional[TamarindClient] = tamarind
+        self._kernels: Optional[KernelPool] = None
+        self._jobs: Optional[JobManager] = jobs
+        self._owns_jobs = jobs is None
+        self._job_names: list[str] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limits: dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
         
     @property
     def tamarind(self) -> TamarindClient:
-        if self._tamarind is None:
-            self._tamarind = TamarindClient()
+        with self._lock:
+            if self._tamarind is None:
+                self._tamarind = TamarindClient()
         return self._tamarind
     
-    def read_file(self, path: str) -> str:
+    @property
+    def kernels(self) -> KernelPool:
+        """Sandboxed, persistent Python workers backing run_python (one per session name)."""
+        if self._kernels is None:
+            self._kernels = KernelPool(self.task_dir, self.output_dir)
+        return self._kernels
+    
+    @property
+    def jobs(self) -> JobManager:
+        """Background tracker for jobs submitted with tamarind_submit_jobs."""
+        tamarind = self.tamarind
+        with self._lock:
+            if self._jobs is None:
+                self._jobs = JobManager(tamarind, download_dir=str(self.output_dir / "tamarind_results"))
+        return self._jobs
+    
+    def job_records(self) -> list[dict]:
+        """Tracking records of this session's background jobs."""
+        return self._jobs.status(list(self._job_names)) if self._jobs is not None else []
+    
+    def restore_jobs(self, records: list[dict]):
+        """Re-attach background jobs saved in a checkpoint."""
+        self.jobs.restore(records)
+        self._job_names.extend(r["job_name"] for r in records if r["job_name"] not in self._job_names)
+    
+    def close(self):
+        if self._jobs is not None and self._owns_jobs:
+            self._jobs.shutdown()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self._kernels is not None:
+            self._kernels.shutdown()
+    
+    def _resolve(self, path: str) -> Optional[Path]:
+        """A path relative to the task directory, falling back to the output directory."""
         full_path = self.task_dir / path
         if not full_path.exists():
             full_path = self.output_dir / path
-        if not full_path.exists():
+        return full_path if full_path.exists() else None
+    
+    def read_file(
+        self, path: str, offset: Optional[int] = None, limit: Optional[int] = None, column: Optional[int] = None
+    ) -> str:
+        full_path = self._resolve(path)
+        if full_path is None or not full_path.is_file():
             return f"Error: File not found: {path}"
         
         try:
-            content = full_path.read_text()
-            if len(content) > 50000:
-                return content[:50000] + f"\n\n... [truncated, {len(content)} total chars]"
-            return content
+            # Offloaded tool results are read in pages small enough to stay inline
+            max_chars = HANDLE_PAGE_CHARS if is_handle(path) else MAX_CHARS
+            page = read_lines(full_path, offset or 0, limit, max_chars=max_chars, column=column or 0)
+            if page["eof"] and not offset and not column:
+                return page["text"]
+            last = page["end"] if page["column"] else page["end"] - 1
+            note = f"[lines {page['start']}-{last} of {path}, {page['size']} bytes"
+            if page["column"]:
+                note += f"; line {page['end']} was cut, continue with offset={page['end']}, column={page['column']}"
+            elif not page["eof"]:
+                note += f"; continue with offset={page['end']}"
+            return page["text"] + f"\n... {note}]"
         except Exception as e:
             return f"Error reading file: {e}"
     
+    def view_file(
+        self, path: str, mode: str, n: int = 20, pattern: Optional[str] = None, ignore_case: bool = False
+    ) -> str:
+        full_path = self._resolve(path)
+        if full_path is None or not full_path.is_file():
+            return f"Error: File not found: {path}"
+        
+        try:
+            if mode == "head":
+                return "\n".join(head_lines(full_path, n))
+            if mode == "tail":
+                return "\n".join(tail_lines(full_path, n))
+            if mode == "grep":
+                if not pattern:
+                    return "Error: grep needs a pattern"
+                found = grep_lines(full_path, pattern, n, ignore_case)
+                lines = [f"{line_no}: {line}" for line_no, line in found["matches"]]
+                if found["total"] > len(lines):
+                    lines.append(f"... [{found['total']} matches, showing {len(lines)}]")
+                return "\n".join(lines) or "No matches"
+            return f"Error: Unknown mode: {mode}"
+        except re.error as e:
+            return f"Error: Invalid pattern: {e}"
+        except Exception as e:
+            return f"Error reading file: {e}"
+    
+    def summarize_file(self, path: str) -> str:
+        full_path = self._resolve(path)
+        if full_path is None or not full_path.is_file():
+            return f"Error: File not found: {path}"
+        try:
+            return format_summary(summarize_file(full_path))
+        except Exception as e:
+            return f"Error summarizing file: {e}"
+    
     def write_file(self, path: str, content: str) -> str:
         full_path = self.output_dir / path
         full_path.parent.mkdir(parents=True, exist_ok=True)
@@ -252,77 +554,23 @@ class AgentTools:
         except Exception as e:
             return f"Error listing directory: {e}"
     
-    def run_python(self, code: str) -> str:
-        import io
-        from contextlib import redirect_stdout, redirect_stderr
-        
-        original_cwd = os.getcwd()
-        os.chdir(self.task_dir)
-        
-        exec_globals = {
-            "__builtins__": __builtins__,
-            "json": json, "Path": Path, "os": os,
-        }
-        
-        # Import libraries
-        try:
-            import numpy as np
-            exec_globals["np"] = exec_globals["numpy"] = np
-        except ImportError:
-            pass
-        
-        try:
-            import pandas as pd
-            exec_globals["pd"] = exec_globals["pandas"] = pd
-        except ImportError:
-            pass
-        
-        try:
-            import Bio
-            from Bio.PDB import PDBParser, NeighborSearch, PDBIO, Selection
-            from Bio.PDB.SASA import ShrakeRupley
-            from Bio.SeqUtils import seq1
-            from Bio import SeqIO
-            exec_globals.update({
-                "Bio": Bio, "PDBParser": PDBParser, "ShrakeRupley": ShrakeRupley,
-                "NeighborSearch": NeighborSearch, "PDBIO": PDBIO, "Selection": Selection,
-                "seq1": seq1, "SeqIO": SeqIO
-            })
-        except ImportError:
-            pass
-        
-        exec_globals["TASK_DIR"] = self.task_dir
-        exec_globals["OUTPUT_DIR"] = self.output_dir
-        exec_globals["task_dir"] = str(self.task_dir)
-        exec_globals["output_dir"] = str(self.output_dir)
+    def run_python(self, code: str, session: str = "default", timeout: Optional[float] = None) -> str:
+        result = self.kernels.execute(code, session=session, timeout=timeout)
         
-        stdout = io.StringIO()
-        stderr = io.StringIO()
+        text = ""
+        if result["stdout"]:
+            text += f"Output:\n{result['stdout']}"
+        if result["stderr"]:
+            text += f"\nStderr:\n{result['stderr']}"
+        if result["truncated"]:
+            text += f"\n... [truncated, {result['truncated']} more chars]"
+        if result["error"]:
+            text = f"Error executing code:\n{result['error']}" + (f"\n{text}" if text else "")
+        if not text:
+            text = "(Code executed successfully with no output)"
         
-        try:
-            with redirect_stdout(stdout), redirect_stderr(stderr):
-                exec(code, exec_globals)
-            
-            output = stdout.getvalue()
-            errors = stderr.getvalue()
-            
-            result = ""
-            if output:
-                result += f"Output:\n{output}"
-            if errors:
-                result += f"\nStderr:\n{errors}"
-            if not result:
-                result = "(Code executed successfully with no output)"
-            
-            if len(result) > 10000:
-                result = result[:10000] + "\n... [truncated]"
-            
-            return result
-            
-        except Exception as e:
-            return f"Error executing code:\n{traceback.format_exc()}"
-        finally:
-            os.chdir(original_cwd)
+        cpu = f", cpu {result['cpu_s']:.2f}s" if result["cpu_s"] is not None else ""
+        return text + f"\n[session {result['session']}: wall {result['wall_s']:.2f}s{cpu}]"
     
     def tamarind_list_tools(self) -> str:
         try:
@@ -368,27 +616,191 @@ class AgentTools:
         except Exception as e:
             return f"Error: {e}"
     
+    def tamarind_submit_jobs(self, jobs: list[dict]) -> str:
+        try:
+            records = self.jobs.submit_many([
+                {"tool": j.get("tool_name"), "settings": j.get("params", {}), "job_name": j.get("job_name")}
+                for j in jobs
+            ])
+            with self._lock:
+                self._job_names.extend(r["job_name"] for r in records if r["job_name"] not in self._job_names)
+            summary = {
+                "submitted": [r["job_name"] for r in records if not r["error"] and not r.get("deduplicated")],
+                "failed": [{"job_name": r["job_name"], "error": r["error"]} for r in records if r["error"]],
+                "note": "Jobs run in the background; use tamarind_job_status or tamarind_collect_results."
+            }
+            reused = [r["job_name"] for r in records if r.get("deduplicated")]
+            if reused:
+                summary["reused"] = reused  # identical jobs already submitted by another session
+            return json.dumps(summary, indent=2)
+        except Exception as e:
+            return f"Error: {e}"
+    
+    def tamarind_job_status(self, job_names: Optional[list[str]] = None) -> str:
+        try:
+            if self._jobs is None and not job_names:
+                return "No background jobs submitted yet."
+            records = self.jobs.status(job_names or list(self._job_names))
+            if not records:
+                return "No background jobs submitted yet."
+            counts: dict[str, int] = {}
+            lines = []
+            for r in records:
+                counts[r["status"]] = counts.get(r["status"], 0) + 1
+                extra = f" -> {r['result_path']}" if r.get("result_path") else ""
+                extra += f" ({r['error']})" if r.get("error") else ""
+                lines.append(f"  - {r['job_name']} ({r.get('tool', '')}): {r['status']}{extra}")
+            summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+            return f"Jobs: {summary}\n" + "\n".join(lines)
+        except Exception as e:
+            return f"Error: {e}"
+    
+    def tamarind_collect_results(
+        self, job_names: Optional[list[str]] = None, wait: bool = False, timeout: float = 600
+    ) -> str:
+        try:
+            records = self.jobs.collect(job_names or list(self._job_names), wait=wait, timeout=timeout)
+            results = []
+            for r in records:
+                entry = {"job_name": r["job_name"], "status": r["status"]}
+                if r.get("result_path"):
+                    path = Path(r["result_path"])
+                    entry["downloaded_to"] = str(path)
+                    if path.is_dir():
+                        entry["files"] = sorted(str(p.relative_to(path)) for p in path.rglob("*") if p.is_file())[:50]
+                if r.get("error"):
+                    entry["error"] = r["error"]
+                results.append(entry)
+            return json.dumps(results, indent=2)
+        except Exception as e:
+            return f"Error: {e}"
+    
     def execute_tool(self, tool_name: str, arguments: dict) -> str:
         handlers = {
-            "read_file": lambda: self.read_file(arguments["path"]),
+            "read_file": lambda: self.read_file(
+                arguments["path"], arguments.get("offset"), arguments.get("limit"), arguments.get("column")
+            ),
+            "view_file": lambda: self.view_file(
+                arguments["path"], arguments.get("mode", "head"), arguments.get("n", 20),
+                arguments.get("pattern"), arguments.get("ignore_case", False)
+            ),
+            "summarize_file": lambda: self.summarize_file(arguments["path"]),
             "write_file": lambda: self.write_file(arguments["path"], arguments["content"]),
             "list_directory": lambda: self.list_directory(arguments["path"]),
-            "run_python": lambda: self.run_python(arguments["code"]),
+            "run_python": lambda: self.run_python(
+                arguments["code"], arguments.get("session", "default"), arguments.get("timeout")
+            ),
             "tamarind_list_tools": lambda: self.tamarind_list_tools(),
             "tamarind_get_tool_spec": lambda: self.tamarind_get_tool_spec(arguments["tool_name"]),
             "tamarind_upload_file": lambda: self.tamarind_upload_file(arguments["filepath"]),
             "tamarind_submit_job": lambda: self._handle_tamarind_submit(arguments),
+            "tamarind_submit_jobs": lambda: self.tamarind_submit_jobs(arguments["jobs"]),
+            "tamarind_job_status": lambda: self.tamarind_job_status(arguments.get("job_names")),
+            "tamarind_collect_results": lambda: self.tamarind_collect_results(
+                arguments.get("job_names"), arguments.get("wait", False), arguments.get("timeout", 600)
+            ),
             "task_complete": lambda: f"TASK_COMPLETE: {arguments['summary']}",
         }
         return handlers.get(tool_name, lambda: f"Unknown tool: {tool_name}")()
     
+    def _execute_limited(self, tool_name: str, arguments: dict) -> str:
+        with self._lock:
+            limit = self._limits.setdefault(
+                tool_name, threading.Semaphore(TOOL_CONCURRENCY.get(tool_name, DEFAULT_TOOL_CONCURRENCY))
+            )
+        with limit:
+            try:
+                return self.execute_tool(tool_name, arguments)
+            except Exception as e:
+                return f"Error: {type(e).__name__}: {e}"
+    
+    def execute_tools(
+        self,
+        calls: list[tuple[str, dict]],
+        on_done: Optional[Callable[[int, str, float], None]] = None
+    ) -> list[str]:
+        """
+        Execute one turn's tool calls, running independent ones concurrently.
+        
+        Calls that touch the same resource (see tool_resources) run in the
+        order they were issued; the rest fan out, subject to per-tool limits.
+        
+        Args:
+            calls: (tool_name, arguments) pairs
+            on_done: Called as on_done(index, result, seconds) as each call finishes
+        
+        Returns:
+            Results in the same order as `calls`.
+        """
+        def run(index: int, name: str, args: dict) -> str:
+            start = time.perf_counter()
+            result = self._execute_limited(name, args)
+            if on_done is not None:
+                on_done(index, result, time.perf_counter() - start)
+            return result
+        
+        if len(calls) <= 1:
+            return [run(i, name, args) for i, (name, args) in enumerate(calls)]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(MAX_PARALLEL_TOOLS, thread_name_prefix="tool")
+        
+        access = [tool_resources(name, args) for name, args in calls]
+        waiting = [0] * len(calls)  # unfinished earlier calls each call depends on
+        dependents: list[list[int]] = [[] for _ in calls]
+        for i, (reads, writes) in enumerate(access):
+            for j in range(i):
+                if resources_overlap(access[j][1], reads | writes) or resources_overlap(access[j][0], writes):
+                    waiting[i] += 1
+                    dependents[j].append(i)
+        
+        results: list = [None] * len(calls)
+        remaining = [len(calls)]
+        lock = threading.Lock()
+        finished = threading.Event()
+        
+        def task(index: int):
+            try:
+                results[index] = run(index, *calls[index])
+            except BaseException as e:
+                results[index] = e
+            with lock:
+                ready = []
+                for k in dependents[index]:
+                    waiting[k] -= 1
+                    if waiting[k] == 0:
+                        ready.append(k)
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    finished.set()
+            for k in ready:
+                self._executor.submit(contextvars.copy_context().run, task, k)
+        
+        # Each call runs in a copy of the caller's context (e.g. agent_runner's per-session output)
+        for i in range(len(calls)):
+            if waiting[i] == 0:
+                self._executor.submit(contextvars.copy_context().run, task, i)
+        finished.wait()
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+    
     def _handle_tamarind_submit(self, arguments: dict) -> str:
         tool = arguments.get("tool_name")
         params = dict(arguments.get("params", {}))
-        # Merge extra top-level args into params (handles common mistake)
-        for key in arguments:
-            if key not in ["tool_name", "params"]:
-                params[key] = arguments[key]
+        # Models sometimes put settings next to 'params' instead of inside it; move
+        # only those the tool actually has, and report anything else
+        stray = {k: v for k, v in arguments.items() if k not in ("tool_name", "params")}
+        if stray:
+            try:
+                fields = self.tamarind.get_validator(tool).fields
+            except Exception as e:
+                return f"Error: {e}"
+            unknown = [k for k in stray if k not in fields]
+            if unknown:
+                return (f"Error: unexpected arguments {unknown} for tamarind_submit_job; pass tool "
+                        f"settings inside 'params' (see tamarind_get_tool_spec('{tool}'))")
+            params = {**stray, **params}
         return self.tamarind_submit_job(tool, params)
 
 
@@ -396,8 +808,41 @@ class AgentTools:
 # Agent Loop
 # =============================================================================
 
-def run_agent(task_name: str, max_iterations: int = 20, model: str = "gpt-4o", output_name: str = None):
-    """Run the agent on a task."""
+def run_agent(
+    task_name: str,
+    max_iterations: int = 20,
+    model: str = "gpt-4o",
+    output_name: str = None,
+    context_budget: int = CONTEXT_BUDGET_TOKENS,
+    max_total_tokens: Optional[int] = None,
+    resume: bool = False,
+    llm_mode: str = "live",
+    llm_cache: Optional[str] = None,
+    llm_base_url: Optional[str] = None,
+    seed: Optional[int] = None,
+    client=None,
+    tamarind: Optional[TamarindClient] = None,
+    jobs: Optional[JobManager] = None
+) -> Optional[dict]:
+    """
+    Run the agent on a task.
+    
+    Args:
+        context_budget: Target prompt size in tokens; older tool output is elided or
+            summarized to stay under it
+        max_total_tokens: Stop the run once cumulative API token usage exceeds this
+        resume: Continue the run in agent_output/<output_name> from its last checkpoint
+        llm_mode: "live", "record" (store responses) or "replay" (serve stored responses)
+        llm_cache: Response store for record/replay (default: <task>/llm_cache)
+        llm_base_url: OpenAI-compatible endpoint to use instead of OpenAI (e.g. a local
+            model server); in replay mode it only answers requests missing from the store
+        seed: Sampling seed passed to the model (for repeated evaluation runs)
+        client, tamarind, jobs: Shared LLM client, Tamarind client and job tracker
+            (used by agent_runner.py to run many sessions concurrently)
+    
+    Returns:
+        Run summary with 'status', 'iterations', 'usage', 'wall_s' and 'output_dir'.
+    """
     tasks_dir = Path(__file__).parent
     task_dir = tasks_dir / task_name
     name = output_name or datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -407,6 +852,13 @@ def run_agent(task_name: str, max_iterations: int = 20, model: str = "gpt-4o", o
         print(f"Error: Task directory not found: {task_dir}")
         return
     
+    checkpoint = None
+    if resume:
+        checkpoint = load_checkpoint(output_dir) if output_name else None
+        if checkpoint is None:
+            print(f"Error: No checkpoint found in {output_dir}")
+            return
+    
     print("=" * 60)
     print("AI Agent for Computational Biology")
     print("=" * 60)
@@ -414,10 +866,30 @@ def run_agent(task_name: str, max_iterations: int = 20, model: str = "gpt-4o", o
     print(f"Output: {output_dir}")
     print(f"Model: {model}")
     print(f"Max iterations: {max_iterations}")
+    if llm_mode != "live" or llm_base_url:
+        print(f"LLM: {llm_mode} ({llm_cache or task_dir / 'llm_cache'})" + (f", endpoint {llm_base_url}" if llm_base_url else ""))
+    print(f"Context budget: {context_budget} tokens")
+    if checkpoint is not None:
+        print(f"Resuming after iteration {checkpoint['iteration']}")
     print()
     
-    client = OpenAI()
-    tools = AgentTools(task_dir, output_dir)
+    run_start = time.perf_counter()
+    if client is None:
+        client = make_llm_client(llm_mode, llm_cache or task_dir / "llm_cache", llm_base_url,
+                                 redact={str(output_dir): "<output>", str(task_dir): "<task>"})
+    tools = AgentTools(task_dir, output_dir, tamarind=tamarind, jobs=jobs)
+    events = EventLog(output_dir / "events.jsonl")
+    
+    def summary_usage(usage, seconds: float):
+        context.record_usage(usage)
+        events.event("usage", iteration=iteration, source="summarizer", seconds=seconds,
+                     **{key: getattr(usage, key, None) for key in ("prompt_tokens", "completion_tokens", "total_tokens")})
+    
+    context = ContextManager(output_dir, model, context_budget,
+                             summarizer=llm_summarizer(client, model, on_usage=summary_usage))
+    events.event("run_start", task=task_name, model=model, max_iterations=max_iterations,
+                 context_budget=context_budget, max_total_tokens=max_total_tokens, resume=resume, seed=seed)
+    tools.kernels.start()  # warm up the Python worker while the first completion is requested
     
     # Load task description from question.md if it exists
     question_path = task_dir / "question.md"
@@ -433,32 +905,57 @@ TASK DESCRIPTION:
 {task_description}
 
 AVAILABLE TOOLS:
-- read_file: Read files (PDB, JSON, CSV, Python, etc.)
+- read_file: Read files (PDB, JSON, CSV, Python, etc.); large files are paged with offset/limit
+- view_file: head/tail of a file, or grep it with line numbers
+- summarize_file: Schema and column stats of a CSV, or chain/residue counts of a PDB, without reading it all
 - write_file: Save outputs to the output directory
 - list_directory: Explore available files
 - run_python: Execute Python code (numpy, pandas, BioPython available)
 - tamarind_list_tools: List available Tamarind Bio ML tools
 - tamarind_get_tool_spec: Get tool parameters (ALWAYS call before using a tool)
 - tamarind_upload_file: Upload files for Tamarind jobs
-- tamarind_submit_job: Submit jobs to Tamarind Bio
+- tamarind_submit_job: Submit a job to Tamarind Bio and wait for it
+- tamarind_submit_jobs: Submit a batch of jobs in the background (non-blocking)
+- tamarind_job_status: Check background job progress
+- tamarind_collect_results: Get downloaded results of finished background jobs
 - task_complete: Call when done with a summary
 
 GENERAL WORKFLOW:
-1. Explore the task directory to understand available data
+1. Explore the task directory to understand available data (summarize_file before reading large files)
 2. Read the task description and requirements carefully
 3. Implement the analysis using Python code and/or Tamarind tools
 4. For Tamarind tools:
    a. Call tamarind_get_tool_spec to understand required parameters
    b. Upload any required files with tamarind_upload_file
-   c. Submit jobs with tamarind_submit_job
+   c. Submit jobs with tamarind_submit_job, or launch many at once with tamarind_submit_jobs
+      and continue analysis while they run
 5. Save intermediate and final results as JSON/CSV files
 6. Call task_complete with a summary when finished
 
+CONTEXT:
+- Long tool outputs are saved under tool_results/ in the output directory; you see a preview
+  and the file name. Page through the full output with read_file (offset/limit, and column when
+  a page ends inside a long line) if you need it.
+- Older tool outputs may be replaced by a short note, and older turns by a summary.
+  Save anything you will need later to files.
+
 PYTHON ENVIRONMENT:
 - BioPython: PDBParser, ShrakeRupley (for SASA), seq1, SeqIO, NeighborSearch
 - NumPy, Pandas, json, Path, os are available
+- load_dataset("data.csv") returns the same DataFrame as pd.read_csv, served from a shared binary
+  cache (converted once per unique file, then memory-mapped); prefer it for large tables
+- cgm_responses("data_cgm.csv") returns baseline (mean t < 0), peak, peak_delta, time_to_peak and
+  iAUC for every subject/meal/rep in one vectorized pass; glucose_cube() gives the dense
+  (subject x meal x rep x minute) array with .select(), .deltas(), .metrics(), .subject_means()
+- load_features("data_metabolomics.csv") (or data_lipids.csv) gives a FeatureTable; chain
+  .log_transform().normalize().by_subject(), then .compare(meta.set_index("id")["Sex"], covariates=[...], meta=meta)
+  or .associate("Systolic bp", covariates=["age", "BMI"], meta=meta) to test every feature at once
+  (Welch t / ANOVA / adjusted OLS with BH q-values); .to_frame() merges onto data_meta.csv by id
 - Use print() to output results
 - Current working directory is set to the task directory
+- The Python session persists between run_python calls: reuse loaded data instead of re-reading files
+- Each call has a time limit (default 300 s, set 'timeout' for longer work) and a memory limit;
+  exceeding either resets the session
 
 Be methodical, save intermediate results, and try alternatives if something fails."""
 
@@ -466,81 +963,257 @@ Be methodical, save intermediate results, and try alternatives if something fail
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": "Please complete the task. Start by exploring the available files."}
     ]
-    
     iteration = 0
+    pending_results: dict[str, str] = {}  # tool_call_id -> result for the turn in progress
+    
+    if checkpoint is not None:
+        messages = checkpoint["messages"]
+        iteration = checkpoint["iteration"]
+        pending_results = checkpoint.get("pending_results") or {}
+        context.load_state(checkpoint.get("context", {}))
+        if checkpoint.get("jobs"):
+            tools.restore_jobs(checkpoint["jobs"])
+        events.event("resume", iteration=iteration, pending_results=len(pending_results),
+                     jobs=len(checkpoint.get("jobs") or []))
+    else:
+        for msg in messages:
+            events.message(msg)
+    
     task_completed = False
+    status = "max_iterations"
+    checkpoint_lock = threading.Lock()
+    outputs: dict = {}  # last output manifest; rescanned at turn boundaries, not per tool result
     
-    while iteration < max_iterations and not task_completed:
-        iteration += 1
-        print(f"\n--- Iteration {iteration}/{max_iterations} ---")
+    def save_checkpoint(call_id: Optional[str] = None, result: Optional[str] = None):
+        """Write the checkpoint; with `call_id`, first record that tool call's result.
         
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                tools=TOOLS,
-                tool_choice="auto"
-            )
+        Tool calls finish on worker threads, so the insert and the snapshot of
+        pending_results both happen under the lock and only the snapshot is serialized.
+        """
+        nonlocal outputs
+        with checkpoint_lock:
+            if call_id is not None:
+                pending_results[call_id] = result
+            else:
+                outputs = output_manifest(output_dir)
+            snapshot = dict(pending_results)
+            write_checkpoint(output_dir, {
+                "task": task_name, "model": model, "iteration": iteration,
+                "messages": [to_jsonable(m) for m in messages],
+                "pending_results": snapshot,
+                "context": context.state(),
+                "jobs": tools.job_records(),
+                "outputs": outputs,
+            })
+    
+    def run_tool_calls(assistant_message) -> bool:
+        """Execute a turn's tool calls (skipping ones already finished); returns True on task_complete."""
+        calls, todo = [], []
+        for tool_call in assistant_message.tool_calls:
+            tool_name = tool_call.function.name
+            try:
+                arguments = json.loads(tool_call.function.arguments)
+            except json.JSONDecodeError:
+                arguments = {}
+            calls.append((tool_name, arguments))
+            if tool_call.id in pending_results:
+                print(f"  Tool: {tool_name} (already finished before resume)")
+                continue
             
-            assistant_message = response.choices[0].message
-            messages.append(assistant_message)
+            print(f"  Tool: {tool_name}")
+            if tool_name != "run_python":
+                print(f"  Args: {json.dumps(arguments, indent=2)[:200]}")
+            todo.append(len(calls) - 1)
+            events.event("tool_call", iteration=iteration, id=tool_call.id,
+                         name=tool_name, arguments=arguments)
+        
+        def on_done(index: int, result: str, seconds: float):
+            i = todo[index]
+            call_id = assistant_message.tool_calls[i].id
+            events.event("tool_result", iteration=iteration, id=call_id, name=calls[i][0],
+                         seconds=seconds, chars=len(result), error=result.startswith("Error"))
+            save_checkpoint(call_id, result)
+        
+        # Independent calls of one turn run concurrently; results keep call order
+        start = time.time()
+        tools.execute_tools([calls[i] for i in todo], on_done=on_done)
+        if len(todo) > 1:
+            print(f"  Ran {len(todo)} tool calls in {time.time() - start:.1f}s")
+        
+        completed = False
+        for i, tool_call in enumerate(assistant_message.tool_calls):
+            result = pending_results[tool_call.id]
+            if result.startswith("TASK_COMPLETE:"):
+                completed = True
+                print(f"\n{result}")
             
-            if assistant_message.tool_calls:
-                for tool_call in assistant_message.tool_calls:
-                    tool_name = tool_call.function.name
-                    try:
-                        arguments = json.loads(tool_call.function.arguments)
-                    except json.JSONDecodeError:
-                        arguments = {}
-                    
-                    print(f"  Tool: {tool_name}")
-                    if tool_name != "run_python":
-                        print(f"  Args: {json.dumps(arguments, indent=2)[:200]}")
-                    
-                    result = tools.execute_tool(tool_name, arguments)
-                    
-                    if result.startswith("TASK_COMPLETE:"):
-                        task_completed = True
-                        print(f"\n{result}")
-                    
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": result[:5000]
-                    })
-                    
-                    preview = result[:300] + "..." if len(result) > 300 else result
-                    print(f"  Result: {preview}")
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": context.offload(tool_call.id, tool_call.function.name, result, calls[i][1])
+            })
+            events.message(messages[-1], iteration=iteration)
             
-            elif assistant_message.content:
-                print(f"  Assistant: {assistant_message.content[:500]}")
-                
-        except Exception as e:
-            print(f"  Error: {e}")
-            traceback.print_exc()
-            break
+            preview = result[:300] + "..." if len(result) > 300 else result
+            print(f"  Result: {preview}")
+        pending_results.clear()
+        return completed
     
-    # Save conversation log
-    log_path = output_dir / "agent_log.json"
-    with open(log_path, "w") as f:
-        log_data = [msg.model_dump() if hasattr(msg, "model_dump") else msg for msg in messages]
-        json.dump(log_data, f, indent=2, default=str)
+    try:
+        if checkpoint is not None:
+            # Finish the turn that was interrupted, then tell the model what changed
+            last = messages[-1]
+            if message_field(last, "role") == "assistant" and message_field(last, "tool_calls"):
+                print(f"\n--- Resuming iteration {iteration} ---")
+                from openai.types.chat import ChatCompletionMessage
+                task_completed = run_tool_calls(ChatCompletionMessage.model_validate(last))
+            if not task_completed:
+                messages.append({"role": "user", "content": resume_note(checkpoint, output_dir)})
+                events.message(messages[-1], iteration=iteration)
+            save_checkpoint()
+        
+        while iteration < max_iterations and not task_completed:
+            iteration += 1
+            print(f"\n--- Iteration {iteration}/{max_iterations} ---")
+            
+            if max_total_tokens and context.usage["total_tokens"] >= max_total_tokens:
+                print(f"  Token limit reached ({context.usage['total_tokens']} >= {max_total_tokens}); stopping")
+                status = "token_limit"
+                break
+            
+            try:
+                compacted = context.compact(messages)
+                if compacted is not messages:
+                    events.event("compaction", iteration=iteration, before=len(messages), after=len(compacted),
+                                 estimated_tokens=context.estimate(compacted))
+                    messages = compacted
+                start = time.perf_counter()
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    tools=TOOLS,
+                    tool_choice="auto",
+                    **({"seed": seed} if seed is not None else {})
+                )
+                usage = context.record_usage(response.usage)
+                events.event("usage", iteration=iteration, seconds=time.perf_counter() - start,
+                             **{key: getattr(response.usage, key, None)
+                                for key in ("prompt_tokens", "completion_tokens", "total_tokens")})
+                print(f"  Tokens: prompt {getattr(response.usage, 'prompt_tokens', '?')}, "
+                      f"total so far {usage['total_tokens']}")
+                
+                assistant_message = response.choices[0].message
+                messages.append(assistant_message)
+                events.message(assistant_message, iteration=iteration)
+                
+                if assistant_message.tool_calls:
+                    save_checkpoint()  # the turn is now in progress
+                    task_completed = run_tool_calls(assistant_message)
+                elif assistant_message.content:
+                    print(f"  Assistant: {assistant_message.content[:500]}")
+                save_checkpoint()
+            
+            except Exception as e:
+                print(f"  Error: {e}")
+                traceback.print_exc()
+                events.event("error", iteration=iteration, error=f"{type(e).__name__}: {e}",
+                             traceback=traceback.format_exc())
+                status = "error"
+                break
+        if task_completed:
+            status = "completed"
+    except KeyboardInterrupt:
+        print("\n  Interrupted")
+        status = "interrupted"
+    finally:
+        tools.close()
+        events.event("run_end", status=status, iterations=iteration, usage=context.usage)
+        events.close()
     
     print(f"\n{'=' * 60}")
-    print(f"Agent finished after {iteration} iterations")
+    print(f"Agent finished after {iteration} iterations ({status})")
+    print(context.report())
+    if isinstance(client, CachedChatClient):
+        print(client.report())
     print(f"Outputs saved to: {output_dir}")
-    print(f"Conversation log: {log_path}")
+    print(f"Event log: {events.path} (export the conversation with: python event_log.py {events.path} --export agent_log.json)")
+    if status in ("error", "interrupted"):
+        print(f"Resume with: python agent.py --task {task_name} --resume {name}")
+    
+    return {
+        "task": task_name, "status": status, "iterations": iteration, "usage": dict(context.usage),
+        "wall_s": time.perf_counter() - run_start, "output_dir": str(output_dir),
+    }
+
+
+def load_env():
+    """Load .env from the working directory and the tasks directory."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    load_dotenv(Path(__file__).parent / ".env")
+
+
+def openai_client(**kwargs):
+    """openai.OpenAI(**kwargs), imported on first use: the SDK takes ~1 s to import,
+    which `--help` and argument errors should not pay. Replay runs still import
+    the SDK's response types once they serve a recorded response."""
+    from openai import OpenAI
+    return OpenAI(**kwargs)
+
+
+def make_llm_client(mode: str, store_dir, base_url: Optional[str] = None, redact: Optional[dict] = None):
+    """OpenAI client for run_agent, wrapped for record/replay when requested."""
+    load_env()
+    
+    def endpoint():
+        if base_url:
+            # Local servers usually ignore the key, but the SDK requires one
+            return openai_client(base_url=base_url, api_key=os.environ.get("OPENAI_API_KEY", "local"))
+        return openai_client()
+    
+    if mode == "live":
+        return endpoint()
+    if mode == "replay":
+        return CachedChatClient(None, store_dir, "replay", fallback=endpoint() if base_url else None, redact=redact)
+    return CachedChatClient(endpoint(), store_dir, mode, redact=redact)
+
+
+def resume_note(checkpoint: dict, output_dir: Path) -> str:
+    """Message telling the model the run was resumed and what may have changed."""
+    lines = [
+        f"Note: this run was interrupted and resumed from a checkpoint after iteration {checkpoint['iteration']}. "
+        "Python session variables were lost; reload any data you need from files."
+    ]
+    changes = diff_manifest(checkpoint.get("outputs", {}), output_manifest(output_dir))
+    for kind in ("missing", "changed"):
+        if changes[kind]:
+            lines.append(f"Output files {kind} since the checkpoint: {', '.join(changes[kind][:20])}")
+    pending = [j["job_name"] for j in checkpoint.get("jobs") or []
+               if j.get("status") not in COMPLETE_STATUSES and not j.get("error")]
+    if pending:
+        lines.append(f"Background jobs are still tracked (check with tamarind_job_status): {', '.join(pending)}")
+    return "\n".join(lines)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Task-Agnostic AI Agent for Computational Biology")
     parser.add_argument("--task", required=True, help="Task directory name")
     parser.add_argument("--output", help="Output directory name (default: timestamp)")
+    parser.add_argument("--resume", metavar="OUTPUT_NAME", help="Resume an interrupted run from its checkpoint")
     parser.add_argument("--max-iterations", type=int, default=100, help="Maximum iterations (default: 20)")
     parser.add_argument("--model", default="gpt-4o", help="OpenAI model (default: gpt-4o)")
+    parser.add_argument("--context-budget", type=int, default=CONTEXT_BUDGET_TOKENS,
+                        help=f"Prompt token budget before old tool output is compacted (default: {CONTEXT_BUDGET_TOKENS})")
+    parser.add_argument("--max-total-tokens", type=int, help="Stop after this many total API tokens")
+    parser.add_argument("--llm-mode", choices=["live", "record", "replay"], default="live",
+                        help="record: store LLM responses; replay: serve them offline (default: live)")
+    parser.add_argument("--llm-cache", help="Recorded response store (default: <task>/llm_cache)")
+    parser.add_argument("--llm-base-url", help="OpenAI-compatible endpoint to use instead of OpenAI (e.g. a local model)")
     
     args = parser.parse_args()
-    run_agent(args.task, args.max_iterations, args.model, args.output)
+    run_agent(args.task, args.max_iterations, args.model, args.resume or args.output,
+              args.context_budget, args.max_total_tokens, resume=bool(args.resume),
+              llm_mode=args.llm_mode, llm_cache=args.llm_cache, llm_base_url=args.llm_base_url)
 
 
 if __name__ == "__main__":
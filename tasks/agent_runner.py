@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Run many agent sessions concurrently.
+
+Each (task, seed) pair is one run_agent session in its own thread. Sessions
+share:
+- one LLM client behind a requests/tokens-per-minute rate limiter (with retry
+  and backoff on rate-limit and transient API errors), optionally wrapped in
+  the record/replay cache from llm_cache.py (each session keeps its own call
+  order in the store, so a replayed batch is deterministic)
+- one Tamarind client and one background JobManager with deduplication, so an
+  identical job (same tool and settings) submitted by several sessions runs once
+  and its downloaded result is shared
+
+Eval examples (context/eval_examples/question_N) are staged into a clean task
+directory holding only the data files and a question.md, so the agent never sees
+the reference notebook, answer or rubric.
+
+Task tables are converted into the shared columnar cache (data_cache.py)
+before the sessions start.
+
+Every session's console output goes to runs/<batch>/logs/<session>.log. After
+the batch, an aggregate report with throughput, latency, token use and estimated
+cost is printed and written to runs/<batch>/report.json.
+
+Usage:
+    python agent_runner.py --tasks ph_sensitive_design --eval-examples --seeds 0,1,2 --parallel 4
+    python agent_runner.py --tasks eval:question_1 eval:question_2 --rpm 30
+    python agent_runner.py --eval-examples --llm-mode replay --llm-cache llm_cache
+"""
+
+import io
+import re
+import sys
+import json
+import time
+import types
+import argparse
+import threading
+import contextvars
+import statistics
+from pathlib import Path
+from datetime import datetime
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai
+
+from agent import run_agent, make_llm_client
+from event_log import summarize_events
+from llm_cache import CachedChatClient
+from data_cache import DataCache
+from tamarind_client import TamarindClient, JobManager
+
+TASKS_DIR = Path(__file__).parent
+RUNS_DIR = TASKS_DIR / "runs"
+EVAL_DIR = TASKS_DIR.parent / "context" / "eval_examples"
+EVAL_HIDDEN = {"answer.txt", "rubric.txt"}  # plus reference notebooks (*.ipynb)
+
+# USD per 1M tokens (input, output); unknown models are reported without cost
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+RETRYABLE_ERRORS = (
+    openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError
+)
+MAX_RETRIES = 5
+
+
+# =============================================================================
+# Shared LLM access
+# =============================================================================
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, shared by all sessions."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._requests = requests_per_minute or 0.0
+        self._tokens = tokens_per_minute or 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_s = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request of about `tokens` tokens may be sent."""
+        tokens = min(tokens, self.tpm or 0)
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self.rpm
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+                if wait == 0.0:
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    self.waited_s += time.monotonic() - start
+                    return
+            time.sleep(wait)
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the token bucket once the real usage of a request is known."""
+        if self.tpm:
+            with self._lock:
+                self._tokens -= actual - min(estimated, self.tpm)
+
+
+class RateLimitedClient:
+    """Wraps an OpenAI-style client: rate limiting, retries and per-request latency."""
+
+    def __init__(self, client, limiter: RateLimiter):
+        self.client = client
+        self.limiter = limiter
+        self.latencies: list[float] = []
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._owner = self  # holds the counters; session views share it
+        # Same attribute path as the OpenAI client
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def session(self, name: str) -> "RateLimitedClient":
+        """Client for one session: shared limiter and counters, and its own replay order when caching."""
+        client = self.client.session(name) if isinstance(self.client, CachedChatClient) else self.client
+        view = RateLimitedClient(client, self.limiter)
+        view.latencies, view._lock, view._owner = self.latencies, self._lock, self._owner
+        return view
+
+    def create(self, **request):
+        # chars/4 of the serialized request is close enough for budgeting
+        estimate = len(json.dumps(request.get("messages", []), default=str)) // 4
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire(estimate)
+            start = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(**request)
+            except RETRYABLE_ERRORS:
+                if attempt == MAX_RETRIES:
+                    raise
+                with self._lock:
+                    self._owner.retries += 1
+                time.sleep(min(2 ** attempt, 60))
+                continue
+            usage = getattr(response, "usage", None)
+            self.limiter.settle(estimate, getattr(usage, "total_tokens", None) or estimate)
+            with self._lock:
+                self.latencies.append(time.perf_counter() - start)
+            return response
+
+
+# =============================================================================
+# Per-session console output
+# =============================================================================
+
+class SessionOutput(io.TextIOBase):
+    """
+    sys.stdout/stderr stand-in that sends each session's output to its own file.
+
+    The target lives in a context variable, so threads that run in a copy of the
+    session's context (run_agent's tool executor, the JobManager poller) write
+    to the same log. Output arriving after that log was closed goes to `default`.
+    """
+
+    def __init__(self, default, name: str = "output"):
+        self.default = default
+        self._stream = contextvars.ContextVar(f"session_{name}", default=None)
+
+    def attach(self, stream):
+        self._stream.set(stream)
+
+    def detach(self):
+        self._stream.set(None)
+
+    def _target(self):
+        stream = self._stream.get()
+        return self.default if stream is None or stream.closed else stream
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        try:
+            return self._target().write(s)
+        except ValueError:  # closed between the check and the write
+            return self.default.write(s)
+
+    def flush(self):
+        try:
+            self._target().flush()
+        except ValueError:
+            pass
+
+
+# =============================================================================
+# Tasks
+# =============================================================================
+
+def research_question(notebook: Path) -> str:
+    """The 'Research Question' section of an eval notebook's first markdown cell."""
+    nb = json.loads(notebook.read_text())
+    for cell in nb.get("cells", []):
+        if cell.get("cell_type") == "markdown":
+            text = "".join(cell.get("source", []))
+            match = re.search(r"##\s*Research Question\s*\n(.*?)(?=\n##\s|\Z)", text, re.S)
+            title = text.splitlines()[0].lstrip("# ").strip() if text.strip() else ""
+            return f"# {title}\n\n{match.group(1).strip() if match else text.strip()}"
+    return ""
+
+
+def stage_eval_task(question_dir: Path, dest: Path) -> Path:
+    """Task directory with the eval's data files (symlinked) and a question.md, without answers."""
+    dest.mkdir(parents=True, exist_ok=True)
+    for path in question_dir.iterdir():
+        if path.name in EVAL_HIDDEN or path.suffix == ".ipynb" or not path.is_file():
+            continue
+        link = dest / path.name
+        if not link.exists():
+            link.symlink_to(path.resolve())
+
+    notebooks = sorted(question_dir.glob("*.ipynb"))
+    question = research_question(notebooks[0]) if notebooks else ""
+    (dest / "question.md").write_text(
+        f"{question}\n\nThe data files are in this directory. Write your final answer, with the "
+        "supporting numbers, to answer.md in the output directory before calling task_complete.\n"
+    )
+    return dest
+
+
+def resolve_tasks(names: list[str], eval_examples: bool, batch_dir: Path) -> list[dict]:
+    """[{"name", "task_dir"}] for task names, 'eval:question_N' entries and all eval examples."""
+    specs = []
+    if eval_examples and EVAL_DIR.exists():
+        names = list(names) + [f"eval:{p.name}" for p in sorted(EVAL_DIR.iterdir()) if p.is_dir()]
+    for name in dict.fromkeys(names):
+        if name.startswith("eval:"):
+            question = name.split(":", 1)[1]
+            source = EVAL_DIR / question
+            if not source.is_dir():
+                raise ValueError(f"Eval example not found: {source}")
+            specs.append({"name": question, "task_dir": stage_eval_task(source, batch_dir / "tasks" / question)})
+        else:
+            task_dir = TASKS_DIR / name
+            if not task_dir.is_dir():
+                raise ValueError(f"Task directory not found: {task_dir}")
+            specs.append({"name": name, "task_dir": task_dir})
+    return specs
+
+
+# =============================================================================
+# Runner
+# =============================================================================
+
+def session_cost(model: str, usage: dict) -> Optional[float]:
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return (usage.get("prompt_tokens", 0) * prices[0] + usage.get("completion_tokens", 0) * prices[1]) / 1e6
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def run_batch(
+    specs: list[dict],
+    seeds: list[Optional[int]],
+    batch: str,
+    parallel: int = 4,
+    model: str = "gpt-4o",
+    max_iterations: int = 50,
+    rpm: Optional[float] = None,
+    tpm: Optional[float] = None,
+    llm_mode: str = "live",
+    llm_cache: Optional[str] = None,
+    llm_base_url: Optional[str] = None,
+    **agent_options
+) -> dict:
+    """Run every (task, seed) session with at most `parallel` at once; returns the report."""
+    batch_dir = RUNS_DIR / batch
+    log_dir = batch_dir / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    # Redact batch-specific paths so recorded LLM responses replay across batches
+    redact = {str(batch_dir): "<batch>", batch: "<batch>", str(TASKS_DIR): "<tasks>"}
+    llm = RateLimitedClient(
+        make_llm_client(llm_mode, llm_cache or TASKS_DIR / "llm_cache", llm_base_url, redact=redact),
+        RateLimiter(rpm, tpm),
+    )
+    try:
+        tamarind = TamarindClient()
+    except ValueError:
+        tamarind = None  # no API key: sessions report the error if they try to use Tamarind
+    jobs = JobManager(tamarind, download_dir=str(batch_dir / "tamarind_results"), dedupe=True) if tamarind else None
+
+    # Convert task tables once up front instead of in every session's first load_dataset call
+    cache = DataCache()
+    for spec in specs:
+        cache.prepare(spec["task_dir"])
+
+    sessions = [(spec, seed) for spec in specs for seed in seeds]
+    stdout, stderr = SessionOutput(sys.stdout, "stdout"), SessionOutput(sys.stderr, "stderr")
+
+    def run_session(spec: dict, seed: Optional[int]) -> dict:
+        label = spec["name"] if seed is None else f"{spec['name']}_s{seed}"
+        with open(log_dir / f"{label}.log", "w", buffering=1) as log:
+            stdout.attach(log)
+            stderr.attach(log)
+            try:
+                result = run_agent(
+                    str(spec["task_dir"]), max_iterations, model,
+                    output_name=batch if seed is None else f"{batch}_s{seed}",
+                    seed=seed, client=llm.session(label), tamarind=tamarind, jobs=jobs, **agent_options
+                )
+            except Exception as e:
+                print(f"Session failed: {type(e).__name__}: {e}")
+                result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+            finally:
+                stdout.detach()
+                stderr.detach()
+        result = {**(result or {"status": "error"}), "session": label, "task": spec["name"], "seed": seed}
+        result["cost_usd"] = session_cost(model, result.get("usage", {}))
+        events = Path(result.get("output_dir", "")) / "events.jsonl"
+        if events.is_file():
+            result["tool_s"] = sum(t["seconds"] for t in summarize_events(events)["tool_calls"].values())
+        return result
+
+    print(f"Running {len(sessions)} sessions ({len(specs)} tasks x {len(seeds)} seeds), {parallel} at a time")
+    print(f"Logs: {log_dir}")
+    results = []
+    start = time.perf_counter()
+    sys.stdout, sys.stderr = stdout, stderr
+    try:
+        with ThreadPoolExecutor(parallel, thread_name_prefix="session") as pool:
+            futures = {pool.submit(run_session, spec, seed): (spec, seed) for spec, seed in sessions}
+            for future in as_completed(futures):
+                r = future.result()
+                results.append(r)
+                print(f"  [{len(results)}/{len(sessions)}] {r['session']}: {r['status']} "
+                      f"({r.get('iterations', 0)} iterations, {r.get('wall_s', 0):.0f}s)")
+    finally:
+        sys.stdout, sys.stderr = stdout.default, stderr.default
+        if jobs is not None:
+            jobs.shutdown()
+    wall = time.perf_counter() - start
+
+    report = build_report(results, llm, jobs, wall, model)
+    report["batch"] = batch
+    with open(batch_dir / "report.json", "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print_report(report)
+    if isinstance(llm.client, CachedChatClient):
+        print(llm.client.report())
+    print(f"\nReport written to {batch_dir / 'report.json'}")
+    return report
+
+
+def build_report(results: list[dict], llm: RateLimitedClient, jobs: Optional[JobManager], wall: float, model: str) -> dict:
+    tokens = {k: sum(r.get("usage", {}).get(k, 0) for r in results)
+              for k in ("prompt_tokens", "completion_tokens", "total_tokens")}
+    costs = [r["cost_usd"] for r in results if r.get("cost_usd") is not None]
+    session_walls = [r["wall_s"] for r in results if "wall_s" in r]
+    iterations = sum(r.get("iterations", 0) for r in results)
+    statuses: dict[str, int] = {}
+    for r in results:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    job_records = jobs.status() if jobs is not None else []
+    return {
+        "model": model,
+        "sessions": len(results),
+        "statuses": statuses,
+        "wall_s": wall,
+        "throughput": {
+            "sessions_per_hour": len(results) / wall * 3600 if wall else None,
+            "iterations_per_minute": iterations / wall * 60 if wall else None,
+        },
+        "session_wall_s": {"median": statistics.median(session_walls) if session_walls else None,
+                           "max": max(session_walls, default=None)},
+        "llm": {
+            "requests": len(llm.latencies),
+            "latency_p50_s": percentile(llm.latencies, 0.5),
+            "latency_p95_s": percentile(llm.latencies, 0.95),
+            "rate_limit_wait_s": llm.limiter.waited_s,
+            "retries": llm.retries,
+            **tokens,
+        },
+        "tool_s": sum(r.get("tool_s", 0.0) for r in results),
+        "cost_usd": sum(costs) if costs else None,
+        "tamarind_jobs": len(job_records),
+        "results": sorted(results, key=lambda r: r["session"]),
+    }
+
+
+def print_report(report: dict):
+    llm = report["llm"]
+    print(f"\n{'=' * 60}")
+    print(f"Sessions: {report['sessions']} {report['statuses']} in {report['wall_s']:.0f}s "
+          f"({report['throughput']['sessions_per_hour']:.1f}/hour)")
+    p50, p95 = llm["latency_p50_s"], llm["latency_p95_s"]
+    print(f"LLM: {llm['requests']} requests, latency p50 {p50 or 0:.2f}s p95 {p95 or 0:.2f}s, "
+          f"{llm['rate_limit_wait_s']:.1f}s throttled, {llm['retries']} retries")
+    cost = f"${report['cost_usd']:.2f}" if report["cost_usd"] is not None else "n/a"
+    print(f"Tokens: {llm['total_tokens']} ({llm['prompt_tokens']} prompt), cost {cost}; "
+          f"tool time {report['tool_s']:.0f}s; Tamarind jobs {report['tamarind_jobs']}")
+    print(f"  {'session':<32}{'status':<16}{'iters':>6}{'wall s':>9}{'tokens':>10}{'cost':>9}")
+    for r in report["results"]:
+        cost = f"${r['cost_usd']:.3f}" if r.get("cost_usd") is not None else "-"
+        print(f"  {r['session']:<32}{r['status']:<16}{r.get('iterations', 0):>6}{r.get('wall_s', 0):>9.0f}"
+              f"{r.get('usage', {}).get('total_tokens', 0):>10}{cost:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many agent sessions concurrently")
+    parser.add_argument("--tasks", nargs="*", default=[], help="Task directory names or eval:question_N")
+    parser.add_argument("--eval-examples", action="store_true", help="Add every context/eval_examples question")
+    parser.add_argument("--seeds", default="", help="Comma-separated model seeds (default: one unseeded run)")
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent sessions (default: 4)")
+    parser.add_argument("--name", help="Batch name (default: timestamp)")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--max-iterations", type=int, default=50)
+    parser.add_argument("--rpm", type=float, help="Shared LLM requests per minute")
+    parser.add_argument("--tpm", type=float, help="Shared LLM tokens per minute")
+    parser.add_argument("--llm-mode", choices=["live", "record", "replay"], default="live")
+    parser.add_argument("--llm-cache", help="Recorded response store (default: tasks/llm_cache)")
+    parser.add_argument("--llm-base-url", help="OpenAI-compatible endpoint to use instead of OpenAI")
+    args = parser.parse_args()
+
+    batch = args.name or datetime.now().strftime("batch_%Y%m%d_%H%M%S")
+    try:
+        specs = resolve_tasks(args.tasks, args.eval_examples, RUNS_DIR / batch)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if not specs:
+        parser.error("no tasks given (use --tasks and/or --eval-examples)")
+    seeds = [int(s) for s in args.seeds.split(",") if s] or [None]
+
+    run_batch(specs, seeds, batch, args.parallel, args.model, args.max_iterations, args.rpm, args.tpm,
+              args.llm_mode, args.llm_cache, args.llm_base_url)
+
+
+if __name__ == "__main__":
+    main()
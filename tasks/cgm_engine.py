@@ -0,0 +1,273 @@
+"""
+Vectorized postprandial glucose responses for CGM tables.
+
+The question notebooks compute meal responses with per-(subject, rep) pandas
+loops. Here the long-format readings (glucose, subject, foods, mitigator, food,
+rep, mins_since_start) are scattered once into a dense array
+
+    values[subject, meal, rep, timepoint]     NaN where no reading exists
+
+and baselines, delta curves, peaks, time-to-peak and iAUC are computed for
+every meal of every subject in a single pass of array operations.
+
+Definitions (matching the notebooks):
+    baseline      mean glucose over the pre-meal window, default t < 0
+    delta         glucose - baseline
+    peak          max glucose in the response window, default t >= 0
+    peak_delta    peak - baseline
+    time_to_peak  minute of the peak (first one on ties)
+    iauc          incremental AUC: trapezoidal area of the delta curve above
+                  zero (area below baseline ignored, crossings interpolated)
+
+In run_python, `glucose_cube("data_cgm.csv")` builds a cube through the shared
+data cache and `cgm_responses("data_cgm.csv")` returns the per-meal table.
+
+Usage:
+    cube = GlucoseCube.from_file("context/eval_examples/question_1/data_cgm.csv")
+    table = cube.responses()                                # one row per subject/meal/rep
+    bread = cube.select(meals=["Bread"]).metrics()["peak_delta"]   # (subjects, 1, reps)
+    per_subject = cube.subject_means("peak_delta")          # subjects x meals, reps averaged
+"""
+
+import warnings
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+MEAL_COLUMN = "foods"
+COLUMNS = ["glucose", "subject", "foods", "mitigator", "food", "rep", "mins_since_start"]
+METRICS = ("baseline", "peak", "peak_delta", "time_to_peak", "iauc")
+
+
+def _labels(values) -> tuple[np.ndarray, list]:
+    """Integer codes (-1 = missing) and labels of a column."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    return codes, list(uniques)
+
+
+def positive_area(deltas: np.ndarray, minutes: np.ndarray) -> np.ndarray:
+    """
+    Trapezoidal area above zero along the last axis. Segments with a missing
+    end point contribute nothing; segments crossing zero contribute only the
+    triangle above it.
+    """
+    d0, d1 = deltas[..., :-1], deltas[..., 1:]
+    dt = np.diff(minutes).astype(float)
+    hi, lo = np.maximum(d0, d1), np.minimum(d0, d1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        area = np.where(lo >= 0, (d0 + d1) / 2 * dt,
+                        np.where(hi > 0, hi ** 2 / (hi - lo) / 2 * dt, 0.0))
+    return np.nansum(np.where(np.isnan(area), 0.0, area), axis=-1)
+
+
+class GlucoseCube:
+    """Dense (subject x meal x rep x timepoint) glucose array."""
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        subjects: list,
+        meals: list,
+        reps: np.ndarray,
+        minutes: np.ndarray,
+        meal_info: Optional[dict] = None
+    ):
+        """
+        Args:
+            values: Glucose array of shape (subjects, meals, reps, minutes); NaN = no reading
+            subjects, meals, reps, minutes: Labels of each axis (minutes sorted ascending)
+            meal_info: Meal label -> {"food": ..., "mitigator": ...}
+        """
+        self.values = values
+        self.subjects = list(subjects)
+        self.meals = list(meals)
+        self.reps = np.asarray(reps)
+        self.minutes = np.asarray(minutes)
+        self.meal_info = meal_info or {}
+
+    # =========================================================================
+    # Construction
+    # =========================================================================
+
+    @classmethod
+    def from_codes(cls, glucose, subject_codes, subject_labels, meal_codes, meal_labels,
+                   reps, minutes, meal_info=None) -> "GlucoseCube":
+        """
+        Scatter long-format readings into the dense array. Rows with a missing
+        subject, meal or glucose value are dropped; duplicate readings of the
+        same cell are averaged.
+        """
+        glucose = np.asarray(glucose, dtype=float)
+        subject_codes, meal_codes = np.asarray(subject_codes), np.asarray(meal_codes)
+        keep = (subject_codes >= 0) & (meal_codes >= 0) & ~np.isnan(glucose)
+        rep_values, rep_idx = np.unique(np.asarray(reps)[keep], return_inverse=True)
+        minute_values, minute_idx = np.unique(np.asarray(minutes)[keep], return_inverse=True)
+
+        shape = (len(subject_labels), len(meal_labels), len(rep_values), len(minute_values))
+        flat = np.ravel_multi_index((subject_codes[keep], meal_codes[keep], rep_idx, minute_idx), shape)
+        size = int(np.prod(shape))
+        counts = np.bincount(flat, minlength=size)
+        sums = np.bincount(flat, weights=glucose[keep], minlength=size)
+        with np.errstate(invalid="ignore"):
+            values = (sums / counts).reshape(shape)
+        return cls(values, subject_labels, meal_labels, rep_values, minute_values, meal_info)
+
+    @classmethod
+    def from_frame(cls, df, meal_column: str = MEAL_COLUMN) -> "GlucoseCube":
+        """Build from a CGM DataFrame (e.g. pd.read_csv("data_cgm.csv"))."""
+        import pandas as pd
+
+        subject_codes, subjects = _labels(df["subject"])
+        meal_codes, meals = _labels(df[meal_column])
+        info = {}
+        if "food" in df.columns and "mitigator" in df.columns:
+            first = df.groupby(meal_codes, sort=True)[["food", "mitigator"]].first()
+            info = {meals[code]: {k: None if pd.isna(row[k]) else row[k] for k in ("food", "mitigator")}
+                    for code, row in first.iterrows() if code >= 0}
+        return cls.from_codes(df["glucose"].to_numpy(), subject_codes, subjects, meal_codes, meals,
+                              df["rep"].to_numpy(), df["mins_since_start"].to_numpy(), info)
+
+    @classmethod
+    def from_file(cls, path, cache=None, meal_column: str = MEAL_COLUMN) -> "GlucoseCube":
+        """
+        Build from a CGM table via the shared columnar cache (text columns arrive
+        already factorized), falling back to pandas if the cache is unavailable.
+        """
+        if cache is None:
+            try:
+                from data_cache import DataCache
+                cache = DataCache()
+            except (ImportError, OSError):
+                import pandas as pd
+                return cls.from_frame(pd.read_csv(path), meal_column)
+
+        columns = cache.arrays(path, [c for c in COLUMNS if c != MEAL_COLUMN] + [meal_column])
+        subject_codes, subjects = columns["subject"]
+        meal_codes, meals = columns[meal_column]
+        info = {}
+        if "food" in columns and "mitigator" in columns:
+            codes, first = np.unique(meal_codes, return_index=True)
+            food_codes, foods = columns["food"]
+            mitigator_codes, mitigators = columns["mitigator"]
+            for code, row in zip(codes, first):
+                if code >= 0:
+                    mitigator = mitigator_codes[row]
+                    info[meals[code]] = {"food": foods[food_codes[row]] if food_codes[row] >= 0 else None,
+                                         "mitigator": mitigators[mitigator] if mitigator >= 0 else None}
+        return cls.from_codes(columns["glucose"], subject_codes, subjects, meal_codes, meals,
+                              columns["rep"], columns["mins_since_start"], info)
+
+    def select(self, subjects=None, meals=None, reps=None) -> "GlucoseCube":
+        """Sub-cube restricted to the given labels (in the order given)."""
+        s = slice(None) if subjects is None else [self.subjects.index(x) for x in subjects]
+        m = slice(None) if meals is None else [self.meals.index(x) for x in meals]
+        r = slice(None) if reps is None else [int(np.flatnonzero(self.reps == x)[0]) for x in reps]
+        values = self.values[s][:, m][:, :, r]
+        pick = lambda labels, idx: labels if isinstance(idx, slice) else [labels[i] for i in idx]
+        return GlucoseCube(values, pick(self.subjects, s), pick(self.meals, m),
+                           self.reps[r], self.minutes, self.meal_info)
+
+    @property
+    def shape(self) -> tuple:
+        return self.values.shape
+
+    # =========================================================================
+    # Responses
+    # =========================================================================
+
+    def _window(self, start, end, closed: bool) -> np.ndarray:
+        lo = -np.inf if start is None else start
+        hi = np.inf if end is None else end
+        return (self.minutes >= lo) & ((self.minutes <= hi) if closed else (self.minutes < hi))
+
+    def baseline(self, window: tuple = (None, 0)) -> np.ndarray:
+        """Mean pre-meal glucose over start <= t < end, shape (subjects, meals, reps)."""
+        pre = self.values[..., self._window(*window, closed=False)]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN cells -> NaN
+            return np.nanmean(pre, axis=-1)
+
+    def deltas(self, baseline_window: tuple = (None, 0)) -> np.ndarray:
+        """Glucose minus baseline for every reading, shape (subjects, meals, reps, minutes)."""
+        return self.values - self.baseline(baseline_window)[..., None]
+
+    def metrics(self, baseline_window: tuple = (None, 0), window: tuple = (0, None)) -> dict:
+        """
+        Response metrics for every (subject, meal, rep) at once.
+
+        Args:
+            baseline_window: (start, end) minutes averaged for the baseline, start <= t < end
+            window: (start, end) minutes of the response, start <= t <= end
+
+        Returns:
+            Dict of (subjects, meals, reps) arrays: baseline, peak, peak_delta,
+            time_to_peak, iauc, n_baseline, n_window. Cells without baseline or
+            response readings are NaN.
+        """
+        base = self.baseline(baseline_window)
+        post_mask = self._window(*window, closed=True)
+        post = self.values[..., post_mask]
+        minutes = self.minutes[post_mask]
+
+        n_baseline = (~np.isnan(self.values[..., self._window(*baseline_window, closed=False)])).sum(-1)
+        n_window = (~np.isnan(post)).sum(-1)
+        if not len(minutes):
+            raise ValueError(f"No timepoints in response window {window}")
+        observed = (n_window > 0) & (n_baseline > 0)
+
+        filled = np.where(np.isnan(post), -np.inf, post)
+        arg = filled.argmax(-1)
+        peak = np.where(observed, np.take_along_axis(filled, arg[..., None], -1)[..., 0], np.nan)
+        time_to_peak = np.where(observed, minutes[arg], np.nan)
+        iauc = np.where(observed, positive_area(post - base[..., None], minutes), np.nan)
+        return {
+            "baseline": np.where(observed, base, np.nan),
+            "peak": peak,
+            "peak_delta": peak - base,
+            "time_to_peak": time_to_peak,
+            "iauc": iauc,
+            "n_baseline": n_baseline,
+            "n_window": n_window,
+        }
+
+    def responses(self, baseline_window: tuple = (None, 0), window: tuple = (0, None)):
+        """
+        Long table with one row per observed (subject, meal, rep): subject, meal,
+        food, mitigator, rep and the metrics() columns.
+        """
+        import pandas as pd
+
+        metrics = self.metrics(baseline_window, window)
+        s, m, r = np.nonzero(~np.isnan(metrics["baseline"]))
+        meals = np.array(self.meals, dtype=object)[m]
+        table = pd.DataFrame({
+            "subject": np.array(self.subjects, dtype=object)[s],
+            "meal": meals,
+            "food": [self.meal_info.get(x, {}).get("food") for x in meals],
+            "mitigator": [self.meal_info.get(x, {}).get("mitigator") for x in meals],
+            "rep": self.reps[r],
+        })
+        for name, values in metrics.items():
+            table[name] = values[s, m, r]
+        return table
+
+    def subject_means(self, metric: str = "peak_delta", **kwargs):
+        """Subjects x meals DataFrame of a metric averaged over reps."""
+        import pandas as pd
+
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}")
+        values = self.metrics(**kwargs)[metric]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            means = np.nanmean(values, axis=-1)
+        return pd.DataFrame(means, index=pd.Index(self.subjects, name="subject"),
+                            columns=pd.Index(self.meals, name="meal"))
+
+
+def cgm_responses(path, cache=None, **kwargs):
+    """Per-meal response table for a CGM file (see GlucoseCube.responses)."""
+    return GlucoseCube.from_file(Path(path), cache).responses(**kwargs)
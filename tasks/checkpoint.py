@@ -0,0 +1,74 @@
+"""
+Checkpoints for resumable agent runs.
+
+After every iteration (and after every tool result within an iteration) run_agent
+writes <output>/checkpoint.json with the message history, the results of tool
+calls already finished in the current turn, context/token state, background
+Tamarind job records and a manifest of the output files. `agent.py --resume
+<output_name>` loads it and continues: finished tool calls are not re-run and
+background jobs are polled again instead of being resubmitted.
+
+Writes are atomic (temp file + fsync + rename), so a crash mid-write leaves the
+previous checkpoint intact.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Optional
+
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+# Bookkeeping files that change on every write and are not agent outputs
+MANIFEST_EXCLUDE = {CHECKPOINT_FILE, CHECKPOINT_FILE + ".tmp", "events.jsonl"}
+
+
+def output_manifest(output_dir: Path) -> dict:
+    """{relative path: {"size", "mtime"}} for every file under the output directory."""
+    output_dir = Path(output_dir)
+    manifest = {}
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            path = Path(root) / name
+            rel = path.relative_to(output_dir).as_posix()
+            if rel in MANIFEST_EXCLUDE:
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            manifest[rel] = {"size": st.st_size, "mtime": st.st_mtime}
+    return dict(sorted(manifest.items()))
+
+
+def diff_manifest(old: dict, new: dict) -> dict:
+    """Files missing, changed or added in `new` relative to `old`."""
+    return {
+        "missing": sorted(set(old) - set(new)),
+        "changed": sorted(p for p in old.keys() & new.keys() if old[p]["size"] != new[p]["size"]),
+        "added": sorted(set(new) - set(old)),
+    }
+
+
+def write_checkpoint(output_dir: Path, state: dict) -> Path:
+    """Atomically replace the run's checkpoint."""
+    path = Path(output_dir) / CHECKPOINT_FILE
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"version": CHECKPOINT_VERSION, **state}, f, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def load_checkpoint(output_dir: Path) -> Optional[dict]:
+    """The run's last checkpoint, or None if there is none."""
+    path = Path(output_dir) / CHECKPOINT_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state.get('version')} in {path}")
+    return state
@@ -0,0 +1,243 @@
+"""
+Token accounting and context-window compaction for the agent loop.
+
+Without compaction every assistant message and tool result is resent on every
+iteration, so cost and latency grow quadratically with run length. The
+ContextManager keeps the prompt under a token budget in three steps:
+
+1. Offload: tool results longer than `offload_chars` are written to
+   <output>/tool_results/<handle>.txt; the conversation keeps a head/tail preview
+   plus the handle, which the model pages through with read_file. Pages of a
+   handle are HANDLE_PAGE_CHARS long and are never offloaded again.
+2. Elide: once over budget, tool results older than the most recent
+   `keep_recent` messages are replaced by a one-line stub pointing at their handle.
+3. Summarize: if still over budget, the oldest exchanges are replaced by a single
+   summary message (produced by an optional `summarizer` callable, e.g. a cheap
+   model call), cutting only at turn boundaries so tool calls stay paired.
+
+Token counts use tiktoken when installed and a chars/4 estimate otherwise.
+"""
+
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+CONTEXT_BUDGET_TOKENS = 60000
+KEEP_RECENT_MESSAGES = 12
+OFFLOAD_CHARS = 5000
+HANDLE_DIR = "tool_results"
+HANDLE_PAGE_CHARS = 4000   # read_file page size for handles; below OFFLOAD_CHARS
+PREVIEW_CHARS = 1500
+SUMMARY_INPUT_CHARS = 40000
+SUMMARY_PREFIX = "Summary of earlier work (older messages were compacted):\n"
+ELIDED_PREFIX = "[Elided "
+
+
+def is_handle(path) -> bool:
+    """Whether a read_file path points at an offloaded tool result."""
+    parts = Path(str(path or "")).parts
+    return len(parts) > 1 and parts[0] == HANDLE_DIR
+
+
+def message_field(msg, key: str, default=None):
+    """Read a field from a message dict or an OpenAI message object."""
+    if isinstance(msg, dict):
+        return msg.get(key, default)
+    return getattr(msg, key, default)
+
+
+def message_text(msg) -> str:
+    """Text that counts toward the prompt: content plus tool-call names and arguments."""
+    parts = [message_field(msg, "content") or ""]
+    for call in message_field(msg, "tool_calls") or []:
+        fn = call["function"] if isinstance(call, dict) else call.function
+        name = fn["name"] if isinstance(fn, dict) else fn.name
+        args = fn["arguments"] if isinstance(fn, dict) else fn.arguments
+        parts.append(f"{name}({args})")
+    return "\n".join(parts)
+
+
+class ContextManager:
+    """Keeps the agent's message history within a token budget and tracks usage."""
+
+    def __init__(
+        self,
+        output_dir: Path,
+        model: str = "gpt-4o",
+        budget_tokens: int = CONTEXT_BUDGET_TOKENS,
+        keep_recent: int = KEEP_RECENT_MESSAGES,
+        offload_chars: int = OFFLOAD_CHARS,
+        summarizer: Optional[Callable[[str], str]] = None
+    ):
+        self.results_dir = Path(output_dir) / HANDLE_DIR
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+        self.offload_chars = offload_chars
+        self.summarizer = summarizer
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "requests": 0}
+        self._handles: dict[str, str] = {}  # tool_call_id -> handle path
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+
+    # =========================================================================
+    # Token accounting
+    # =========================================================================
+
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(text) // 4
+
+    def estimate(self, messages: list) -> int:
+        """Approximate prompt tokens for a message list (4 tokens of overhead per message)."""
+        return sum(self.count_tokens(message_text(m)) + 4 for m in messages)
+
+    def record_usage(self, usage) -> dict:
+        """Add an API response's usage to the running totals; returns the totals."""
+        if usage is not None:
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                self.usage[key] += getattr(usage, key, None) or 0
+        self.usage["requests"] += 1
+        return dict(self.usage)
+
+    # =========================================================================
+    # Offloading
+    # =========================================================================
+
+    def offload(self, tool_call_id: str, tool_name: str, result: str, arguments: Optional[dict] = None) -> str:
+        """
+        Return the message content for a tool result, saving long results to a handle file.
+        
+        Reading a handle back (read_file on tool_results/...) is kept inline, so
+        paging through an offloaded result never produces another handle.
+        """
+        if len(result) <= self.offload_chars:
+            return result
+        if tool_name == "read_file" and is_handle((arguments or {}).get("path")):
+            return result
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        handle = f"{HANDLE_DIR}/{tool_name}_{tool_call_id}.txt"
+        (self.results_dir.parent / handle).write_text(result)
+        self._handles[tool_call_id] = handle
+
+        head, tail = result[:PREVIEW_CHARS], result[-PREVIEW_CHARS // 3:]
+        return (
+            f"{head}\n\n... [{len(result) - len(head) - len(tail)} chars omitted; full output "
+            f"({len(result)} chars) saved as `{handle}`; page through it with read_file, continuing at the offset "
+            f"(and column) each page reports] ...\n\n{tail}"
+        )
+
+    # =========================================================================
+    # Compaction
+    # =========================================================================
+
+    def compact(self, messages: list) -> list:
+        """Return a message list that fits the budget (the input list is not modified)."""
+        if self.estimate(messages) <= self.budget_tokens:
+            return messages
+
+        messages = list(messages)
+        cutoff = max(len(messages) - self.keep_recent, 0)
+        elided = 0
+        for i, msg in enumerate(messages[:cutoff]):
+            if message_field(msg, "role") != "tool":
+                continue
+            content = message_field(msg, "content") or ""
+            if len(content) <= 200 or content.startswith(ELIDED_PREFIX):
+                continue
+            call_id = message_field(msg, "tool_call_id")
+            handle = self._handles.get(call_id)
+            if handle is None:
+                handle = self._save(call_id, content)
+            messages[i] = {
+                "role": "tool", "tool_call_id": call_id,
+                "content": f"{ELIDED_PREFIX}{len(content)} chars to save context; full output in `{handle}`]"
+            }
+            elided += 1
+
+        if elided:
+            print(f"  Context: elided {elided} old tool results")
+        if self.estimate(messages) > self.budget_tokens and self.summarizer is not None:
+            messages = self._summarize(messages)
+        return messages
+
+    def _save(self, call_id: str, content: str) -> str:
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        handle = f"{HANDLE_DIR}/{call_id}.txt"
+        (self.results_dir.parent / handle).write_text(content)
+        self._handles[call_id] = handle
+        return handle
+
+    def _summarize(self, messages: list) -> list:
+        """Replace the oldest exchanges (after system + first user message) with a summary."""
+        head = 2 if len(messages) > 1 and message_field(messages[1], "role") == "user" else 1
+        # Cut at a turn boundary: the first kept message must not be a tool result
+        cut = max(len(messages) - self.keep_recent, head)
+        while cut < len(messages) and message_field(messages[cut], "role") == "tool":
+            cut += 1
+        if cut <= head:
+            return messages
+
+        old = messages[head:cut]
+        transcript = "\n\n".join(
+            f"[{message_field(m, 'role')}] {message_text(m)}" for m in old
+        )[-SUMMARY_INPUT_CHARS:]
+        try:
+            summary = self.summarizer(transcript)
+        except Exception as e:
+            print(f"  Context: summarization failed ({e}); keeping elided history")
+            return messages
+
+        print(f"  Context: summarized {len(old)} messages")
+        return messages[:head] + [{"role": "user", "content": SUMMARY_PREFIX + summary}] + messages[cut:]
+
+    def state(self) -> dict:
+        """Serializable usage totals and offload handles (for checkpoints)."""
+        return {"usage": dict(self.usage), "handles": dict(self._handles)}
+
+    def load_state(self, state: dict):
+        self.usage.update(state.get("usage", {}))
+        self._handles.update(state.get("handles", {}))
+
+    def report(self) -> str:
+        u = self.usage
+        return (f"Tokens: {u['prompt_tokens']} prompt + {u['completion_tokens']} completion "
+                f"= {u['total_tokens']} over {u['requests']} requests")
+
+
+def llm_summarizer(
+    client, model: str, on_usage: Optional[Callable[[object, float], None]] = None
+) -> Callable[[str], str]:
+    """
+    Summarizer that asks the chat model for a compact progress summary.
+    
+    Args:
+        on_usage: Called as on_usage(response.usage, seconds) after each summary
+            request, so its tokens count toward the run's usage
+    """
+    def summarize(transcript: str) -> str:
+        start = time.perf_counter()
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": (
+                    "Summarize this agent transcript for the agent itself. Keep: files created and "
+                    "their paths, key numeric results, job names and statuses, decisions made, and "
+                    "open problems. Be concise; use bullet points."
+                )},
+                {"role": "user", "content": transcript},
+            ],
+        )
+        if on_usage is not None:
+            on_usage(getattr(response, "usage", None), time.perf_counter() - start)
+        return response.choices[0].message.content or ""
+    return summarize
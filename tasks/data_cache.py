@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Shared, content-addressed columnar cache for task data files.
+
+Task folders carry many byte-identical copies of the same tables (every
+context/eval_examples/question_* has its own data_cgm.csv, data_meta.csv, ...),
+and agent code re-parses them from CSV text on every run. Files are fingerprinted
+by content (SHA-256), converted once, and stored under the hash, so identical
+copies share one cache entry:
+
+    <cache>/v<N>/<sha256>/meta.json     source name, delimiter, rows, column specs
+    <cache>/v<N>/<sha256>/<dtype>.npy   (n_columns, n_rows) block per numeric dtype, e.g. f8.npy
+    <cache>/v<N>/<sha256>/codes.npy     (n_columns, n_rows) int32 codes of the object columns (-1 = missing)
+    <cache>/v<N>/<sha256>/labels.pkl    category labels of each object column, as the parsed objects
+    <cache>/index.json                  (path, size, mtime) -> sha256, to skip re-hashing
+
+Labels are pickled rather than stored as text so that non-string values in
+object columns (e.g. True/False in a boolean column with missing values) come
+back with their types. Entries live under the format version, so a format
+change converts again instead of misreading old entries.
+
+Blocks are .npy rather than NPZ because NPZ members cannot be memory-mapped;
+each column is one contiguous row of its block, so loading a table costs one
+map per dtype however wide it is.
+
+In run_python, `load_dataset("data_cgm.csv")` returns the same DataFrame as
+pd.read_csv (numeric columns are copy-on-write memory maps of the cache), and
+a file read_csv cannot parse (e.g. ragged rows) raises the same ParserError.
+
+Usage:
+    cache = DataCache()
+    df = cache.load("context/eval_examples/question_1/data_cgm.csv")
+    arrays = cache.arrays("data_cgm.csv", columns=["glucose"])   # raw numpy views
+
+    python data_cache.py ../context/eval_examples/*/    # pre-convert every CSV
+"""
+
+import os
+import sys
+import csv
+import json
+import pickle
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+CACHE_DIR = Path(os.environ.get("DATA_CACHE_DIR", Path.home() / ".cache" / "design_gym" / "data"))
+FORMAT_VERSION = 2
+TABLE_SUFFIXES = {".csv", ".tsv", ".tab"}
+HASH_CHUNK = 1 << 20
+
+
+def fingerprint(path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sniff_delimiter(path: Path) -> str:
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        sample = f.read(65536)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",\t;|").delimiter
+    except csv.Error:
+        return "\t" if path.suffix in (".tsv", ".tab") else ","
+
+
+class DataCache:
+    """Converts tables to per-column .npy once per unique content and loads them memory-mapped."""
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: Optional[dict] = None
+
+    # =========================================================================
+    # Fingerprints
+    # =========================================================================
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            try:
+                self._index = json.loads((self.root / "index.json").read_text())
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def key(self, path) -> str:
+        """Content hash of a file, reusing the index while its size and mtime are unchanged."""
+        path = Path(path).resolve()
+        st = path.stat()
+        stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        with self._lock:
+            entry = self._load_index().get(str(path))
+            if entry and entry["stamp"] == stamp:
+                return entry["sha256"]
+        digest = fingerprint(path)
+        with self._lock:
+            index = self._load_index()
+            index[str(path)] = {"stamp": stamp, "sha256": digest}
+            # Atomic replace; concurrent writers at worst drop an entry, which is re-hashed later
+            tmp = self.root / f"index.json.{os.getpid()}.{threading.get_ident()}"
+            tmp.write_text(json.dumps(index))
+            os.replace(tmp, self.root / "index.json")
+        return digest
+
+    # =========================================================================
+    # Conversion
+    # =========================================================================
+
+    def entry(self, path) -> Path:
+        """Cache directory for a file, converting it first if needed."""
+        path = Path(path)
+        entry = self.root / f"v{FORMAT_VERSION}" / self.key(path)
+        if not (entry / "meta.json").exists():
+            self._convert(path, entry)
+        return entry
+
+    def _convert(self, path: Path, entry: Path):
+        import pandas as pd
+
+        delimiter = sniff_delimiter(path)
+        df = pd.read_csv(path, sep=delimiter)
+        columns, blocks, labels = [], {}, []
+        for name in df.columns:
+            series = df[name]
+            spec = {"name": str(name), "dtype": str(series.dtype)}
+            if series.dtype.kind in "biufcmM":
+                spec["block"] = series.dtype.str.lstrip("<>|=")
+                values = series.to_numpy()
+            else:
+                codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                spec["block"] = "codes"
+                spec["labels"] = len(labels)
+                labels.append(list(uniques))
+                values = codes.astype(np.int32)
+            block = blocks.setdefault(spec["block"], [])
+            spec["row"] = len(block)
+            block.append(values)
+            columns.append(spec)
+
+        # Build in a private directory and rename into place, so concurrent
+        # kernels converting the same file never see a partial entry
+        entry.parent.mkdir(exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix=".convert-"))
+        try:
+            for name, block in blocks.items():
+                np.save(tmp / f"{name}.npy", np.stack(block))
+            (tmp / "labels.pkl").write_bytes(pickle.dumps(labels))
+            (tmp / "meta.json").write_text(json.dumps({
+                "version": FORMAT_VERSION, "source": path.name, "delimiter": delimiter,
+                "rows": len(df), "columns": columns,
+            }, indent=1))
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                pass  # another process won the race; its entry is identical
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    # =========================================================================
+    # Loading
+    # =========================================================================
+
+    def meta(self, path) -> dict:
+        return json.loads((self.entry(path) / "meta.json").read_text())
+
+    def _read(self, path, columns: Optional[list[str]], mmap_mode: str = "r"):
+        entry = self.entry(path)
+        meta = json.loads((entry / "meta.json").read_text())
+        specs = [c for c in meta["columns"] if columns is None or c["name"] in columns]
+        blocks = {name: np.load(entry / f"{name}.npy", mmap_mode=mmap_mode).view(np.ndarray)
+                  for name in {c["block"] for c in specs}}
+        labels = pickle.loads((entry / "labels.pkl").read_bytes()) if "codes" in blocks else []
+        return specs, blocks, labels
+
+    def arrays(self, path, columns: Optional[list[str]] = None) -> dict:
+        """
+        Raw column arrays: memory-mapped values for numeric columns, and
+        (codes, labels) pairs for object/text columns.
+        """
+        specs, blocks, labels = self._read(path, columns)
+        return {
+            c["name"]: (blocks["codes"][c["row"]], labels[c["labels"]]) if "labels" in c
+            else blocks[c["block"]][c["row"]]
+            for c in specs
+        }
+
+    def load(self, path, columns: Optional[list[str]] = None, categorical: bool = False):
+        """
+        DataFrame equivalent to pd.read_csv(path) (with the sniffed delimiter).
+
+        Args:
+            columns: Only load these columns
+            categorical: Keep text columns as pandas Categoricals instead of strings
+        """
+        import pandas as pd
+
+        # Copy-on-write maps: the frame is writable like a read_csv result, but
+        # edits stay private to this process and never reach the shared cache
+        specs, blocks, labels = self._read(path, columns, mmap_mode="c")
+        data = {}
+        for c in specs:
+            values = blocks[c["block"]][c["row"]]
+            if "labels" in c:
+                series = pd.Categorical.from_codes(values, categories=pd.Index(labels[c["labels"]], dtype=object))
+                data[c["name"]] = series if categorical else pd.Series(series).astype(c["dtype"])
+            else:
+                data[c["name"]] = values
+        return pd.DataFrame(data, copy=False)
+
+    def prepare(self, directory) -> list[dict]:
+        """Convert every table in a directory; returns one record per file."""
+        records = []
+        for path in sorted(Path(directory).iterdir()):
+            if path.is_file() and path.suffix.lower() in TABLE_SUFFIXES:
+                entry = self.entry(path)
+                meta = json.loads((entry / "meta.json").read_text())
+                records.append({"path": str(path), "sha256": entry.name, "rows": meta["rows"],
+                                "columns": len(meta["columns"])})
+        return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-convert task data tables into the shared columnar cache")
+    parser.add_argument("dirs", nargs="+", help="Directories whose CSV/TSV files should be cached")
+    parser.add_argument("--cache", default=str(CACHE_DIR), help=f"Cache directory (default: {CACHE_DIR})")
+    args = parser.parse_args()
+
+    cache = DataCache(args.cache)
+    seen = set()
+    for directory in args.dirs:
+        if not Path(directory).is_dir():
+            print(f"Skipping {directory}: not a directory")
+            continue
+        for r in cache.prepare(directory):
+            shared = " (shared)" if r["sha256"] in seen else ""
+            seen.add(r["sha256"])
+            print(f"  {r['path']}: {r['rows']} rows x {r['columns']} columns -> {r['sha256'][:12]}{shared}")
+    print(f"{len(seen)} unique tables in {cache.root}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
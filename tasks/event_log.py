@@ -0,0 +1,199 @@
+"""
+Append-only JSONL event log for agent runs.
+
+Every message, tool call, tool result, timing and token-usage record is written
+as one JSON line the moment it happens, so a crash or Ctrl-C loses at most the
+events since the last fsync (the file is flushed on every write and fsynced at
+most every `fsync_interval` seconds). Nothing is ever rewritten, except that
+reopening a log drops a torn final line left by a crash.
+
+Event shape:
+    {"seq": 12, "t": 1718000000.123, "type": "message", ...fields}
+
+Types written by run_agent: run_start, message, tool_call, tool_result, usage,
+compaction, error, run_end.
+
+Usage:
+    log = EventLog(output_dir / "events.jsonl")
+    log.message({"role": "user", "content": "hi"})
+    log.event("usage", prompt_tokens=120, completion_tokens=30)
+    log.close()
+
+    messages = reconstruct_conversation(output_dir / "events.jsonl")
+
+    python event_log.py events.jsonl                   # print a run summary
+    python event_log.py events.jsonl --export log.json # write the conversation as JSON
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+FSYNC_INTERVAL = 2.0  # seconds
+
+
+def to_jsonable(msg):
+    """Plain dict for an OpenAI message object (or the value unchanged)."""
+    if hasattr(msg, "model_dump"):
+        return msg.model_dump(exclude_none=True)
+    return msg
+
+
+class EventLog:
+    """Thread-safe append-only JSONL writer with periodic fsync."""
+
+    def __init__(self, path, fsync_interval: float = FSYNC_INTERVAL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        if self.path.exists():
+            drop_torn_line(self.path)
+            self._seq = sum(1 for _ in read_events(self.path))
+        else:
+            self._seq = 0
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._last_sync = time.monotonic()
+
+    def event(self, type: str, **fields) -> int:
+        """Append one event; returns its sequence number."""
+        with self._lock:
+            seq = self._seq
+            self._seq += 1
+            record = {"seq": seq, "t": time.time(), "type": type, **fields}
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_sync = time.monotonic()
+            return seq
+
+    def message(self, msg, **fields) -> int:
+        """Append a conversation message (dict or OpenAI message object)."""
+        return self.event("message", message=to_jsonable(msg), **fields)
+
+    def sync(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def drop_torn_line(path, chunk: int = 65536) -> int:
+    """Truncate a file after its last newline; returns the number of bytes removed."""
+    with open(path, "rb+") as f:
+        size = end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(end - chunk, 0)
+            f.seek(start)
+            nl = f.read(end - start).rfind(b"\n")
+            if nl >= 0:
+                end = start + nl + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+        return size - end
+
+
+# =============================================================================
+# Reading
+# =============================================================================
+
+def read_events(path, types: Optional[set] = None) -> Iterator[dict]:
+    """
+    Stream events from a log, optionally filtered by type.
+
+    A torn final line (the process died mid-write) is skipped.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if types is None or record.get("type") in types:
+                yield record
+
+
+def reconstruct_conversation(path) -> list[dict]:
+    """Full, uncompacted message list of a run, in the order messages were sent."""
+    return [e["message"] for e in read_events(path, {"message"})]
+
+
+def summarize_events(path) -> dict:
+    """Counts, tool timings and token totals for a run."""
+    summary = {"events": 0, "messages": 0, "iterations": 0, "tool_calls": {}, "errors": 0,
+               "tokens": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+               "started": None, "ended": None, "status": None}
+    for e in read_events(path):
+        summary["events"] += 1
+        summary["started"] = summary["started"] or e["t"]
+        summary["ended"] = e["t"]
+        kind = e["type"]
+        if kind == "message":
+            summary["messages"] += 1
+        elif kind == "usage":
+            if e.get("source") != "summarizer":
+                summary["iterations"] += 1
+            for key in summary["tokens"]:
+                summary["tokens"][key] += e.get(key) or 0
+        elif kind == "tool_result":
+            tool = summary["tool_calls"].setdefault(e.get("name"), {"calls": 0, "seconds": 0.0})
+            tool["calls"] += 1
+            tool["seconds"] += e.get("seconds") or 0.0
+        elif kind == "error":
+            summary["errors"] += 1
+        elif kind == "run_end":
+            summary["status"] = e.get("status")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect an agent events.jsonl log")
+    parser.add_argument("path", help="Path to events.jsonl")
+    parser.add_argument("--export", help="Write the reconstructed conversation to this JSON file")
+    args = parser.parse_args()
+
+    if not Path(args.path).exists():
+        print(f"Error: {args.path} not found")
+        sys.exit(1)
+
+    if args.export:
+        messages = reconstruct_conversation(args.path)
+        with open(args.export, "w") as f:
+            json.dump(messages, f, indent=2, default=str)
+        print(f"Wrote {len(messages)} messages to {args.export}")
+        return
+
+    s = summarize_events(args.path)
+    duration = (s["ended"] - s["started"]) if s["started"] else 0.0
+    print(f"Events: {s['events']}  Messages: {s['messages']}  Iterations: {s['iterations']}  "
+          f"Errors: {s['errors']}  Status: {s['status'] or 'incomplete'}  Duration: {duration:.1f}s")
+    t = s["tokens"]
+    print(f"Tokens: {t['prompt_tokens']} prompt + {t['completion_tokens']} completion = {t['total_tokens']}")
+    for name, tool in sorted(s["tool_calls"].items(), key=lambda kv: -kv[1]["seconds"]):
+        print(f"  {name:<28}{tool['calls']:>5} calls{tool['seconds']:>10.1f}s")
+
+
+if __name__ == "__main__":
+    main()
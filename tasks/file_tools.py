@@ -0,0 +1,346 @@
+"""
+Bounded file access for the agent's read_file, view_file and summarize_file tools.
+
+Nothing here loads a whole file into memory:
+- line-range reads and tails memory-map the file and scan only up to the
+  requested lines
+- grep streams the file line by line
+- CSV/TSV summaries (schema, row count, per-column stats) and PDB summaries
+  (models, chains, residue and atom counts, ligands) are computed in a
+  single streaming pass
+
+Usage:
+    read_lines("data_cgm.csv", offset=1000, limit=50)
+    head_lines("log.txt", 20)
+    tail_lines("log.txt", 20)
+    grep_lines("scaffold.pdb", r"^HETATM", max_matches=20)
+    summarize_file("data_cgm.csv")
+"""
+
+import re
+import csv
+import math
+import mmap
+from pathlib import Path
+from collections import Counter
+from typing import Optional
+
+MAX_CHARS = 50000          # cap on text returned by one call
+MAX_LINE_CHARS = 2000      # longer lines are clipped in previews
+DISTINCT_CAP = 1000        # stop tracking distinct values of a column beyond this
+TOP_VALUES = 5
+CSV_SUFFIXES = {".csv", ".tsv", ".tab"}
+PDB_SUFFIXES = {".pdb", ".ent"}
+
+
+def _mapped(path: Path) -> Optional[mmap.mmap]:
+    """Read-only memory map, or None for empty files (which cannot be mapped)."""
+    if path.stat().st_size == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _clip(line: str) -> str:
+    return line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + f" ... [{len(line)} chars]"
+
+
+def _clip_mapped(mm: mmap.mmap, start: int, end: int) -> str:
+    """_clip for the line mm[start:end], decoding only the part that is kept."""
+    if end - start <= MAX_LINE_CHARS:
+        return _decode(mm[start:end])
+    return _decode(mm[start:start + 4 * MAX_LINE_CHARS])[:MAX_LINE_CHARS] + f" ... [{end - start} bytes]"
+
+
+def _char_boundary(mm: mmap.mmap, pos: int, floor: int) -> int:
+    """Move pos back (not below floor + 1) so it does not split a UTF-8 character."""
+    while pos > floor + 1 and mm[pos] & 0xC0 == 0x80:
+        pos -= 1
+    return pos
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+# =============================================================================
+# Line access
+# =============================================================================
+
+def read_lines(
+    path, offset: int = 0, limit: Optional[int] = None, max_chars: int = MAX_CHARS, column: int = 0
+) -> dict:
+    """
+    Lines [offset, offset + limit) of a text file (0-based), stopping at max_chars.
+
+    A line too long to fit in max_chars on its own is cut there; the result then
+    has eof=False and a nonzero 'column', and the next page starts with
+    offset=end, column=column.
+
+    Args:
+        column: Start this many bytes into line `offset` (to continue a cut line)
+
+    Returns:
+        Dict with 'text', 'start', 'end' (exclusive line index reached, or the
+        index of the cut line), 'column' (byte offset into line 'end' to resume
+        at, 0 unless a line was cut), 'eof' and 'size'.
+    """
+    path = Path(path)
+    mm = _mapped(path)
+    if mm is None:
+        return {"text": "", "start": offset, "end": offset, "column": 0, "eof": True, "size": 0}
+    with mm:
+        pos = 0
+        for _ in range(offset):
+            nl = mm.find(b"\n", pos)
+            if nl < 0:
+                return {"text": "", "start": offset, "end": offset, "column": 0, "eof": True, "size": len(mm)}
+            pos = nl + 1
+        line_start = pos
+        nl = mm.find(b"\n", pos)
+        pos = min(pos + column, len(mm) if nl < 0 else nl + 1)
+
+        lines, chars, line_no, resume = [], 0, offset, 0
+        while pos < len(mm) and (limit is None or line_no < offset + limit):
+            nl = mm.find(b"\n", pos)
+            end = len(mm) if nl < 0 else nl + 1
+            cut = end
+            if end - pos > max_chars - chars:  # bytes bound chars, so this may not fit
+                if lines:
+                    break
+                cut = _char_boundary(mm, pos + max_chars, pos)
+            lines.append(_decode(mm[pos:cut]))
+            chars += len(lines[-1])
+            if cut < end:
+                resume, pos = cut - line_start, cut
+                break
+            pos, line_no, line_start = end, line_no + 1, end
+        return {"text": "".join(lines), "start": offset, "end": line_no, "column": resume,
+                "eof": pos >= len(mm), "size": len(mm)}
+
+
+def head_lines(path, n: int = 20) -> list[str]:
+    """First n lines, each clipped to MAX_LINE_CHARS."""
+    mm = _mapped(Path(path))
+    if mm is None:
+        return []
+    with mm:
+        lines, pos = [], 0
+        while pos < len(mm) and len(lines) < n:
+            nl = mm.find(b"\n", pos)
+            end = len(mm) if nl < 0 else nl
+            lines.append(_clip_mapped(mm, pos, end))
+            pos = end + 1
+        return lines
+
+
+def tail_lines(path, n: int = 20) -> list[str]:
+    """Last n lines, found by scanning backwards from the end of the file."""
+    mm = _mapped(Path(path))
+    if mm is None:
+        return []
+    with mm:
+        end = len(mm)
+        if mm[end - 1:end] == b"\n":
+            end -= 1
+        pos = end
+        for _ in range(n):
+            pos = mm.rfind(b"\n", 0, pos)
+            if pos < 0:
+                break
+        lines, start = [], pos + 1
+        while start <= end:
+            nl = mm.find(b"\n", start, end)
+            stop = end if nl < 0 else nl
+            lines.append(_clip_mapped(mm, start, stop))
+            start = stop + 1
+        return lines
+
+
+def count_lines(path) -> int:
+    mm = _mapped(Path(path))
+    if mm is None:
+        return 0
+    with mm:
+        count, pos = 0, 0
+        while (pos := mm.find(b"\n", pos) + 1) > 0:
+            count += 1
+        return count + (0 if mm[-1:] == b"\n" else 1)
+
+
+def grep_lines(path, pattern: str, max_matches: int = 100, ignore_case: bool = False) -> dict:
+    """Lines matching a regular expression, with 1-based line numbers."""
+    regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    matches, total = [], 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line_no, line in enumerate(f, 1):
+            if regex.search(line):
+                total += 1
+                if len(matches) < max_matches:
+                    matches.append((line_no, _clip(line.rstrip("\n"))))
+    return {"matches": matches, "total": total}
+
+
+# =============================================================================
+# Structured summaries
+# =============================================================================
+
+class ColumnStats:
+    """Streaming statistics for one CSV column."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.missing = 0
+        self.numeric = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.values: Optional[Counter] = Counter()
+
+    def add(self, value: str):
+        value = value.strip()
+        if value == "" or value.lower() in ("na", "nan", "null", "none"):
+            self.missing += 1
+            return
+        self.count += 1
+        try:
+            x = float(value)
+        except ValueError:
+            x = None
+        if x is not None and math.isfinite(x):
+            # Welford update
+            self.numeric += 1
+            delta = x - self.mean
+            self.mean += delta / self.numeric
+            self._m2 += delta * (x - self.mean)
+            self.min = min(self.min, x)
+            self.max = max(self.max, x)
+        if self.values is not None:
+            self.values[value] += 1
+            if len(self.values) > DISTINCT_CAP:
+                self.values = None
+
+    def summary(self) -> dict:
+        is_numeric = self.count > 0 and self.numeric == self.count
+        out = {"name": self.name, "type": "numeric" if is_numeric else "text",
+               "non_null": self.count, "missing": self.missing,
+               "distinct": len(self.values) if self.values is not None else f">{DISTINCT_CAP}"}
+        if is_numeric:
+            out.update(min=self.min, max=self.max, mean=self.mean,
+                       std=math.sqrt(self._m2 / (self.numeric - 1)) if self.numeric > 1 else 0.0)
+        elif self.values:
+            out["top"] = self.values.most_common(TOP_VALUES)
+        return out
+
+
+def summarize_csv(path) -> dict:
+    """Delimiter, row count and per-column stats in one pass."""
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        sample = f.read(65536)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",\t;|")
+        except csv.Error:
+            dialect = csv.excel_tab if path.suffix in (".tsv", ".tab") else csv.excel
+        reader = csv.reader(f, dialect)
+        header = next(reader, [])
+        columns = [ColumnStats(name or f"column_{i}") for i, name in enumerate(header)]
+        rows = ragged = 0
+        for row in reader:
+            rows += 1
+            if len(row) != len(columns):
+                ragged += 1
+            for col, value in zip(columns, row):
+                col.add(value)
+    return {"format": "csv", "delimiter": dialect.delimiter, "rows": rows, "ragged_rows": ragged,
+            "columns": [c.summary() for c in columns]}
+
+
+def summarize_pdb(path) -> dict:
+    """Models, chains (residues, atoms, numbering range), ligands and waters in one pass."""
+    chains: dict = {}
+    hetero = Counter()
+    models = 0
+    header = {}
+    seen_residues = set()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            record = line[:6]
+            if record == "MODEL ":
+                models += 1
+                if models > 1:
+                    break  # later models repeat the same chains
+            elif record in ("ATOM  ", "HETATM"):
+                chain_id = line[21:22].strip() or "_"
+                resname = line[17:20].strip()
+                try:
+                    resseq = int(line[22:26])
+                except ValueError:
+                    continue
+                chain = chains.setdefault(chain_id, {"residues": 0, "atoms": 0, "first": None, "last": None})
+                chain["atoms"] += 1
+                key = (chain_id, resseq, line[26:27], resname)
+                if key not in seen_residues:
+                    seen_residues.add(key)
+                    if record == "ATOM  ":
+                        chain["residues"] += 1
+                    else:
+                        hetero[resname] += 1
+                if record == "ATOM  ":
+                    # Polymer numbering range (waters and ligands are often numbered apart)
+                    chain["first"] = resseq if chain["first"] is None else min(chain["first"], resseq)
+                    chain["last"] = resseq if chain["last"] is None else max(chain["last"], resseq)
+            elif record == "HEADER":
+                header["header"] = line[10:50].strip()
+            elif line.startswith("REMARK   2 RESOLUTION"):
+                header["resolution"] = line[22:].strip()
+    waters = hetero.pop("HOH", 0)
+    return {"format": "pdb", **header, "models": max(models, 1), "chains": chains,
+            "residues": sum(c["residues"] for c in chains.values()),
+            "atoms": sum(c["atoms"] for c in chains.values()),
+            "ligands": dict(hetero), "waters": waters}
+
+
+def format_summary(summary: dict, max_columns: int = 300) -> str:
+    """Compact text rendering of a summarize_file result (one line per column or chain)."""
+    lines = [f"{summary['path']} ({summary['bytes']} bytes, {summary['format']})"]
+    if summary["format"] == "csv":
+        lines.append(f"{summary['rows']} rows x {len(summary['columns'])} columns, delimiter {summary['delimiter']!r}"
+                     + (f", {summary['ragged_rows']} ragged rows" if summary["ragged_rows"] else ""))
+        for c in summary["columns"][:max_columns]:
+            line = f"  {c['name']}: {c['type']}, {c['non_null']} non-null, {c['missing']} missing, {c['distinct']} distinct"
+            if c["type"] == "numeric":
+                line += f", min {c['min']:.4g} max {c['max']:.4g} mean {c['mean']:.4g} std {c['std']:.4g}"
+            elif c.get("top"):
+                line += ", top: " + ", ".join(f"{_clip(v)[:40]} ({n})" for v, n in c["top"])
+            lines.append(line)
+        if len(summary["columns"]) > max_columns:
+            lines.append(f"  ... {len(summary['columns']) - max_columns} more columns")
+    elif summary["format"] == "pdb":
+        extra = ", ".join(f"{k} {summary[k]}" for k in ("header", "resolution") if k in summary)
+        lines.append(f"{summary['models']} model(s), {len(summary['chains'])} chains, {summary['residues']} residues, "
+                     f"{summary['atoms']} atoms, {summary['waters']} waters" + (f"; {extra}" if extra else ""))
+        for chain_id, c in summary["chains"].items():
+            span = f", residues {c['first']}-{c['last']}" if c["first"] is not None else ""
+            lines.append(f"  chain {chain_id}: {c['residues']} residues, {c['atoms']} atoms{span}")
+        if summary["ligands"]:
+            lines.append("  ligands: " + ", ".join(f"{k} x{v}" for k, v in summary["ligands"].items()))
+    else:
+        lines.append(f"{summary['lines']} lines; first lines:")
+        lines.append(summary["head"])
+    return "\n".join(lines)
+
+
+def summarize_file(path) -> dict:
+    """Structured summary for CSV/TSV and PDB files; size, line count and head otherwise."""
+    path = Path(path)
+    info = {"path": str(path), "bytes": path.stat().st_size}
+    if path.suffix.lower() in CSV_SUFFIXES:
+        return {**info, **summarize_csv(path)}
+    if path.suffix.lower() in PDB_SUFFIXES:
+        return {**info, **summarize_pdb(path)}
+    head = read_lines(path, 0, 10, max_chars=4000)
+    return {**info, "format": "text", "lines": count_lines(path), "head": head["text"]}
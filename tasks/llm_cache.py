@@ -0,0 +1,187 @@
+"""
+Record/replay cache for chat-completion calls.
+
+Wraps an OpenAI client so run_agent (and the context summarizer) can run against
+a local store instead of the live API:
+
+    record  - forward every request upstream and store request-hash -> response
+    replay  - serve responses from the store; never touch the network unless a
+              fallback client (e.g. a local OpenAI-compatible server) is given
+
+Requests are hashed over model, messages, tools and options after volatile text
+(timings, timestamps, unique job suffixes, the run's output path) is normalized,
+so a replayed run that makes the same decisions hits the same entries. If a
+request still misses, replay falls back to the recorded order of the session.
+Concurrent sessions sharing one store each use a session(name) view, which keeps
+its own call order so the fallback never serves another session's response.
+
+Store layout:
+    <store>/responses/<hash>.json       {"request": ..., "response": ..., "seconds": ...}
+    <store>/sequence.jsonl              request hashes in call order
+    <store>/sequences/<session>.jsonl   the same, per named session
+
+Usage:
+    client = CachedChatClient(OpenAI(), "tasks/ph_sensitive_design/llm_cache", mode="record")
+    client.chat.completions.create(model=..., messages=..., tools=...)
+    print(client.report())
+"""
+
+import re
+import copy
+import json
+import time
+import types
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+
+from event_log import to_jsonable
+
+MODES = ("live", "record", "replay")
+
+# Text that differs between otherwise identical runs
+VOLATILE_PATTERNS = [
+    (re.compile(r"\[session [^\]]*: wall [^\]]*\]"), "[session]"),
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?"), "<time>"),
+    (re.compile(r"\d{8}_\d{6}(_[0-9a-f]{6})?"), "<stamp>"),
+    (re.compile(r"\b\d+\.\d+s\b"), "<secs>"),
+]
+
+
+class CacheMiss(LookupError):
+    """Replay mode found no recorded response for a request."""
+
+
+def normalize(text: str, redact: Optional[dict] = None) -> str:
+    for old, new in (redact or {}).items():
+        text = text.replace(old, new)
+    for pattern, repl in VOLATILE_PATTERNS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def request_key(request: dict, redact: Optional[dict] = None) -> str:
+    """Stable hash of a chat-completion request."""
+    canonical = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(normalize(canonical, redact).encode()).hexdigest()
+
+
+class CachedChatClient:
+    """Drop-in for an OpenAI client's `chat.completions.create` with record/replay."""
+
+    def __init__(
+        self,
+        client=None,
+        store_dir="llm_cache",
+        mode: str = "record",
+        fallback=None,
+        redact: Optional[dict] = None
+    ):
+        """
+        Args:
+            client: Upstream OpenAI client (required for record and live modes)
+            store_dir: Directory holding recorded responses
+            mode: "live" (pass-through), "record" or "replay"
+            fallback: Client used for replay misses, e.g. OpenAI(base_url="http://localhost:8000/v1")
+            redact: Literal substrings replaced before hashing, e.g. {str(output_dir): "<output>"}
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+        if mode != "replay" and client is None:
+            raise ValueError(f"Mode {mode!r} needs an upstream client")
+        self.client = client
+        self.mode = mode
+        self.fallback = fallback
+        self.redact = redact or {}
+        self.store = Path(store_dir)
+        self.responses_dir = self.store / "responses"
+        self.stats = {"requests": 0, "hits": 0, "order_hits": 0, "misses": 0, "upstream_s": 0.0}
+        self._lock = threading.Lock()
+        if mode == "record":
+            self.responses_dir.mkdir(parents=True, exist_ok=True)
+        elif mode == "replay" and not self.responses_dir.exists():
+            raise FileNotFoundError(f"No recorded responses in {self.store}")
+        self._open_sequence(self.store / "sequence.jsonl")
+
+    def _open_sequence(self, path: Path):
+        """Use `path` as this client's call order: start it when recording, load it when replaying."""
+        self._sequence_path = path
+        self._sequence: list[str] = []
+        self._position = 0
+        if self.mode == "record":
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+        elif self.mode == "replay" and path.exists():
+            self._sequence = [json.loads(line)["key"] for line in path.read_text().splitlines() if line]
+        # Same attribute path as the OpenAI client
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def session(self, name: str) -> "CachedChatClient":
+        """
+        View of this client for one of several concurrent sessions: responses and
+        stats are shared, but the call order (and so the replay fallback) is the session's own.
+        """
+        view = copy.copy(self)
+        view._open_sequence(self.store / "sequences" / f"{name}.jsonl")
+        return view
+
+    def create(self, **request):
+        request_json = {k: to_jsonable(v) for k, v in request.items()}
+        request_json["messages"] = [to_jsonable(m) for m in request.get("messages", [])]
+        key = request_key(request_json, self.redact)
+        with self._lock:
+            self.stats["requests"] += 1
+
+        if self.mode == "replay":
+            return self._replay(key, request)
+
+        start = time.perf_counter()
+        response = self.client.chat.completions.create(**request)
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self.stats["upstream_s"] += seconds
+            if self.mode == "record":
+                self._write(key, request_json, response, seconds)
+        return response
+
+    def _write(self, key: str, request_json: dict, response, seconds: float):
+        path = self.responses_dir / f"{key}.json"
+        with open(path, "w") as f:
+            json.dump({"request": request_json, "response": to_jsonable(response), "seconds": seconds},
+                      f, default=str)
+        with open(self._sequence_path, "a") as f:
+            f.write(json.dumps({"key": key}) + "\n")
+
+    def _replay(self, key: str, request: dict):
+        with self._lock:
+            path = self.responses_dir / f"{key}.json"
+            if path.exists():
+                self.stats["hits"] += 1
+            elif self._position < len(self._sequence):
+                # Request text drifted (e.g. different tool output); fall back to call order
+                path = self.responses_dir / f"{self._sequence[self._position]}.json"
+                self.stats["order_hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                path = None
+            self._position += 1
+
+        if path is None:
+            if self.fallback is None:
+                raise CacheMiss(f"No recorded response for request {key[:12]} in {self.store}")
+            start = time.perf_counter()
+            response = self.fallback.chat.completions.create(**request)
+            with self._lock:
+                self.stats["upstream_s"] += time.perf_counter() - start
+            return response
+
+        from openai.types.chat import ChatCompletion
+        with open(path) as f:
+            return ChatCompletion.model_validate(json.load(f)["response"])
+
+    def report(self) -> str:
+        s = self.stats
+        return (f"LLM {self.mode}: {s['requests']} requests, {s['hits']} hash hits, "
+                f"{s['order_hits']} order hits, {s['misses']} misses, "
+                f"{s['upstream_s']:.1f}s upstream")
@@ -0,0 +1,503 @@
+"""
+Batched differential abundance for wide metabolomics / lipidomics tables.
+
+data_metabolomics.csv and data_lipids.csv hold one feature per row: annotation
+columns (X, Compound, m.z, Retention.time..min., refmet, newname, ...) plus one
+abundance column per sample named <subject>_<n> (e.g. XB68_2). The notebooks
+test these feature by feature in Python loops; here the abundances are one
+float32 (features x samples) matrix, and every step runs on all features at
+once:
+
+    log_transform    log2 (or other base), pseudocount only if needed
+    normalize        per-sample median, total or probabilistic-quotient scaling
+    by_subject       average replicate samples into one column per subject
+    compare          Welch t-test (2 groups) or one-way ANOVA (3+ groups),
+                     optionally covariate-adjusted
+    associate        outcome ~ feature + covariates for every feature
+    benjamini_hochberg  FDR q-values
+
+Covariate adjustment uses the Frisch-Waugh-Lovell identity: outcome and
+features are residualized on the shared covariate design with one projection,
+which gives the same coefficient, standard error and p-value as fitting one
+OLS model per feature.
+
+Subject columns carry the ids used in data_meta.csv, so groups and covariates
+come straight from the meta table and to_frame() merges back onto it on `id`.
+p-values use scipy when installed and a vectorized incomplete-beta fallback
+otherwise.
+
+Usage:
+    meta = pd.read_csv("data_meta.csv")
+    table = FeatureTable.from_file("data_metabolomics.csv").log_transform().normalize().by_subject()
+    sex = table.compare(meta.set_index("id")["Sex"], covariates=["age", "BMI"], meta=meta)
+    bp = table.associate("Systolic bp", covariates=["age", "BMI"], meta=meta)
+    wide = meta.merge(table.to_frame(), left_on="id", right_index=True)
+"""
+
+import re
+import math
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+SAMPLE_PATTERN = re.compile(r"^(?P<subject>[A-Za-z]+\d+)_(?P<replicate>\d+)$")
+NAME_COLUMNS = ("newname", "refmet", "Compound.name", "Accepted.Description", "X", "Compound")
+MISSING_NAMES = {"", "-", "NA", "nan", "None"}
+NORMALIZATIONS = ("median", "total", "pqn")
+ID_COLUMN = "id"
+
+
+# =============================================================================
+# Distributions and FDR
+# =============================================================================
+
+def _betainc_cf(a, b, x, iterations: int = 300, eps: float = 1e-14):
+    """Regularized incomplete beta I_x(a, b) by Lentz's continued fraction (x < (a+1)/(a+b+2))."""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c = np.ones_like(x)
+    d = 1.0 - qab * x / qap
+    d = 1.0 / np.where(np.abs(d) < tiny, tiny, d)
+    h = d.copy()
+    for m in range(1, iterations + 1):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)),
+                   -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1.0 + aa * d
+            d = 1.0 / np.where(np.abs(d) < tiny, tiny, d)
+            c = 1.0 + aa / c
+            c = np.where(np.abs(c) < tiny, tiny, c)
+            step = d * c
+            h = h * step
+        if np.all(np.abs(step - 1.0) < eps):
+            break
+    lgamma = np.vectorize(math.lgamma, otypes=[float])
+    with np.errstate(divide="ignore"):
+        log_front = lgamma(a + b) - lgamma(a) - lgamma(b) + a * np.log(x) + b * np.log1p(-x)
+    return np.exp(log_front) * h / a
+
+
+def betainc(a, b, x) -> np.ndarray:
+    """Regularized incomplete beta function, elementwise."""
+    try:
+        from scipy.special import betainc as scipy_betainc
+        return scipy_betainc(a, b, x)
+    except ImportError:
+        pass
+    a, b, x = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, x)))
+    out = np.full(x.shape, np.nan)
+    valid = np.isfinite(x) & np.isfinite(a) & np.isfinite(b) & (a > 0) & (b > 0)
+    out[valid & (x <= 0)] = 0.0
+    out[valid & (x >= 1)] = 1.0
+    inner = valid & (x > 0) & (x < 1)
+    direct = inner & (x < (a + 1) / (a + b + 2))
+    flipped = inner & ~direct
+    if direct.any():
+        out[direct] = _betainc_cf(a[direct], b[direct], x[direct])
+    if flipped.any():
+        out[flipped] = 1.0 - _betainc_cf(b[flipped], a[flipped], 1.0 - x[flipped])
+    return out
+
+
+def t_pvalue(t, df) -> np.ndarray:
+    """Two-sided p-value of Student's t."""
+    t, df = np.asarray(t, dtype=float), np.asarray(df, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return betainc(df / 2, 0.5, df / (df + t ** 2))
+
+
+def f_pvalue(f, df1, df2) -> np.ndarray:
+    """Upper-tail p-value of the F distribution."""
+    f, df1, df2 = (np.asarray(v, dtype=float) for v in (f, df1, df2))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return betainc(df2 / 2, df1 / 2, df2 / (df2 + df1 * f))
+
+
+def benjamini_hochberg(p) -> np.ndarray:
+    """Benjamini-Hochberg q-values; NaN p-values stay NaN and are not counted as tests."""
+    p = np.asarray(p, dtype=float)
+    q = np.full(p.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(p))
+    if not len(valid):
+        return q
+    order = valid[np.argsort(p[valid], kind="stable")]
+    ranked = p[order] * len(order) / np.arange(1, len(order) + 1)
+    q[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    return q
+
+
+def partial_ols(x: np.ndarray, y: np.ndarray, covariates: Optional[np.ndarray] = None) -> dict:
+    """
+    Coefficient of x in y ~ x + covariates (+ intercept) for many columns at once.
+
+    x and y are (n,) or (n, k) with matching or broadcastable columns; all
+    rows must be complete. Returns coef, se, t, p and df arrays of shape (k,).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    design = np.ones((n, 1))
+    if covariates is not None and np.size(covariates):
+        design = np.column_stack([design, covariates])
+    # One projection residualizes x, y and every feature column
+    projection = np.linalg.pinv(design)
+    rx = x - design @ (projection @ x)
+    ry = y - design @ (projection @ y)
+    if rx.ndim == 1 and ry.ndim == 2:
+        rx = rx[:, None]
+    if ry.ndim == 1 and rx.ndim == 2:
+        ry = ry[:, None]
+    df = n - np.linalg.matrix_rank(design) - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sxx = (rx ** 2).sum(0)
+        coef = (rx * ry).sum(0) / sxx
+        resid = ry - coef * rx
+        se = np.sqrt((resid ** 2).sum(0) / df / sxx)
+        t = coef / se
+    return {"coef": coef, "se": se, "t": t, "p": t_pvalue(t, df) if df > 0 else np.full(np.shape(t), np.nan),
+            "df": np.full(np.shape(t), df)}
+
+
+# =============================================================================
+# Feature tables
+# =============================================================================
+
+class FeatureTable:
+    """Abundance matrix (features x samples, float32) with feature annotations."""
+
+    def __init__(self, values: np.ndarray, samples: list, subjects: list, annotations, names: list,
+                 steps: Optional[list] = None):
+        """
+        Args:
+            values: (features, samples) abundances
+            samples: Column labels (sample names, or subject ids after by_subject)
+            subjects: Subject id of each column, as used in data_meta.csv
+            annotations: DataFrame of per-feature annotation columns
+            names: Display name of each feature
+            steps: Transformations applied so far, e.g. ["log2", "median"]
+        """
+        self.values = np.asarray(values, dtype=np.float32)
+        self.samples = list(samples)
+        self.subjects = list(subjects)
+        self.annotations = annotations
+        self.names = list(names)
+        self.steps = list(steps or [])
+
+    # =========================================================================
+    # Loading
+    # =========================================================================
+
+    @classmethod
+    def from_frame(cls, df, sample_pattern=SAMPLE_PATTERN) -> "FeatureTable":
+        """Split a wide table into numeric <subject>_<n> sample columns and annotation columns."""
+        import pandas as pd
+
+        samples = [c for c in df.columns
+                   if sample_pattern.match(str(c)) and pd.api.types.is_numeric_dtype(df[c])]
+        if not samples:
+            raise ValueError("No numeric <subject>_<n> sample columns found")
+        annotations = df.drop(columns=samples).reset_index(drop=True)
+        values = df[samples].to_numpy(dtype=np.float32).reshape(len(df), len(samples))
+        subjects = [sample_pattern.match(s)["subject"] for s in samples]
+        return cls(values, samples, subjects, annotations, feature_names(annotations))
+
+    @classmethod
+    def from_file(cls, path, cache=None, sample_pattern=SAMPLE_PATTERN) -> "FeatureTable":
+        """Load a metabolomics/lipidomics table through the shared columnar cache (pandas if unavailable)."""
+        if cache is None:
+            try:
+                from data_cache import DataCache
+                cache = DataCache()
+            except (ImportError, OSError):
+                import pandas as pd
+                from data_cache import sniff_delimiter
+                return cls.from_frame(pd.read_csv(path, sep=sniff_delimiter(Path(path))),
+                                      sample_pattern)
+
+        meta = cache.meta(path)
+        samples = [c["name"] for c in meta["columns"]
+                   if sample_pattern.match(c["name"]) and "labels" not in c]
+        if not samples:
+            raise ValueError(f"No numeric <subject>_<n> sample columns in {path}")
+        arrays = cache.arrays(path, samples)
+        values = np.empty((meta["rows"], len(samples)), dtype=np.float32)
+        for j, name in enumerate(samples):
+            values[:, j] = arrays[name]
+        annotations = cache.load(path, [c["name"] for c in meta["columns"] if c["name"] not in set(samples)])
+        subjects = [sample_pattern.match(s)["subject"] for s in samples]
+        return cls(values, samples, subjects, annotations, feature_names(annotations))
+
+    def _derive(self, values, samples=None, subjects=None, step=None) -> "FeatureTable":
+        return FeatureTable(values, self.samples if samples is None else samples,
+                            self.subjects if subjects is None else subjects,
+                            self.annotations, self.names, self.steps + ([step] if step else []))
+
+    @property
+    def shape(self) -> tuple:
+        return self.values.shape
+
+    def select(self, features=None, subjects=None) -> "FeatureTable":
+        """Subset by feature mask/indices and/or subject ids (all columns of those subjects)."""
+        rows = slice(None) if features is None else np.asarray(features)
+        cols = (np.arange(len(self.samples)) if subjects is None
+                else np.flatnonzero(np.isin(self.subjects, list(subjects))))
+        annotations = self.annotations.iloc[rows].reset_index(drop=True) if features is not None else self.annotations
+        names = list(np.asarray(self.names, dtype=object)[rows]) if features is not None else self.names
+        return FeatureTable(self.values[rows][:, cols], [self.samples[j] for j in cols],
+                            [self.subjects[j] for j in cols], annotations, names, self.steps)
+
+    def named(self) -> "FeatureTable":
+        """Only features with a usable name (drops '-', 'NA' and unnamed rows)."""
+        return self.select(np.array([not n.startswith("feature_") for n in self.names], dtype=bool))
+
+    # =========================================================================
+    # Transforms
+    # =========================================================================
+
+    def log_transform(self, base: float = 2, pseudocount: Optional[float] = None) -> "FeatureTable":
+        """
+        Logarithm of every abundance. Without an explicit pseudocount, one is
+        added only if the table has non-positive values (half the smallest
+        positive abundance).
+        """
+        values = self.values.astype(np.float64)
+        if pseudocount is None:
+            positive = values[values > 0]
+            pseudocount = positive.min() / 2 if np.nanmin(values) <= 0 and positive.size else 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            logged = np.log(values + pseudocount) / np.log(base)
+        return self._derive(logged, step=f"log{base:g}")
+
+    def normalize(self, method: str = "median") -> "FeatureTable":
+        """
+        Per-sample scaling so columns are comparable.
+
+        Args:
+            method: "median" or "total" (equalize column medians/sums; on log data
+                the median is subtracted instead), or "pqn" (probabilistic quotient)
+        """
+        if method not in NORMALIZATIONS:
+            raise ValueError(f"Unknown normalization {method!r}; expected one of {NORMALIZATIONS}")
+        values = self.values.astype(np.float64)
+        logged = any(s.startswith("log") for s in self.steps)
+        if logged:
+            if method != "median":
+                raise ValueError(f"{method!r} normalization applies to raw abundances; normalize before log_transform")
+            center = np.nanmedian(values, axis=0)
+            return self._derive(values - center + np.nanmean(center), step=method)
+        if method == "pqn":
+            reference = np.nanmedian(values, axis=1, keepdims=True)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                factors = np.nanmedian(values / reference, axis=0)
+        else:
+            factors = np.nanmedian(values, axis=0) if method == "median" else np.nansum(values, axis=0)
+            factors = factors / np.nanmean(factors)
+        return self._derive(values / factors, step=method)
+
+    def standardize(self) -> "FeatureTable":
+        """Center and scale each feature to unit variance across columns."""
+        values = self.values.astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scaled = (values - np.nanmean(values, 1, keepdims=True)) / np.nanstd(values, 1, ddof=1, keepdims=True)
+        return self._derive(scaled, step="zscore")
+
+    def by_subject(self) -> "FeatureTable":
+        """Average replicate samples of each subject (ignoring missing values) into one column."""
+        subjects, inverse = np.unique(np.asarray(self.subjects, dtype=object), return_inverse=True)
+        indicator = np.zeros((len(self.subjects), len(subjects)))
+        indicator[np.arange(len(self.subjects)), inverse] = 1.0
+        values = self.values.astype(np.float64)
+        present = ~np.isnan(values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = (np.where(present, values, 0.0) @ indicator) / (present @ indicator)
+        subjects = list(subjects)
+        return self._derive(means, samples=subjects, subjects=subjects, step="by_subject")
+
+    def to_frame(self):
+        """Columns x features DataFrame indexed by `id` (subject) or sample name, ready to merge with data_meta.csv."""
+        import pandas as pd
+
+        collapsed = "by_subject" in self.steps
+        index = pd.Index(self.subjects if collapsed else self.samples, name=ID_COLUMN if collapsed else "sample")
+        frame = pd.DataFrame(self.values.T, index=index, columns=unique_names(self.names))
+        if not collapsed:
+            frame.insert(0, ID_COLUMN, self.subjects)
+        return frame
+
+    # =========================================================================
+    # Statistics
+    # =========================================================================
+
+    def _covariates(self, meta, covariates: Optional[list]) -> np.ndarray:
+        """Numeric covariate matrix aligned with the columns; categorical columns are dummy-coded."""
+        import pandas as pd
+
+        if not covariates:
+            return np.empty((len(self.subjects), 0))
+        frame = _meta_rows(meta, self.subjects)[list(covariates)]
+        frame = pd.get_dummies(frame, drop_first=True, dtype=float)
+        return frame.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+    def _results(self, columns: dict):
+        import pandas as pd
+
+        table = pd.DataFrame({"feature": unique_names(self.names), **columns})
+        table["q"] = benjamini_hochberg(table["p"].to_numpy())
+        return table.sort_values("p", na_position="last")
+
+    def compare(self, groups, covariates: Optional[list] = None, meta=None, min_per_group: int = 3):
+        """
+        Differential abundance between groups of subjects for every feature.
+
+        Args:
+            groups: Mapping/Series of subject id -> group label (e.g. meta.set_index("id")["Sex"]);
+                columns without a label are left out
+            covariates: meta columns to adjust for (two groups only), e.g. ["age", "BMI"]
+            meta: data_meta.csv DataFrame (needed for covariates)
+            min_per_group: Features with fewer non-missing values in any group get p = NaN
+
+        Returns:
+            DataFrame per feature (named as the columns of to_frame()): means per group,
+            difference (second - first; log fold change on log data), t or F statistic,
+            p, q (Benjamini-Hochberg), sorted by p.
+        """
+        import pandas as pd
+
+        labels = pd.Series(groups)
+        column_labels = labels.reindex(self.subjects).to_numpy(dtype=object)
+        has_label = pd.notna(column_labels)
+        levels = sorted(set(column_labels[has_label]), key=str)
+        if len(levels) < 2:
+            raise ValueError(f"Need at least two groups, found {levels}")
+        values = self.values.astype(np.float64)
+        masks = [has_label & (column_labels == level) for level in levels]
+
+        present = ~np.isnan(values)
+        counts = np.stack([(present & m).sum(1) for m in masks], 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.stack([np.nansum(np.where(m, values, np.nan), 1) / counts[:, i]
+                              for i, m in enumerate(masks)], 1)
+        enough = (counts >= min_per_group).all(1)
+        columns = {f"n_{level}": counts[:, i] for i, level in enumerate(levels)}
+        columns.update({f"mean_{level}": means[:, i] for i, level in enumerate(levels)})
+
+        if covariates:
+            if len(levels) != 2:
+                raise ValueError("Covariate-adjusted comparison supports exactly two groups")
+            C = self._covariates(meta, covariates)
+            x = (column_labels == levels[1]).astype(float)
+            fit, _ = _fit_features(values, has_label & ~np.isnan(C).any(1), x, C, feature_is_response=True)
+            columns.update(difference=fit["coef"], se=fit["se"], t=fit["t"], p=np.where(enough, fit["p"], np.nan))
+        elif len(levels) == 2:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                variances = np.stack([np.nanvar(np.where(m, values, np.nan), 1, ddof=1) for m in masks], 1)
+                se2 = variances / counts
+                t = (means[:, 1] - means[:, 0]) / np.sqrt(se2.sum(1))
+                df = se2.sum(1) ** 2 / (se2 ** 2 / (counts - 1)).sum(1)  # Welch-Satterthwaite
+            columns.update(difference=means[:, 1] - means[:, 0], t=t, df=df,
+                           p=np.where(enough, t_pvalue(t, df), np.nan))
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                n = counts.sum(1)
+                grand = np.nansum(values * has_label, 1) / n
+                between = (counts * (means - grand[:, None]) ** 2).sum(1)
+                within = sum(np.nansum(np.where(m, (values - means[:, [i]]) ** 2, np.nan), 1)
+                             for i, m in enumerate(masks))
+                df1, df2 = len(levels) - 1, n - len(levels)
+                f = (between / df1) / (within / df2)
+            columns.update(F=f, df1=np.full(len(f), df1), df2=df2, p=np.where(enough, f_pvalue(f, df1, df2), np.nan))
+
+        if "log2" in self.steps and "difference" in columns:
+            columns["log2_fc"] = columns["difference"]
+        return self._results(columns)
+
+    def associate(self, outcome: str, covariates: Optional[list] = None, meta=None, min_samples: int = 5):
+        """
+        Fit outcome ~ feature + covariates for every feature (e.g. systolic blood
+        pressure against each metabolite, adjusted for age and BMI).
+
+        Args:
+            outcome: Numeric meta column
+            covariates: Additional meta columns; categorical ones are dummy-coded
+            meta: data_meta.csv DataFrame
+            min_samples: Features with fewer complete columns get p = NaN
+
+        Returns:
+            DataFrame per feature (named as the columns of to_frame()): n, coef (outcome
+            units per unit feature), se, t, p, q, sorted by p.
+        """
+        import pandas as pd
+
+        if meta is None:
+            raise ValueError("associate() needs the meta table")
+        y = pd.to_numeric(_meta_rows(meta, self.subjects)[outcome], errors="coerce").to_numpy(dtype=float)
+        C = self._covariates(meta, covariates)
+        rows = ~np.isnan(y) & ~np.isnan(C).any(1)
+        fit, n = _fit_features(self.values.astype(np.float64), rows, y, C, feature_is_response=False)
+        fit["p"] = np.where(n >= min_samples, fit["p"], np.nan)
+        return self._results({"n": n, **fit})
+
+
+def _fit_features(values: np.ndarray, rows: np.ndarray, other: np.ndarray, C: np.ndarray,
+                  feature_is_response: bool) -> tuple[dict, np.ndarray]:
+    """
+    partial_ols for every feature row of values, either as the response
+    (feature ~ other + C) or the predictor (other ~ feature + C). Features
+    complete on `rows` share one fit; the rest are fitted on their own rows.
+    """
+    fit = {k: np.full(len(values), np.nan) for k in ("coef", "se", "t", "p")}
+    n = np.full(len(values), rows.sum())
+
+    def ols(features, use):
+        return partial_ols(other[use], features, C[use]) if feature_is_response else \
+            partial_ols(features, other[use], C[use])
+
+    complete = ~np.isnan(values[:, rows]).any(1)
+    if complete.any():
+        shared = ols(values[complete][:, rows].T, rows)
+        for k in fit:
+            fit[k][complete] = shared[k]
+    for i in np.flatnonzero(~complete):
+        use = rows & ~np.isnan(values[i])
+        n[i] = use.sum()
+        if n[i] > C.shape[1] + 2:
+            single = ols(values[i, use], use)
+            for k in fit:
+                fit[k][i] = np.ravel(single[k])[0]
+    return fit, n
+
+
+def _meta_rows(meta, ids: list):
+    """Meta rows in column order (NaN rows for ids missing from meta)."""
+    return meta.drop_duplicates(ID_COLUMN).set_index(ID_COLUMN).reindex(ids)
+
+
+def feature_names(annotations) -> list:
+    """First usable name per feature from the usual annotation columns, else feature_<row>."""
+    names = [None] * len(annotations)
+    for column in NAME_COLUMNS:
+        if column not in annotations.columns:
+            continue
+        for i, value in enumerate(annotations[column].astype(str).str.strip()):
+            if names[i] is not None or value in MISSING_NAMES:
+                continue
+            if column == "X" and value.isdigit():
+                continue  # metabolomics X is a row number, lipidomics X is the lipid name
+            names[i] = value
+    return [n if n is not None else f"feature_{i}" for i, n in enumerate(names)]
+
+
+def unique_names(names: list) -> list:
+    """Disambiguate repeated feature names with a #2, #3, ... suffix."""
+    seen: dict = {}
+    out = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        out.append(name if seen[name] == 1 else f"{name} #{seen[name]}")
+    return out
+
+
+def load_features(path, cache=None) -> FeatureTable:
+    """FeatureTable for a metabolomics/lipidomics file (see FeatureTable.from_file)."""
+    return FeatureTable.from_file(Path(path), cache)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the structural-analysis hot paths in workflow.py.
+
+Covers parse_structure, identify_core_residues (SASA), find_best_network_positions,
+interface His–cation scanning (interface.py), FASTA design ingestion and pLDDT
+extraction (PDB re-parse and StructureStore).
+Each benchmark runs against data/scaffold.pdb and synthetic scaled-up structures
+built by replicating the scaffold on a grid, in chains of <= 9000 residues.
+Whole-structure work (PDB parsing, SASA, complex parsing, His–cation scanning)
+sees every chain, 10k+ residues at the largest scale; the per-residue steps
+that follow parse_structure (core selection, network search) cover the first
+chain only, as in the pipeline.
+
+Timings are the best/median of several repeats; peak memory is the RSS growth
+sampled during each run (see profiling.py). Results are written as JSON so runs
+can be compared:
+
+Usage:
+    python benchmark.py                                  # scales 1, 10, 100
+    python benchmark.py --scales 1,10 --repeats 3        # quick run
+    python benchmark.py --compare output/benchmarks_baseline.json
+"""
+
+import io
+import sys
+import json
+import platform
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from datetime import datetime
+from contextlib import redirect_stdout
+
+import numpy as np
+import Bio
+
+from workflow import (
+    parse_structure, identify_core_residues, find_best_network_positions,
+    load_fasta_designs, extract_plddt, mock_designs, MockStructurePredictor,
+)
+from structure_store import StructureStore
+from interface import parse_complex, scan_his_cation
+from profiling import StageProfiler
+
+SCAFFOLD = Path(__file__).parent / "data" / "scaffold.pdb"
+DEFAULT_SCALES = (1, 10, 100)
+GRID_SPACING = 50.0        # Å between replicated copies (scaffold extent is ~40 Å)
+MAX_CHAIN_RESIDUES = 9000  # keep resSeq within the 4-column PDB field
+CHAIN_IDS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BINDER_CHAIN = "Z"
+BINDER_OFFSET = 22.0       # Å shift along -x that docks a scaffold copy against the first target copy
+SEED = 0
+
+
+# =============================================================================
+# Synthetic inputs
+# =============================================================================
+
+def build_replicated_pdb(scaffold: Path, copies: int, out_path: Path) -> Path:
+    """Write `copies` translated copies of the scaffold, packed into chains of <= MAX_CHAIN_RESIDUES."""
+    _, _, _, residues, _ = parse_structure(str(scaffold))
+    grid = int(np.ceil(copies ** (1 / 3)))
+    lines, serial, resseq, chain_idx = [], 1, 0, 0
+
+    for k in range(copies):
+        shift = GRID_SPACING * np.array([k % grid, (k // grid) % grid, k // grid**2])
+        if resseq + len(residues) > MAX_CHAIN_RESIDUES:
+            lines.append("TER")
+            chain_idx, resseq = chain_idx + 1, 0
+        chain = CHAIN_IDS[chain_idx % len(CHAIN_IDS)]
+        for r in residues:
+            resseq += 1
+            for a in r:
+                x, y, z = a.coord + shift
+                lines.append(
+                    f"ATOM  {serial % 100000:5d} {a.fullname:4s} {r.resname:3s} {chain}{resseq:4d}    "
+                    f"{x:8.3f}{y:8.3f}{z:8.3f}{a.occupancy:6.2f}{a.bfactor:6.2f}          {a.element:>2s}"
+                )
+                serial += 1
+    lines += ["TER", "END"]
+    out_path.write_text("\n".join(lines) + "\n")
+    return out_path
+
+
+def build_docked_complex(target: Path, scaffold: Path, out_path: Path) -> Path:
+    """Append a shifted scaffold copy as chain BINDER_CHAIN, in contact with the target's first copy."""
+    body = [l for l in target.read_text().splitlines() if l.startswith(("ATOM", "TER"))]
+    binder = [
+        f"{l[:21]}{BINDER_CHAIN}{l[22:30]}{float(l[30:38]) - BINDER_OFFSET:8.3f}{l[38:]}"
+        for l in scaffold.read_text().splitlines() if l.startswith("ATOM")
+    ]
+    out_path.write_text("\n".join(body + binder + ["TER", "END"]) + "\n")
+    return out_path
+
+
+def build_fasta(sequence: str, network: list, n: int, out_dir: Path) -> Path:
+    """Write n mock designs in ProteinMPNN-style FASTA."""
+    designs = mock_designs(sequence, network, n, seed=SEED)
+    path = out_dir / "designs.fa"
+    with open(path, "w") as f:
+        for i, d in enumerate(designs):
+            f.write(f">T=0.1, sample={i}, score=1.0\n{d['sequence']}\n")
+    return path
+
+
+# =============================================================================
+# Runner
+# =============================================================================
+
+def measure(name: str, fn, items: int, unit: str, repeats: int, scale: int) -> dict:
+    """Time fn() `repeats` times, sampling RSS growth during each run."""
+    times, peak = [], 0.0
+    for _ in range(repeats):
+        profiler = StageProfiler(enabled=True)
+        # Silence "[Module N]" progress lines from the pipeline functions
+        with profiler.stage(name), redirect_stdout(io.StringIO()):
+            fn()
+        record = profiler.records[0]
+        times.append(record["wall_s"])
+        peak = max(peak, record["peak_rss_mb"] - record["start_rss_mb"])
+
+    best = min(times)
+    result = {
+        "name": name, "scale": scale, "items": items, "unit": unit, "repeats": repeats,
+        "best_s": best, "median_s": statistics.median(times),
+        "throughput": items / best if best > 0 else None, "peak_mem_mb": peak,
+    }
+    throughput = f"{result['throughput']:>14.0f}" if result["throughput"] is not None else f"{'n/a':>14}"
+    print(f"  {name:<28}x{scale:<5}{items:>8} {unit:<10}{best * 1e3:>10.1f} ms"
+          f"{throughput} {unit}/s{result['peak_mem_mb']:>10.1f} MB RSS")
+    return result
+
+
+def run_benchmarks(scales, repeats: int, fasta_size: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for scale in scales:
+            pdb = SCAFFOLD if scale == 1 else build_replicated_pdb(SCAFFOLD, scale, tmp / f"x{scale}.pdb")
+            structure, _, _, residues, _ = parse_structure(str(pdb))
+            n_atoms = sum(1 for _ in structure.get_atoms())
+            print(f"\nScale x{scale}: {pdb.name} ({n_atoms} atoms, {len(residues)} residues in first chain)")
+
+            results.append(measure("parse_structure", lambda: parse_structure(str(pdb)),
+                                   n_atoms, "atoms", repeats, scale))
+            with redirect_stdout(io.StringIO()):
+                core = identify_core_residues(str(pdb))
+            results.append(measure("identify_core_residues", lambda: identify_core_residues(str(pdb)),
+                                   n_atoms, "atoms", repeats, scale))
+            results.append(measure("find_best_network_positions", lambda: find_best_network_positions(core),
+                                   len(core["core_selection"]), "core_res", repeats, scale))
+
+            docked = build_docked_complex(pdb, SCAFFOLD, tmp / f"docked_x{scale}.pdb")
+            parsed = parse_complex(docked)
+            results.append(measure("parse_complex", lambda: parse_complex(docked),
+                                   len(parsed["coords"]), "atoms", repeats, scale))
+            results.append(measure("scan_his_cation", lambda: scan_his_cation(docked, [BINDER_CHAIN], parsed=parsed),
+                                   len(parsed["coords"]), "atoms", repeats, scale))
+
+        # Sequence/structure ingestion scales with library size rather than scaffold size
+        with redirect_stdout(io.StringIO()):
+            m1 = identify_core_residues(str(SCAFFOLD))
+            network = find_best_network_positions(m1)["network_selection"]
+        fasta_dir = tmp / "fasta"
+        fasta_dir.mkdir()
+        build_fasta(m1["sequence"], network, fasta_size, fasta_dir)
+        print(f"\nLibrary: {fasta_size} designs")
+        results.append(measure("load_fasta_designs", lambda: load_fasta_designs(fasta_dir, network),
+                               fasta_size, "seqs", repeats, 1))
+
+        n_structs = max(fasta_size // 100, 10)
+        predictor = MockStructurePredictor(str(SCAFFOLD), seed=SEED)
+        pred_dir = tmp / "preds"
+        pred_dir.mkdir()
+        pdbs = [predictor(d, pred_dir) for d in mock_designs(m1["sequence"], network, n_structs, seed=SEED)]
+        results.append(measure("extract_plddt", lambda: [extract_plddt(p, network) for p in pdbs],
+                               n_structs, "structs", repeats, 1))
+
+        store = StructureStore(tmp / "store")
+        for p in pdbs:
+            store.append_pdb(p)
+        results.append(measure("store_plddt", lambda: [store.plddt(i, network) for i in range(len(store))],
+                               n_structs, "structs", repeats, 1))
+    return results
+
+
+def compare(results: list[dict], baseline_path: Path, threshold: float) -> int:
+    """Print best-time ratios against a baseline; return the number of regressions."""
+    baseline = {(r["name"], r["scale"]): r for r in json.loads(baseline_path.read_text())["results"]}
+    regressions = 0
+    print(f"\nComparison with {baseline_path} (regression if > {threshold:.2f}x slower)")
+    for r in results:
+        base = baseline.get((r["name"], r["scale"]))
+        if not base:
+            continue
+        ratio = r["best_s"] / base["best_s"] if base["best_s"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"  {r['name']:<28}x{r['scale']:<5}{ratio:>8.2f}x {flag}")
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark workflow.py structural-analysis hot paths")
+    p.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                   help="Comma-separated scaffold replication factors (default: 1,10,100)")
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--fasta-size", type=int, default=10000, help="Designs in the synthetic FASTA library")
+    p.add_argument("--output", default="output/benchmarks.json")
+    p.add_argument("--compare", help="Baseline benchmarks JSON to compare against")
+    p.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio that counts as a regression")
+    args = p.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    results = run_benchmarks(scales, args.repeats, args.fasta_size)
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now().isoformat(), "python": platform.python_version(),
+                "numpy": np.__version__, "biopython": Bio.__version__,
+                "platform": platform.platform(), "repeats": args.repeats,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {out}")
+
+    if args.compare and compare(results, Path(args.compare), args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
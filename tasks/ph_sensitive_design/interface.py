@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Interface His–cation scanning for binder–target complexes (Strategy A).
+
+Strategy A weakens binding at low pH by placing His next to Arg/Lys at the
+interface: once His is protonated (~pH 5.5) the two cations repel. This module
+finds, for one complex or a batch of docked complexes:
+
+    interface    binder and target residues with a heavy atom within `cutoff`
+                 of the other side (default 5 Å)
+    motifs       existing His (ND1/NE2) within `motif_distance` of an Arg
+                 (NE/NH1/NH2) or Lys (NZ) nitrogen at the interface
+    candidates   binder interface positions whose CB (CA for Gly) lies within
+                 `candidate_distance` of an interface Arg/Lys nitrogen, i.e.
+                 where a His could be installed next to a cation; ranked by the
+                 number of cation partners, then the closest one
+
+All chains are kept (workflow.py only reads the first). Neighbour searches use
+a uniform cell grid built with NumPy, so each query costs one sort plus
+vectorized distance checks against the 27 neighbouring cells, independent of
+how large the target is; batches are spread over worker processes.
+
+Usage:
+    scan = scan_his_cation("complex.pdb", binder_chains=["B"])
+    scan["candidates"][:5]                 # best His positions, e.g. {"position": "B45", ...}
+    scan["bias"]                           # ProteinMPNN bias_AA_per_residue for the top few
+
+    python interface.py complex.pdb --binder B --output output/interface.json
+    python interface.py docked/*.pdb --workers 8 --output output/interface_batch.json
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+INTERFACE_CUTOFF = 5.0       # Å, heavy atom to heavy atom across the interface
+CANDIDATE_DISTANCE = 8.0     # Å, binder CB to Arg/Lys nitrogen (His side chain reaches ~4.5 Å past CB)
+MOTIF_DISTANCE = 6.0         # Å, His ND1/NE2 to Arg/Lys nitrogen
+HIS_BIAS = 100.0             # ProteinMPNN bias toward His at the biased candidate positions
+HIS_POSITIONS = 3            # top candidates that get the His bias (a few His, not one per candidate)
+CATION_ATOMS = {"ARG": (b"NE", b"NH1", b"NH2"), "LYS": (b"NZ",)}
+HIS_ATOMS = (b"ND1", b"NE2")
+AMINO_ACIDS = {
+    "ALA", "ARG", "ASN", "ASP", "CYS", "GLN", "GLU", "GLY", "HIS", "ILE",
+    "LEU", "LYS", "MET", "PHE", "PRO", "SER", "THR", "TRP", "TYR", "VAL",
+}
+
+
+# =============================================================================
+# Structure
+# =============================================================================
+
+def parse_complex(pdb_path) -> dict:
+    """
+    Fixed-column parse of the heavy atoms of every chain (first model, first
+    altloc, standard amino acids only).
+
+    Returns:
+        Dict of per-atom arrays (coords, names, residue index) and per-residue
+        arrays (chain, resseq, icode, resname, atom_start) in file order.
+    """
+    chains, resseqs, icodes, resnames, names, coords = [], [], [], [], [], []
+    with open(pdb_path) as f:
+        for line in f:
+            record = line[:6]
+            if record == "ENDMDL":
+                break
+            if record != "ATOM  " or line[16] not in " A" or line[17:20] not in AMINO_ACIDS:
+                continue
+            name = line[12:16].strip()
+            element = line[76:78].strip() or name[0]
+            if element == "H" or element == "D":
+                continue
+            chains.append(line[21])
+            resseqs.append(int(line[22:26]))
+            icodes.append(line[26].strip())
+            resnames.append(line[17:20])
+            names.append(name)
+            coords.append((float(line[30:38]), float(line[38:46]), float(line[46:54])))
+
+    n = len(names)
+    chain = np.array(chains, dtype="U1")
+    resseq = np.array(resseqs, dtype=np.int32)
+    icode = np.array(icodes, dtype="U1")
+    # A new residue starts wherever (chain, resseq, icode) changes
+    starts = np.flatnonzero(np.r_[True, (chain[1:] != chain[:-1]) | (resseq[1:] != resseq[:-1])
+                                  | (icode[1:] != icode[:-1])]) if n else np.zeros(0, dtype=np.int64)
+    residue = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    return {
+        "coords": np.array(coords, dtype=np.float32).reshape(-1, 3),
+        "names": np.array(names, dtype="S4"),
+        "residue": residue,
+        "chain": chain[starts],
+        "resseq": resseq[starts],
+        "icode": icode[starts],
+        "resname": np.array(resnames, dtype="U3")[starts],
+        "atom_start": starts,
+    }
+
+
+def residue_labels(parsed: dict, indices) -> list[str]:
+    """Chain + residue number labels (e.g. 'B45', 'A100A'), as used for ProteinMPNN bias keys."""
+    return [f"{parsed['chain'][i]}{parsed['resseq'][i]}{parsed['icode'][i]}" for i in indices]
+
+
+# =============================================================================
+# Spatial index
+# =============================================================================
+
+class CellGrid:
+    """
+    Uniform grid over a point set: points are bucketed by cell and sorted by
+    cell key, so the neighbours of any query point lie in the 27 cells around
+    its own (cell size >= cutoff).
+    """
+
+    def __init__(self, coords: np.ndarray, cell_size: float):
+        self.coords = np.asarray(coords, dtype=np.float32)
+        self.cell_size = float(cell_size)
+        cells = np.floor(self.coords / self.cell_size).astype(np.int64)
+        self.origin = cells.min(axis=0) if len(cells) else np.zeros(3, dtype=np.int64)
+        self.dims = (cells.max(axis=0) - self.origin + 1) if len(cells) else np.ones(3, dtype=np.int64)
+        keys = self._keys(cells - self.origin)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys, self.starts, self.counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+    def _keys(self, cells: np.ndarray) -> np.ndarray:
+        return (cells[:, 0] * self.dims[1] + cells[:, 1]) * self.dims[2] + cells[:, 2]
+
+    def query(self, points: np.ndarray, cutoff: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All (point, grid point) pairs within `cutoff`.
+
+        Returns:
+            (point indices, grid point indices, distances), unordered.
+        """
+        points = np.asarray(points, dtype=np.float32)
+        reach = int(np.ceil(cutoff / self.cell_size))
+        cells = np.floor(points / self.cell_size).astype(np.int64) - self.origin
+        hits_q, hits_g, hits_d = [], [], []
+        steps = range(-reach, reach + 1)
+        for offset in np.array([(x, y, z) for x in steps for y in steps for z in steps]):
+            neighbour = cells + offset
+            inside = np.flatnonzero(np.all((neighbour >= 0) & (neighbour < self.dims), axis=1))
+            keys = self._keys(neighbour[inside])
+            slot = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+            found = self.keys[slot] == keys if len(self.keys) else np.zeros(len(keys), dtype=bool)
+            query, slot = inside[found], slot[found]
+            counts = self.counts[slot]
+            if not counts.sum():
+                continue
+            # Expand each query point against every member of its neighbour cell
+            q = np.repeat(query, counts)
+            within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            g = self.order[np.repeat(self.starts[slot], counts) + within]
+            d = np.linalg.norm(points[q] - self.coords[g], axis=1)
+            keep = d <= cutoff
+            hits_q.append(q[keep])
+            hits_g.append(g[keep])
+            hits_d.append(d[keep])
+        if not hits_q:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return np.concatenate(hits_q), np.concatenate(hits_g), np.concatenate(hits_d)
+
+
+def residue_min_distances(res_a: np.ndarray, res_b: np.ndarray, dists: np.ndarray):
+    """Collapse atom pairs to (residue a, residue b, min distance) rows."""
+    if not len(dists):
+        return res_a[:0], res_b[:0], dists[:0]
+    order = np.lexsort((dists, res_b, res_a))
+    res_a, res_b, dists = res_a[order], res_b[order], dists[order]
+    first = np.r_[True, (res_a[1:] != res_a[:-1]) | (res_b[1:] != res_b[:-1])]
+    return res_a[first], res_b[first], dists[first]
+
+
+# =============================================================================
+# Interface analysis
+# =============================================================================
+
+def default_binder_chains(parsed: dict) -> list[str]:
+    """The shortest chain is taken as the binder when none is given."""
+    chains, counts = np.unique(parsed["chain"], return_counts=True)
+    if len(chains) < 2:
+        raise ValueError("Interface analysis needs at least two chains")
+    return [str(chains[np.argmin(counts)])]
+
+
+def interface_residues(parsed: dict, binder_chains: list[str], target_chains: Optional[list[str]] = None,
+                       cutoff: float = INTERFACE_CUTOFF) -> dict:
+    """
+    Residues of each side with a heavy atom within `cutoff` of the other side.
+
+    Returns:
+        Dict with 'binder' and 'target' residue indices (sorted) and
+        'binder_distance' / 'target_distance', their closest approach in Å.
+    """
+    atom_chain = parsed["chain"][parsed["residue"]]
+    binder_mask = np.isin(atom_chain, binder_chains)
+    target_mask = ~binder_mask if target_chains is None else np.isin(atom_chain, target_chains)
+    binder_atoms, target_atoms = np.flatnonzero(binder_mask), np.flatnonzero(target_mask)
+    if not len(binder_atoms) or not len(target_atoms):
+        raise ValueError(f"No atoms for binder chains {binder_chains} or target chains {target_chains}")
+
+    grid = CellGrid(parsed["coords"][target_atoms], cutoff)
+    qi, gi, d = grid.query(parsed["coords"][binder_atoms], cutoff)
+    res_b, res_t = parsed["residue"][binder_atoms[qi]], parsed["residue"][target_atoms[gi]]
+
+    n_res = len(parsed["resseq"])
+    closest = np.full(n_res, np.inf, dtype=np.float32)
+    np.minimum.at(closest, res_b, d)
+    np.minimum.at(closest, res_t, d)
+    binder, target = np.unique(res_b), np.unique(res_t)
+    return {"binder": binder, "target": target,
+            "binder_distance": closest[binder], "target_distance": closest[target]}
+
+
+def _side_atoms(parsed: dict, residues: np.ndarray, atoms_by_resname: dict) -> np.ndarray:
+    """Indices of the named side-chain atoms of the given residues."""
+    on_residue = np.isin(parsed["residue"], residues)
+    resname = parsed["resname"][parsed["residue"]]
+    wanted = np.zeros(len(on_residue), dtype=bool)
+    for name, atoms in atoms_by_resname.items():
+        wanted |= (resname == name) & np.isin(parsed["names"], atoms)
+    return np.flatnonzero(on_residue & wanted)
+
+
+def _anchor_atoms(parsed: dict, residues: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """CB atom of each residue (CA for Gly); residues missing both are dropped."""
+    atoms = np.flatnonzero(np.isin(parsed["residue"], residues))
+    names = parsed["names"][atoms]
+    is_gly = parsed["resname"][parsed["residue"][atoms]] == "GLY"
+    anchor = atoms[np.where(is_gly, names == b"CA", names == b"CB")]
+    return parsed["residue"][anchor], anchor
+
+
+def scan_his_cation(
+    pdb_path,
+    binder_chains: Optional[list[str]] = None,
+    target_chains: Optional[list[str]] = None,
+    cutoff: float = INTERFACE_CUTOFF,
+    candidate_distance: float = CANDIDATE_DISTANCE,
+    motif_distance: float = MOTIF_DISTANCE,
+    his_positions: int = HIS_POSITIONS,
+    parsed: Optional[dict] = None
+) -> dict:
+    """
+    Interface residues, existing His–Arg/Lys motifs and candidate His positions of one complex.
+
+    Args:
+        binder_chains: Chains designed for pH sensitivity (default: the shortest chain)
+        target_chains: Partner chains (default: every other chain)
+        cutoff: Heavy-atom distance defining the interface
+        candidate_distance: Max binder CB to Arg/Lys nitrogen distance for a candidate position
+        motif_distance: Max His ND1/NE2 to Arg/Lys nitrogen distance for an existing motif
+        his_positions: Number of top candidates biased toward His (0 for no bias)
+        parsed: Output of parse_complex, to skip re-parsing
+
+    Returns:
+        JSON-serializable dict with 'interface', 'motifs', 'candidates' (best
+        first) and 'bias' (ProteinMPNN bias_AA_per_residue toward His at the
+        top `his_positions` candidates).
+    """
+    parsed = parsed if parsed is not None else parse_complex(pdb_path)
+    binder_chains = list(binder_chains or default_binder_chains(parsed))
+    iface = interface_residues(parsed, binder_chains, target_chains, cutoff)
+    interface = np.union1d(iface["binder"], iface["target"])
+    on_binder = np.isin(parsed["chain"], binder_chains)
+
+    # Arg/Lys nitrogens anywhere on the interface (either side) are the cation partners
+    cation_atoms = _side_atoms(parsed, interface, CATION_ATOMS)
+    cation_res = parsed["residue"][cation_atoms]
+    motifs, candidates = [], []
+    if len(cation_atoms):
+        grid = CellGrid(parsed["coords"][cation_atoms], max(candidate_distance, motif_distance))
+
+        his_atoms = _side_atoms(parsed, interface, {"HIS": HIS_ATOMS})
+        qi, gi, d = grid.query(parsed["coords"][his_atoms], motif_distance)
+        his, partner, dist = residue_min_distances(parsed["residue"][his_atoms[qi]], cation_res[gi], d)
+        his_labels, partner_labels = residue_labels(parsed, his), residue_labels(parsed, partner)
+        for k in range(len(his)):
+            motifs.append({
+                "his": his_labels[k], "partner": partner_labels[k],
+                "partner_resname": str(parsed["resname"][partner[k]]), "distance": round(float(dist[k]), 2),
+                "cross_interface": bool(on_binder[his[k]] != on_binder[partner[k]]),
+            })
+
+        # Candidate His positions: binder interface residues other than existing His
+        positions = iface["binder"][parsed["resname"][iface["binder"]] != "HIS"]
+        pos_res, anchors = _anchor_atoms(parsed, positions)
+        qi, gi, d = grid.query(parsed["coords"][anchors], candidate_distance)
+        pos, partner, dist = residue_min_distances(pos_res[qi], cation_res[gi], d)
+        keep = pos != partner
+        pos, partner, dist = pos[keep], partner[keep], dist[keep]
+        bounds = np.flatnonzero(np.r_[True, pos[1:] != pos[:-1], True]) if len(pos) else np.zeros(1, dtype=int)
+        labels, partner_labels = residue_labels(parsed, pos[bounds[:-1]]), residue_labels(parsed, partner)
+        for k, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            i = pos[lo]
+            candidates.append({
+                "position": labels[k], "chain": str(parsed["chain"][i]), "resseq": int(parsed["resseq"][i]),
+                "resname": str(parsed["resname"][i]), "n_cations": int(hi - lo),
+                "cross_interface": int(np.sum(on_binder[partner[lo:hi]] != on_binder[i])),
+                "min_distance": round(float(dist[lo:hi].min()), 2),
+                "partners": [f"{partner_labels[j]} {parsed['resname'][partner[j]]} {dist[j]:.1f}"
+                             for j in np.argsort(dist[lo:hi]) + lo],
+            })
+        candidates.sort(key=lambda c: (-c["cross_interface"], -c["n_cations"], c["min_distance"]))
+
+    return {
+        "pdb_path": str(pdb_path),
+        "binder_chains": binder_chains,
+        "target_chains": target_chains or sorted(set(parsed["chain"].tolist()) - set(binder_chains)),
+        "n_atoms": int(len(parsed["coords"])),
+        "interface": {"binder": residue_labels(parsed, iface["binder"]),
+                      "target": residue_labels(parsed, iface["target"]), "cutoff": cutoff},
+        "motifs": motifs,
+        "candidates": candidates,
+        "bias": {c["position"]: {"H": HIS_BIAS} for c in candidates[:max(his_positions, 0)]},
+    }
+
+
+def _scan_one(args: tuple) -> dict:
+    path, kwargs = args
+    try:
+        return scan_his_cation(path, **kwargs)
+    except (OSError, ValueError) as e:
+        return {"pdb_path": str(path), "error": str(e)}
+
+
+def scan_complexes(pdb_paths: list, max_workers: Optional[int] = None, **kwargs) -> list[dict]:
+    """
+    scan_his_cation over a batch of complexes (e.g. docked poses) in worker
+    processes; files that fail to parse get an 'error' entry instead.
+    """
+    jobs = [(p, kwargs) for p in pdb_paths]
+    if max_workers == 1 or len(jobs) < 2:
+        return [_scan_one(j) for j in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers) as pool:
+        return list(pool.map(_scan_one, jobs, chunksize=max(1, len(jobs) // (4 * (max_workers or 8)))))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Find His–Arg/Lys interface motifs and His candidate positions")
+    p.add_argument("pdbs", nargs="+", help="Complex PDB files")
+    p.add_argument("--binder", help="Binder chain IDs, comma-separated (default: shortest chain)")
+    p.add_argument("--target", help="Target chain IDs, comma-separated (default: all other chains)")
+    p.add_argument("--cutoff", type=float, default=INTERFACE_CUTOFF, help="Interface heavy-atom cutoff (Å)")
+    p.add_argument("--candidate-distance", type=float, default=CANDIDATE_DISTANCE,
+                   help="Max binder CB to Arg/Lys N distance for a His candidate (Å)")
+    p.add_argument("--motif-distance", type=float, default=MOTIF_DISTANCE,
+                   help="Max His N to Arg/Lys N distance for an existing motif (Å)")
+    p.add_argument("--his-positions", type=int, default=HIS_POSITIONS,
+                   help=f"Bias ProteinMPNN toward His at this many top candidates (default: {HIS_POSITIONS})")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes for batches")
+    p.add_argument("--output", help="Write scan results as JSON")
+    args = p.parse_args()
+
+    split = lambda text: [c.strip() for c in text.split(",") if c.strip()] if text else None
+    results = scan_complexes(
+        args.pdbs, args.workers, binder_chains=split(args.binder), target_chains=split(args.target),
+        cutoff=args.cutoff, candidate_distance=args.candidate_distance, motif_distance=args.motif_distance,
+        his_positions=args.his_positions
+    )
+    for r in results:
+        if "error" in r:
+            print(f"{r['pdb_path']}: error: {r['error']}")
+            continue
+        print(f"{r['pdb_path']}: binder {','.join(r['binder_chains'])} | interface "
+              f"{len(r['interface']['binder'])}+{len(r['interface']['target'])} residues, "
+              f"{len(r['motifs'])} His–cation motifs, {len(r['candidates'])} candidate positions"
+              + (f"; His bias at {', '.join(r['bias'])}" if r["bias"] else ""))
+        for c in r["candidates"][:5]:
+            print(f"    {c['position']:>7} {c['resname']}  {c['n_cations']} cation(s), "
+                  f"closest {c['min_distance']:.1f} Å: {', '.join(c['partners'][:3])}")
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results if len(results) > 1 else results[0], indent=2))
+        print(f"Results written to {args.output}")
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Per-stage timing and memory profiling for the design pipeline.
+
+Stages are timed with a context manager; each record holds wall time, CPU time
+and the peak RSS sampled while the stage ran. Stages tagged kind="remote"
+(Tamarind uploads, job waits, downloads) are summed separately so the report
+splits remote waiting from local compute.
+
+Usage:
+    PROFILER.reset(enabled=True)
+    with PROFILER.stage("sasa"):
+        ...
+    with PROFILER.stage("fold_wait", kind="remote"):
+        ...
+    PROFILER.write("output/timings.json")
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SAMPLE_INTERVAL = 0.02
+
+
+def current_rss_mb() -> float:
+    """Current resident set size in MB (falls back to peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return 0.0
+        # ru_maxrss is KB on Linux, bytes on macOS
+        scale = 2**20 if os.uname().sysname == "Darwin" else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class StageProfiler:
+    """Collects wall/CPU/peak-memory records for named pipeline stages."""
+
+    def __init__(self, enabled: bool = False):
+        self.reset(enabled)
+
+    def reset(self, enabled: bool = False):
+        self.enabled = enabled
+        self.records: list[dict] = []
+        self._stack: list[dict] = []
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop = threading.Event()
+
+    # =========================================================================
+    # Memory sampling
+    # =========================================================================
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            rss = current_rss_mb()
+            with self._lock:
+                for frame in self._stack:
+                    frame["peak_rss_mb"] = max(frame["peak_rss_mb"], rss)
+
+    def _start_sampler(self):
+        if self._sampler is None or not self._sampler.is_alive():
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+
+    def _stop_sampler(self):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    # =========================================================================
+    # Stages
+    # =========================================================================
+
+    @contextmanager
+    def stage(self, name: str, kind: str = "local"):
+        """Time a block; kind is "local" (compute) or "remote" (API wait/transfer)."""
+        if not self.enabled:
+            yield
+            return
+
+        rss = current_rss_mb()
+        frame = {"name": name, "kind": kind, "depth": len(self._stack),
+                 "in_remote": any(f["kind"] == "remote" for f in self._stack),
+                 "start_rss_mb": rss, "peak_rss_mb": rss}
+        with self._lock:
+            self._stack.append(frame)
+        self._start_sampler()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            frame["wall_s"] = time.perf_counter() - wall0
+            frame["cpu_s"] = time.process_time() - cpu0
+            frame["peak_rss_mb"] = max(frame["peak_rss_mb"], current_rss_mb())
+            with self._lock:
+                self._stack.remove(frame)
+                empty = not self._stack
+                self.records.append(frame)
+            if empty:
+                self._stop_sampler()
+
+    # =========================================================================
+    # Reporting
+    # =========================================================================
+
+    def report(self) -> dict:
+        """Aggregate records by stage name plus a remote-wait vs local-compute split."""
+        stages: dict = {}
+        for r in self.records:
+            s = stages.setdefault(r["name"], {
+                "kind": r["kind"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0
+            })
+            s["calls"] += 1
+            s["wall_s"] += r["wall_s"]
+            s["cpu_s"] += r["cpu_s"]
+            s["peak_rss_mb"] = max(s["peak_rss_mb"], r["peak_rss_mb"])
+
+        total = sum(r["wall_s"] for r in self.records if r["depth"] == 0)
+        # Only count outermost remote stages to avoid double counting
+        remote = sum(r["wall_s"] for r in self.records if r["kind"] == "remote" and not r["in_remote"])
+        return {
+            "total_wall_s": total,
+            "remote_wait_s": remote,
+            "local_compute_s": max(total - remote, 0.0),
+            "peak_rss_mb": max((r["peak_rss_mb"] for r in self.records), default=0.0),
+            "stages": dict(sorted(stages.items(), key=lambda kv: kv[1]["wall_s"], reverse=True)),
+            "records": self.records,
+        }
+
+    def summary(self) -> str:
+        """Human-readable timing table."""
+        rep = self.report()
+        lines = [
+            f"Timing: total {rep['total_wall_s']:.2f}s | remote wait {rep['remote_wait_s']:.2f}s"
+            f" | local compute {rep['local_compute_s']:.2f}s | peak RSS {rep['peak_rss_mb']:.0f} MB",
+            f"  {'stage':<24}{'kind':<8}{'calls':>6}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}",
+        ]
+        for name, s in rep["stages"].items():
+            lines.append(f"  {name:<24}{s['kind']:<8}{s['calls']:>6}{s['wall_s']:>10.3f}"
+                         f"{s['cpu_s']:>10.3f}{s['peak_rss_mb']:>10.0f}")
+        return "\n".join(lines)
+
+    def write(self, path) -> Path:
+        """Write the report as JSON."""
+        path = Path(path)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+
+PROFILER = StageProfiler()
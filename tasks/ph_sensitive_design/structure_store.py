@@ -0,0 +1,265 @@
+"""
+Append-only, memory-mapped store for predicted structure libraries.
+
+Large design campaigns produce 10^4-10^5 predicted structures. Instead of
+re-parsing PDB text every time a structure is scored, each prediction is parsed
+once and appended to a set of flat binary arrays that readers memory-map:
+
+    coords.f4       (n_atoms, 3) float32 coordinates
+    bfactors.f4     (n_atoms,)   float32 B-factors (pLDDT for ESMFold/AF2)
+    resids.i4       (n_atoms,)   int32 residue numbers
+    atom_names.S4   (n_atoms,)   4-byte atom names (e.g. b"CA")
+    offsets.i8      (n_structures, 2) int64 [atom_start, atom_count]
+    metadata.jsonl  one JSON object per structure
+
+Records become visible once their offsets row is written, so a crash mid-append
+leaves the store readable up to the last complete structure. The atom arrays
+grow in chunks beyond the committed data, so readers remap them only when a
+chunk fills up and parse only the metadata lines added since their last read.
+
+Usage:
+    store = StructureStore("output/structure_store")
+    idx = store.append_pdb("pred.pdb", metadata={"header": "design_1"})
+    s = store[idx]            # zero-copy views into the memory maps
+    store.plddt_means()       # vectorized over all structures
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+ARRAYS = {
+    "coords": (np.float32, (3,)),
+    "bfactors": (np.float32, ()),
+    "resids": (np.int32, ()),
+    "atom_names": ("S4", ()),
+}
+OFFSETS_DTYPE = np.int64
+MIN_GROWTH_ATOMS = 1 << 16  # smallest chunk the atom arrays grow by
+
+
+def parse_pdb_atoms(pdb_path) -> dict:
+    """Fast fixed-column parse of ATOM/HETATM records (first model only)."""
+    names, resids, coords, bfactors = [], [], [], []
+    with open(pdb_path) as f:
+        for line in f:
+            record = line[:6]
+            if record == "ENDMDL":
+                break
+            if record not in ("ATOM  ", "HETATM"):
+                continue
+            names.append(line[12:16].strip())
+            resids.append(int(line[22:26]))
+            coords.append((float(line[30:38]), float(line[38:46]), float(line[46:54])))
+            bfactors.append(float(line[60:66]) if len(line) >= 66 else 0.0)
+    return {
+        "coords": np.array(coords, dtype=np.float32).reshape(-1, 3),
+        "bfactors": np.array(bfactors, dtype=np.float32),
+        "resids": np.array(resids, dtype=np.int32),
+        "atom_names": np.array(names, dtype="S4"),
+    }
+
+
+def _row_bytes(name: str) -> int:
+    dtype, shape = ARRAYS[name]
+    return np.dtype(dtype).itemsize * int(np.prod(shape, dtype=int))
+
+
+class StructureStore:
+    """
+    Append-only structure library backed by memory-mapped flat arrays.
+
+    With reset=True any existing library at root is discarded first (e.g. one
+    per pipeline run, so re-running does not duplicate records).
+    """
+
+    def __init__(self, root, reset: bool = False):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if reset:
+            for name in (*ARRAYS, "offsets"):
+                self._path(name).unlink(missing_ok=True)
+            (self.root / "metadata.jsonl").unlink(missing_ok=True)
+        self._maps: dict = {}
+        self._mapped_len = -1
+        self._arrays: dict = {}  # name -> memmap over the whole (preallocated) array file
+        self._capacity = 0  # atoms covered by the maps in _arrays
+        self._metadata: list = []
+        self._metadata_pos = 0  # byte length of the metadata lines parsed into _metadata
+        self._metadata_end = (0, 0)  # (committed records, byte length of their metadata lines)
+
+    def _path(self, name: str) -> Path:
+        dtype = ARRAYS[name][0] if name in ARRAYS else OFFSETS_DTYPE
+        suffix = np.dtype(dtype).str.lstrip("<>|=")
+        return self.root / f"{name}.{suffix}"
+
+    # =========================================================================
+    # Writing
+    # =========================================================================
+
+    def append(
+        self,
+        coords: np.ndarray,
+        bfactors: np.ndarray,
+        resids: np.ndarray,
+        atom_names: np.ndarray,
+        metadata: Optional[dict] = None
+    ) -> int:
+        """
+        Append one structure.
+
+        Returns:
+            Index of the new structure.
+        """
+        arrays = {"coords": coords, "bfactors": bfactors, "resids": resids, "atom_names": atom_names}
+        n_atoms = len(coords)
+        for name, values in arrays.items():
+            dtype, shape = ARRAYS[name]
+            arrays[name] = np.ascontiguousarray(values, dtype=dtype)
+            if arrays[name].shape != (n_atoms, *shape):
+                raise ValueError(f"{name} has shape {arrays[name].shape}, expected {(n_atoms, *shape)}")
+
+        atom_start = self._total_atoms()
+        index = len(self)
+        for name, values in arrays.items():
+            # Overwrites bytes left behind by an append that never committed
+            row = _row_bytes(name)
+            self._write_at(self._path(name), atom_start * row, values.tobytes(), MIN_GROWTH_ATOMS * row)
+        line = (json.dumps(metadata or {}, default=str) + "\n").encode()
+        end = self._committed_metadata_bytes(index)
+        with open(self.root / "metadata.jsonl", "ab") as f:
+            # Records map to lines by position, so drop any line an uncommitted append left
+            f.truncate(end)
+            f.write(line)
+        self._metadata_end = (index + 1, end + len(line))
+        # Offsets row is the commit point for the record
+        with open(self._path("offsets"), "ab") as f:
+            f.write(np.array([atom_start, n_atoms], dtype=OFFSETS_DTYPE).tobytes())
+        return index
+
+    @staticmethod
+    def _write_at(path: Path, offset: int, data: bytes, min_growth: int):
+        """Write data at offset, growing the file geometrically so readers rarely need to remap."""
+        with open(path, "r+b" if path.exists() else "w+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            needed = offset + len(data)
+            if needed > size:
+                f.truncate(max(needed, size + size // 2, size + min_growth))
+            f.seek(offset)
+            f.write(data)
+
+    def _committed_metadata_bytes(self, n: int) -> int:
+        """Byte length of the first n metadata lines (cached across appends)."""
+        if self._metadata_end[0] == n:
+            return self._metadata_end[1]
+        end = 0
+        path = self.root / "metadata.jsonl"
+        if n and path.exists():
+            with open(path, "rb") as f:
+                for _, line in zip(range(n), f):
+                    end += len(line)
+        self._metadata_end = (n, end)
+        return end
+
+    def append_pdb(self, pdb_path, metadata: Optional[dict] = None) -> int:
+        """Parse a PDB file once and append it."""
+        atoms = parse_pdb_atoms(pdb_path)
+        return self.append(**atoms, metadata={"pdb_path": str(pdb_path), **(metadata or {})})
+
+    # =========================================================================
+    # Reading
+    # =========================================================================
+
+    def __len__(self) -> int:
+        path = self._path("offsets")
+        if not path.exists():
+            return 0
+        return path.stat().st_size // (2 * np.dtype(OFFSETS_DTYPE).itemsize)
+
+    def _total_atoms(self) -> int:
+        n = len(self)
+        if n == 0:
+            return 0
+        start, count = self._mapped()["offsets"][n - 1]
+        return int(start + count)
+
+    def _mapped(self) -> dict:
+        """Memory-map all arrays, remapping only when new records were committed."""
+        n = len(self)
+        if n == self._mapped_len:
+            return self._maps
+
+        maps = {"offsets": np.memmap(self._path("offsets"), dtype=OFFSETS_DTYPE, mode="r", shape=(n, 2))
+                if n else np.zeros((0, 2), dtype=OFFSETS_DTYPE)}
+        total = int(maps["offsets"][-1].sum()) if n else 0
+        if total > self._capacity or n < self._mapped_len:
+            # Map the whole array files, including space preallocated for later appends
+            self._capacity = min(self._path(name).stat().st_size // _row_bytes(name) for name in ARRAYS)
+            self._arrays = {name: np.memmap(self._path(name), dtype=dtype, mode="r", shape=(self._capacity, *shape))
+                            for name, (dtype, shape) in ARRAYS.items()}
+        for name, (dtype, shape) in ARRAYS.items():
+            maps[name] = self._arrays[name][:total] if total else np.zeros((0, *shape), dtype=dtype)
+
+        if n < len(self._metadata):  # the store was reset underneath us
+            self._metadata, self._metadata_pos = [], 0
+        if n > len(self._metadata):
+            with open(self.root / "metadata.jsonl", "rb") as f:
+                f.seek(self._metadata_pos)
+                for _ in range(n - len(self._metadata)):
+                    line = f.readline()
+                    self._metadata.append(json.loads(line))
+                    self._metadata_pos += len(line)
+
+        self._maps, self._mapped_len = maps, n
+        return maps
+
+    def __getitem__(self, index: int) -> dict:
+        """Zero-copy views of one structure's arrays plus its metadata."""
+        maps = self._mapped()
+        if index < 0:
+            index += self._mapped_len
+        if not 0 <= index < self._mapped_len:
+            raise IndexError(f"Structure index {index} out of range ({self._mapped_len} stored)")
+        start, count = (int(v) for v in maps["offsets"][index])
+        atoms = slice(start, start + count)
+        return {
+            "index": index,
+            "metadata": self._metadata[index],
+            **{name: maps[name][atoms] for name in ARRAYS},
+        }
+
+    def metadata(self) -> list[dict]:
+        """Metadata for all committed structures."""
+        self._mapped()
+        return list(self._metadata)
+
+    def coords(self, index: int, atom_name: Optional[str] = None) -> np.ndarray:
+        """Coordinates of one structure, optionally restricted to one atom name (e.g. 'CA')."""
+        s = self[index]
+        if atom_name is None:
+            return s["coords"]
+        return s["coords"][s["atom_names"] == atom_name.encode()]
+
+    def plddt(self, index: int, network_indices=()) -> dict:
+        """Mean pLDDT over all atoms and over the network residues (1-based resids)."""
+        s = self[index]
+        net = np.isin(s["resids"] - 1, list(network_indices))
+        return {
+            "plddt_mean": float(s["bfactors"].mean()) if len(s["bfactors"]) else None,
+            "plddt_network": float(s["bfactors"][net].mean()) if net.any() else None,
+        }
+
+    def plddt_means(self) -> np.ndarray:
+        """Mean B-factor of every structure in one vectorized pass."""
+        maps = self._mapped()
+        offsets = maps["offsets"]
+        means = np.full(len(offsets), np.nan)
+        nonempty = offsets[:, 1] > 0
+        if nonempty.any():
+            starts = offsets[nonempty, 0]
+            sums = np.add.reduceat(maps["bfactors"], starts, dtype=np.float64)
+            means[nonempty] = sums / offsets[nonempty, 1]
+        return means
@@ -42,18 +42,25 @@ Deliverables:
     *   Output data files (JSON/PDB) in the `output/` directory.
 """
 
+from __future__ import annotations
+
 import sys
 import json
+import cProfile
 import argparse
 from pathlib import Path
-import numpy as np
-from Bio.PDB import PDBParser, SASA
-from Bio.SeqUtils import seq1
-from Bio import SeqIO
+from typing import Optional, TYPE_CHECKING
 
 # Add parent directory for tamarind_client import
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from tamarind_client import TamarindClient
+from profiling import PROFILER
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# NumPy, BioPython, the Tamarind client and the structure store are imported
+# inside the functions that use them, so `--help` and argument errors return
+# without paying ~0.3 s of imports (see tasks/startup_benchmark.py).
 
 # Constants
 MAX_SASA = {
@@ -64,25 +71,35 @@ MAX_SASA = {
 }
 CB_DISTANCE_RANGE = (5.5, 8.0)
 CB_OPTIMAL_DISTANCE = 6.5
+CLUSTER_IDENTITY = 0.95
+AA_ALPHABET = "ACDEFGHIKLMNPQRSTVWY"
+MOCK_BACKBONE_ATOMS = ("N", "CA", "C", "O", "CB")
 
 def parse_structure(pdb_path: str):
     """Parse PDB and map to 0-indexed sequence."""
-    structure = PDBParser(QUIET=True).get_structure("scaffold", pdb_path)
-    chain = next(structure[0].get_chains())
-    
-    # Filter for standard residues
-    residues = [r for r in chain if r.id[0] == ' ' and r.resname in MAX_SASA]
-    sequence = "".join(seq1(r.resname) for r in residues)
-    pdb_map = [r.id[1] for r in residues]
+    from Bio.PDB import PDBParser
+    from Bio.SeqUtils import seq1
+
+    with PROFILER.stage("parse_structure"):
+        structure = PDBParser(QUIET=True).get_structure("scaffold", pdb_path)
+        chain = next(structure[0].get_chains())
+        
+        # Filter for standard residues
+        residues = [r for r in chain if r.id[0] == ' ' and r.resname in MAX_SASA]
+        sequence = "".join(seq1(r.resname) for r in residues)
+        pdb_map = [r.id[1] for r in residues]
     
     return structure, chain, sequence, residues, pdb_map
 
 def identify_core_residues(pdb_path: str, threshold: float = 0.25) -> dict:
     """Identify buried core residues based on relative SASA."""
+    from Bio.PDB import SASA
+
     structure, chain, sequence, residues, pdb_map = parse_structure(pdb_path)
     
     # Calculate SASA
-    SASA.ShrakeRupley().compute(structure, level="R")
+    with PROFILER.stage("sasa"):
+        SASA.ShrakeRupley().compute(structure, level="R")
     sasa_map = {r.id[1]: r.sasa for r in chain if r.id[0] == ' '}
     
     core_indices = []
@@ -104,6 +121,8 @@ def identify_core_residues(pdb_path: str, threshold: float = 0.25) -> dict:
 
 def find_best_network_positions(parsed_data: dict, distance_range=CB_DISTANCE_RANGE, optimal=CB_OPTIMAL_DISTANCE) -> dict:
     """Find optimal core position pairs for His networks."""
+    import numpy as np
+
     structure, _, _, residues, _ = parse_structure(parsed_data["pdb_path"])
     
     # Get Cb coords (or Ca for Gly)
@@ -116,25 +135,26 @@ def find_best_network_positions(parsed_data: dict, distance_range=CB_DISTANCE_RA
     if len(coords) < 2:
         return {"network_selection": [], "cb_distance": None, "geometric_score": None}
 
-    # Vectorized distance matrix
-    diff = coords[:, None, :] - coords[None, :, :]
-    dists = np.sqrt(np.sum(diff**2, axis=-1))
-    
-    # Filter and score pairs
-    mask = (dists >= distance_range[0]) & (dists <= distance_range[1])
-    pairs = np.argwhere(np.triu(mask, k=1))
-    
-    candidates = []
-    min_d, max_d = distance_range
-    for i1, i2 in pairs:
-        d = dists[i1, i2]
-        score = 1.0 - abs(d - optimal) / (max_d - min_d)
-        candidates.append({
-            "positions": [core_indices[i1], core_indices[i2]],
-            "cb_distance": float(d), "geometric_score": float(max(0, score))
-        })
-    
-    candidates.sort(key=lambda x: x["geometric_score"], reverse=True)
+    with PROFILER.stage("network_search"):
+        # Vectorized distance matrix
+        diff = coords[:, None, :] - coords[None, :, :]
+        dists = np.sqrt(np.sum(diff**2, axis=-1))
+        
+        # Filter and score pairs
+        mask = (dists >= distance_range[0]) & (dists <= distance_range[1])
+        pairs = np.argwhere(np.triu(mask, k=1))
+        
+        candidates = []
+        min_d, max_d = distance_range
+        for i1, i2 in pairs:
+            d = dists[i1, i2]
+            score = 1.0 - abs(d - optimal) / (max_d - min_d)
+            candidates.append({
+                "positions": [core_indices[i1], core_indices[i2]],
+                "cb_distance": float(d), "geometric_score": float(max(0, score))
+            })
+        
+        candidates.sort(key=lambda x: x["geometric_score"], reverse=True)
     best = candidates[0] if candidates else None
     
     if best:
@@ -147,79 +167,362 @@ def find_best_network_positions(parsed_data: dict, distance_range=CB_DISTANCE_RA
         "all_candidate_pairs": candidates
     }
 
-def design_around_network(client, pdb_path, sequence, network_indices, pdb_map, chain_id, num_seqs=20):
-    """Run ProteinMPNN design."""
-    # Mutate sequence
+def select_diverse_networks(candidates: list, k: int) -> list:
+    """Greedily take the k best-scoring candidate networks whose positions do not overlap."""
+    chosen, used = [], set()
+    for c in candidates:
+        if len(chosen) == k:
+            break
+        if used.isdisjoint(c["positions"]):
+            chosen.append({**c, "network_id": len(chosen)})
+            used.update(c["positions"])
+    return chosen
+
+def his_mutant(sequence, network_indices) -> str:
+    """Sequence with every network position set to His."""
     seq_list = list(sequence)
     for i in network_indices: seq_list[i] = 'H'
-    mutated_seq = "".join(seq_list)
+    return "".join(seq_list)
+
+def mpnn_settings(pdb_path, network_indices, pdb_map, chain_id, num_seqs) -> dict:
+    """ProteinMPNN settings biasing the network positions toward His."""
+    bias = {f"{chain_id}{pdb_map[i]}": {"H": 100.0} for i in network_indices}
+    return {
+        "pdbFile": Path(pdb_path).name, "numSequences": str(num_seqs),
+        "temperature": "0.1", "bias_AA_per_residue": json.dumps(bias)
+    }
+
+def design_around_network(client, pdb_path, sequence, network_indices, pdb_map, chain_id, num_seqs=20, seed=None):
+    """Run ProteinMPNN design."""
+    mutated_seq = his_mutant(sequence, network_indices)
     
     # Setup Tamarind job
     if client:
         print(f"[Module 3] Submitting ProteinMPNN job...")
-        client.upload_file(pdb_path)
-        bias = {f"{chain_id}{pdb_map[i]}": {"H": 100.0} for i in network_indices}
+        with PROFILER.stage("upload", kind="remote"):
+            client.upload_file(pdb_path)
         
         try:
-            job = client.submit_job_sync("proteinmpnn", {
-                "pdbFile": Path(pdb_path).name, "numSequences": str(num_seqs),
-                "temperature": "0.1", "bias_AA_per_residue": json.dumps(bias)
-            }, timeout=600)
+            with PROFILER.stage("design_wait", kind="remote"):
+                job = client.submit_job_sync(
+                    "proteinmpnn", mpnn_settings(pdb_path, network_indices, pdb_map, chain_id, num_seqs), timeout=600
+                )
             
-            results = client.download_results(job['job_name'])
-            designs = []
-            for f in list(results.rglob("*.fa*")):
-                for rec in SeqIO.parse(f, "fasta"):
-                    if all(rec.seq[i] == 'H' for i in network_indices):
-                        designs.append({"header": rec.id, "sequence": str(rec.seq)})
-            return designs, mutated_seq
+            with PROFILER.stage("download", kind="remote"):
+                results = client.download_results(job['job_name'])
+            return load_fasta_designs(results, network_indices), mutated_seq
             
         except Exception as e:
             print(f"Job failed: {e}")
 
     # Fallback mock
     print("[Module 3] Using mock sequences")
+    with PROFILER.stage("mock_design"):
+        return mock_designs(mutated_seq, network_indices, num_seqs, seed=seed), mutated_seq
+
+def design_networks(client, pdb_path, sequence, networks, pdb_map, chain_id, num_seqs=20, seed=None,
+                    download_dir="tmp", timeout=600) -> list:
+    """Design around several networks at once: one ProteinMPNN batch, merged into one ranked list.
+
+    The scaffold is uploaded once, every network's job is submitted concurrently
+    and the results are collected together as the jobs finish. Networks whose
+    job fails (or never shows up in the job listing) fall back to mock designs. Each design records
+    the network it came from (network_id, network_selection, geometric_score);
+    the list is ranked by ProteinMPNN score (lower is better; mock designs
+    have none), with unscored designs interleaved across networks so that
+    folding the top of the list covers every network.
+    """
+    results = {}
+    if client:
+        from tamarind_client import JobManager
+
+        stamp = JobManager.unique_job_name("proteinmpnn")
+        jobs = [{
+            "tool": "proteinmpnn", "job_name": f"{stamp}_net{n['network_id']}",
+            "settings": mpnn_settings(pdb_path, n["positions"], pdb_map, chain_id, num_seqs)
+        } for n in networks]
+        print(f"[Module 3] Submitting {len(jobs)} ProteinMPNN jobs...")
+        manager = JobManager(client, download_dir=download_dir, poll_interval=5, missing_polls=3)
+        try:
+            with PROFILER.stage("upload", kind="remote"):
+                client.upload_file(pdb_path)
+            with PROFILER.stage("design_submit", kind="remote"):
+                manager.submit_many(jobs)
+            with PROFILER.stage("design_wait", kind="remote"):
+                records = manager.collect([j["job_name"] for j in jobs], wait=True, timeout=timeout)
+            for n, r in zip(networks, records):
+                if r.get("result_path") and not r.get("error"):
+                    results[n["network_id"]] = load_fasta_designs(r["result_path"], n["positions"])
+                else:
+                    print(f"Network {n['network_id']} job {r['job_name']}: {r.get('error') or r['status']}")
+        except Exception as e:
+            print(f"Batch design failed: {e}")
+        finally:
+            manager.shutdown()
+    
+    merged, within = [], []
+    for n in networks:
+        designs = results.get(n["network_id"])
+        if not designs:
+            print(f"[Module 3] Using mock sequences for network {n['network_id']}")
+            with PROFILER.stage("mock_design"):
+                designs = mock_designs(his_mutant(sequence, n["positions"]), n["positions"], num_seqs,
+                                       seed=None if seed is None else seed + n["network_id"])
+        for i, d in enumerate(designs):
+            merged.append({
+                **d, "header": f"net{n['network_id']}_{d['header']}", "network_id": n["network_id"],
+                "network_selection": n["positions"], "geometric_score": n["geometric_score"],
+                "mpnn_score": d.get("mpnn_score"),
+            })
+            within.append(i)
+    
+    def rank_key(j):
+        score = merged[j]["mpnn_score"]
+        return (score if score is not None else float("inf"), within[j], -merged[j]["geometric_score"])
+    
+    merged = [merged[j] for j in sorted(range(len(merged)), key=rank_key)]
+    for rank, d in enumerate(merged, 1):
+        d["rank"] = rank
+    print(f"[Module 3] {len(merged)} designs from {len(networks)} networks")
+    return merged
+
+def mpnn_header_score(header: str) -> Optional[float]:
+    """ProteinMPNN 'score=' value from a FASTA header, if present."""
+    for field in header.replace(",", " ").split():
+        if field.startswith("score="):
+            try:
+                return float(field[len("score="):])
+            except ValueError:
+                return None
+    return None
+
+def load_fasta_designs(results_dir, network_indices) -> list:
+    """Read designed sequences from FASTA outputs, keeping those with His at every network position.
+
+    Each design carries the ProteinMPNN score from its header (None if absent).
+    """
+    from Bio import SeqIO
+
+    with PROFILER.stage("parse_designs"):
+        designs = []
+        for f in list(Path(results_dir).rglob("*.fa*")):
+            for rec in SeqIO.parse(f, "fasta"):
+                if all(rec.seq[i] == 'H' for i in network_indices):
+                    designs.append({"header": rec.id, "sequence": str(rec.seq),
+                                    "mpnn_score": mpnn_header_score(rec.description)})
+        return designs
+
+def mock_designs(sequence, network_indices, num_seqs, mutation_rate=0.1, seed=None) -> list:
+    """Generate random point-mutant designs as one (num_seqs, L) matrix, keeping network His fixed."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    alphabet = np.frombuffer(AA_ALPHABET.encode("ascii"), dtype=np.uint8)
+    base = encode_sequences([sequence])[0]
+    
+    mat = np.tile(base, (num_seqs, 1))
+    mutate = rng.random(mat.shape) < mutation_rate
+    mat[mutate] = alphabet[rng.integers(0, len(alphabet), int(mutate.sum()))]
+    mat[:, list(network_indices)] = ord('H')
+    
+    return [{"header": f"mock_{i}", "sequence": row.tobytes().decode("ascii")}
+            for i, row in enumerate(mat)]
+
+def encode_sequences(sequences: list) -> "np.ndarray":
+    """Encode sequences as an (n, L) uint8 matrix of ASCII codes, 0-padded to the longest."""
+    import numpy as np
+
+    length = max((len(s) for s in sequences), default=0)
+    encoded = np.zeros((len(sequences), length), dtype=np.uint8)
+    for i, s in enumerate(sequences):
+        encoded[i, :len(s)] = np.frombuffer(s.encode("ascii"), dtype=np.uint8)
+    return encoded
+
+def cluster_designs(designs: list, identity_threshold: float = CLUSTER_IDENTITY) -> list:
+    """Greedy identity clustering of designs (Hamming distance on encoded sequences).
+
+    Exact duplicates are collapsed first; the first-seen sequence of each cluster
+    becomes its representative, so only representatives need to be folded.
+    Designs for different His networks (network_id) never share a cluster, since
+    members inherit the representative's fold and network pLDDT.
+    """
+    if not designs:
+        return []
+    groups = {}
+    for i, d in enumerate(designs):
+        groups.setdefault(d.get("network_id"), []).append(i)
+    clusters = []
+    with PROFILER.stage("clustering"):
+        for indices in groups.values():
+            for c in _cluster_designs([designs[i] for i in indices], identity_threshold):
+                clusters.append({
+                    "cluster_id": len(clusters), "representative": indices[c["representative"]],
+                    "members": [indices[m] for m in c["members"]]
+                })
+    print(f"[Module 3] Clustered {len(designs)} designs into {len(clusters)} clusters "
+          f"(identity >= {identity_threshold:.2f}, {len(groups)} network(s))")
+    return clusters
+
+def _cluster_designs(designs: list, identity_threshold: float) -> list:
+    import numpy as np
+
+    encoded = encode_sequences([d["sequence"] for d in designs])
+    uniq, first, inverse = np.unique(encoded, axis=0, return_index=True, return_inverse=True)
+    
+    # Process unique sequences in input order
+    order = np.argsort(first)
+    uniq, first = uniq[order], first[order]
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    inverse = rank[inverse.reshape(-1)]
+    
+    max_mismatch = int(np.floor((1.0 - identity_threshold) * encoded.shape[1] + 1e-9))
+    labels = np.full(len(uniq), -1)
+    reps = []
+    for u in range(len(uniq)):
+        if labels[u] >= 0:
+            continue
+        open_idx = np.flatnonzero(labels < 0)
+        hamming = np.count_nonzero(uniq[open_idx] != uniq[u], axis=1)
+        labels[open_idx[hamming <= max_mismatch]] = len(reps)
+        reps.append(int(first[u]))
+    
+    member_labels = labels[inverse]
     return [{
-        "header": f"mock_{i}",
-        "sequence": "".join('H' if j in network_indices else (
-            np.random.choice(list("ACDEFGHIKLMNPQRSTVWY")) 
-            if np.random.rand() < 0.1 else s
-        ) for j, s in enumerate(mutated_seq))
-    } for i in range(num_seqs)], mutated_seq
-
-def predict_structures(client, designs, network_indices, output_dir, max_preds=5):
-    """Run ESMFold prediction."""
+        "cluster_id": c, "representative": rep,
+        "members": np.flatnonzero(member_labels == c).tolist()
+    } for c, rep in enumerate(reps)]
+
+def propagate_cluster_predictions(designs: list, clusters: list, rep_preds: list) -> list:
+    """Copy each representative's prediction to all members of its cluster."""
+    preds = []
+    for cluster, pred in zip(clusters, rep_preds):
+        rep_header = designs[cluster["representative"]]["header"]
+        for m in cluster["members"]:
+            preds.append({
+                **pred, **designs[m], "cluster_id": cluster["cluster_id"],
+                "cluster_size": len(cluster["members"]), "folded_as": rep_header
+            })
+    return preds
+
+class MockStructurePredictor:
+    """Offline stand-in for ESMFold that writes perturbed scaffold backbones.
+
+    Each call threads the design sequence onto the scaffold's N/CA/C/O/CB atoms,
+    adds seeded Gaussian coordinate noise and writes a PDB whose B-factors mimic
+    pLDDT (lower where the residue moved more or was mutated).
+    """
+    
+    def __init__(self, pdb_path: str, noise: float = 0.5, seed: Optional[int] = None):
+        import numpy as np
+
+        _, chain, sequence, residues, pdb_map = parse_structure(pdb_path)
+        self.chain_id = chain.get_id()
+        self.sequence = sequence
+        self.pdb_map = np.array(pdb_map)
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self._count = 0
+        
+        # (n_res, n_atoms, 3) coordinates; NaN where the atom is absent (e.g. Gly CB)
+        self.coords = np.full((len(residues), len(MOCK_BACKBONE_ATOMS), 3), np.nan, dtype=np.float32)
+        for i, r in enumerate(residues):
+            for j, name in enumerate(MOCK_BACKBONE_ATOMS):
+                if name in r:
+                    self.coords[i, j] = r[name].coord
+    
+    def __call__(self, design: dict, output_dir) -> Path:
+        import numpy as np
+        from Bio.SeqUtils import seq3
+
+        seq = design["sequence"][:len(self.sequence)]
+        n = len(seq)
+        coords = self.coords[:n] + self.rng.normal(0, self.noise, self.coords[:n].shape).astype(np.float32)
+        
+        # Per-residue pseudo-pLDDT from CA displacement and mutation load
+        displacement = np.linalg.norm(coords[:, 1] - self.coords[:n, 1], axis=-1)
+        mutated = encode_sequences([seq])[0] != encode_sequences([self.sequence[:n]])[0]
+        plddt = np.clip(95.0 - 10.0 * displacement / self.noise - 15.0 * mutated, 30.0, 98.0)
+        
+        lines, serial = [], 1
+        for i, aa in enumerate(seq):
+            resn = seq3(aa).upper()
+            for j, name in enumerate(MOCK_BACKBONE_ATOMS):
+                if np.isnan(coords[i, j, 0]) or (name == "CB" and aa == "G"):
+                    continue
+                x, y, z = coords[i, j]
+                lines.append(
+                    f"ATOM  {serial:5d}  {name:<3s} {resn:3s} {self.chain_id}{self.pdb_map[i]:4d}    "
+                    f"{x:8.3f}{y:8.3f}{z:8.3f}{1.0:6.2f}{plddt[i]:6.2f}          {name[0]:>2s}"
+                )
+                serial += 1
+        lines.append("END")
+        
+        out_path = Path(output_dir) / f"mock_{self._count:05d}.pdb"
+        self._count += 1
+        out_path.write_text("\n".join(lines) + "\n")
+        return out_path
+
+def extract_plddt(pdb_file, network_indices) -> dict:
+    """Mean pLDDT (B-factor) over all atoms and over the network residues."""
+    import numpy as np
+    from Bio.PDB import PDBParser
+
+    structure = PDBParser(QUIET=True).get_structure("p", str(pdb_file))
+    bfactors = [a.bfactor for a in structure.get_atoms()]
+    
+    # Network pLDDT (esm 1-based vs index 0-based)
+    net_bfactors = []
+    for chain in structure[0]:
+        for r in chain:
+            if (r.id[1] - 1) in network_indices: # approximate mapping if sequential
+                net_bfactors.extend([a.bfactor for a in r])
+    
+    return {
+        "plddt_mean": float(np.mean(bfactors)),
+        "plddt_network": float(np.mean(net_bfactors)) if net_bfactors else None
+    }
+
+def predict_structures(client, designs, network_indices, output_dir, max_preds=5, mock_predictor=None, store=None):
+    """Run ESMFold prediction (or the mock predictor when offline).
+
+    When a StructureStore is given, each predicted PDB is parsed once into the
+    store and scored from its memory-mapped arrays. Designs that carry their own
+    network_selection (multi-network runs) are scored on that network.
+    """
     preds = []
     pred_dir = Path(output_dir) / "predicted_structures"
     pred_dir.mkdir(parents=True, exist_ok=True)
     
+    def score(d, pdb_file):
+        network = d.get("network_selection", network_indices)
+        with PROFILER.stage("score_structure"):
+            if store is None:
+                return {**d, "pdb_path": str(pdb_file), **extract_plddt(pdb_file, network)}
+            idx = store.append_pdb(pdb_file, metadata={"header": d["header"], "sequence": d["sequence"]})
+            return {**d, "pdb_path": str(pdb_file), "store_index": idx, **store.plddt(idx, network)}
+    
     for i, d in enumerate(designs[:max_preds]):
         try:
             if client:
-                job = client.submit_job_sync("esmfold", {"sequence": d["sequence"]}, timeout=300)
-                res_path = client.download_results(job['job_name'], output_dir=str(pred_dir))
+                with PROFILER.stage("fold_wait", kind="remote"):
+                    job = client.submit_job_sync("esmfold", {"sequence": d["sequence"]}, timeout=300)
+                with PROFILER.stage("download", kind="remote"):
+                    res_path = client.download_results(job['job_name'], output_dir=str(pred_dir))
                 pdb_file = next(res_path.glob("*.pdb")) if res_path.is_dir() else res_path
-                
-                # Extract pLDDT
-                structure = PDBParser(QUIET=True).get_structure("p", str(pdb_file))
-                bfactors = [a.bfactor for a in structure.get_atoms()]
-                mean_plddt = np.mean(bfactors)
-                
-                # Network pLDDT (esm 1-based vs index 0-based)
-                net_bfactors = []
-                for chain in structure[0]:
-                    for r in chain:
-                        if (r.id[1] - 1) in network_indices: # approximate mapping if sequential
-                             net_bfactors.extend([a.bfactor for a in r])
-                
-                preds.append({**d, "pdb_path": str(pdb_file), "plddt_mean": float(mean_plddt)})
+                preds.append(score(d, pdb_file))
                 continue
                 
         except Exception:
             pass
             
         # Mock fallback
-        preds.append({**d, "pdb_path": "mock.pdb", "plddt_mean": 75.0, "is_mock": True})
+        if mock_predictor is not None:
+            with PROFILER.stage("mock_fold"):
+                pdb_file = mock_predictor(d, pred_dir)
+            preds.append({**score(d, pdb_file), "is_mock": True})
+        else:
+            preds.append({**d, "pdb_path": "mock.pdb", "plddt_mean": 75.0, "is_mock": True})
         
     return preds
 
@@ -228,12 +531,39 @@ def run_pipeline(pdb_path: str, output_dir: str, **kwargs):
     out = Path(output_dir)
     out.mkdir(parents=True, exist_ok=True)
     
+    # Optional profiling: per-stage timings and/or a cProfile dump
+    PROFILER.reset(enabled=kwargs.get('profile', False) or kwargs.get('cprofile', False))
+    prof = cProfile.Profile() if kwargs.get('cprofile') else None
+    if prof:
+        prof.enable()
+    try:
+        with PROFILER.stage("pipeline"):
+            _run_modules(pdb_path, out, **kwargs)
+    finally:
+        if prof:
+            prof.disable()
+            prof.dump_stats(str(out / "pipeline.prof"))
+            print(f"cProfile dump: {out / 'pipeline.prof'}")
+        if PROFILER.enabled:
+            print(PROFILER.summary())
+            PROFILER.write(out / "timings.json")
+
+def _run_modules(pdb_path: str, out: Path, **kwargs):
+    """Run Modules 1-4, writing each stage's JSON output to `out`."""
+    from tamarind_client import TamarindClient
+    from structure_store import StructureStore
+
     # Initialize Client
-    try: 
-        client = TamarindClient()
-    except Exception as e:
-        print(f"Tamarind init failed: {e}. Using mock fallback.")
+    seed = kwargs.get('seed')
+    if kwargs.get('mock'):
+        print("Offline mock mode: Tamarind API disabled.")
         client = None
+    else:
+        try: 
+            client = TamarindClient()
+        except Exception as e:
+            print(f"Tamarind init failed: {e}. Using mock fallback.")
+            client = None
 
     # Module 1: Core
     m1 = identify_core_residues(pdb_path, kwargs.get('sasa_threshold', 0.25))
@@ -241,29 +571,50 @@ def run_pipeline(pdb_path: str, output_dir: str, **kwargs):
     
     # Module 2: Network
     m2 = find_best_network_positions(m1)
+    top_k = kwargs.get('top_k') or 1
+    if top_k > 1:
+        m2["selected_networks"] = select_diverse_networks(m2.get("all_candidate_pairs", []), top_k)
+        print(f"[Module 2] {len(m2['selected_networks'])} non-overlapping networks selected (top-k {top_k})")
     with open(out / "network.json", 'w') as f: json.dump(m2, f, indent=2)
     
     if not m2["network_selection"]: return
     
     # Module 3: Design
-    designs, mut_seq = design_around_network(
-        client, pdb_path, m1["sequence"], 
-        m2["network_selection"], m1["pdb_index_map"], m1["chain_id"],
-        kwargs.get('num_designs', 2)
-    )
+    if top_k > 1:
+        networks = m2["selected_networks"]
+        designs = design_networks(
+            client, pdb_path, m1["sequence"], networks, m1["pdb_index_map"], m1["chain_id"],
+            kwargs.get('num_designs', 2), seed=seed, download_dir=str(out / "design_results")
+        )
+        mut_seq = his_mutant(m1["sequence"], m2["network_selection"])
+    else:
+        networks = None
+        designs, mut_seq = design_around_network(
+            client, pdb_path, m1["sequence"], 
+            m2["network_selection"], m1["pdb_index_map"], m1["chain_id"],
+            kwargs.get('num_designs', 2), seed=seed
+        )
+    
+    clusters = cluster_designs(designs, kwargs.get('cluster_identity', CLUSTER_IDENTITY))
     
     m3 = {
         "designed_sequences": designs, 
         "network_selection": m2["network_selection"],
-        "original_sequence": mut_seq
+        "original_sequence": mut_seq,
+        "clusters": clusters
     }
+    if networks:
+        m3["networks"] = networks
     with open(out / "designs.json", 'w') as f: json.dump(m3, f, indent=2)
     
-    # Module 4: Prediction
-    preds = predict_structures(
-        client, designs, 
-        m2["network_selection"], out, kwargs.get('max_predictions', 5)
+    # Module 4: Prediction (cluster representatives only)
+    rep_preds = predict_structures(
+        client, [designs[c["representative"]] for c in clusters], 
+        m2["network_selection"], out, kwargs.get('max_predictions', 5),
+        mock_predictor=MockStructurePredictor(pdb_path, seed=seed),
+        store=StructureStore(out / "structure_store", reset=True)
     )
+    preds = propagate_cluster_predictions(designs, clusters, rep_preds)
     
     with open(out / "predictions.json", 'w') as f: json.dump(preds, f, indent=2)
     print(f"Done. Results in {out}")
@@ -275,6 +626,17 @@ if __name__ == "__main__":
     p.add_argument("--sasa-threshold", type=float, default=0.25)
     p.add_argument("--num-designs", type=int, default=2)
     p.add_argument("--max-predictions", type=int, default=5)
+    p.add_argument("--top-k", type=int, default=1,
+                   help="Design around the k best non-overlapping networks (one ProteinMPNN batch) instead of only the best")
+    p.add_argument("--cluster-identity", type=float, default=CLUSTER_IDENTITY,
+                   help="Sequence identity for clustering designs before folding (1.0 = exact dedup only)")
+    p.add_argument("--mock", action="store_true",
+                   help="Offline benchmark mode: skip the Tamarind API and use mock design/folding")
+    p.add_argument("--seed", type=int, default=None, help="Random seed for mock designs and structures")
+    p.add_argument("--profile", action="store_true",
+                   help="Write per-stage wall/CPU/memory timings to <output>/timings.json")
+    p.add_argument("--cprofile", action="store_true",
+                   help="Also dump a cProfile trace to <output>/pipeline.prof (implies --profile)")
     args = p.parse_args()
     
     run_pipeline(
@@ -0,0 +1,450 @@
+"""
+Sandboxed, persistent Python kernels for the agent's run_python tool.
+
+Each kernel is a long-lived worker process holding one namespace: numpy, pandas
+and the Bio.PDB helpers are imported once at startup, and any variables the model
+defines (parsed structures, DataFrames, ...) survive between tool calls. Each
+call only pays the IPC round trip.
+
+Agent code never runs in the agent's own process. Every call is guarded by a
+wall-clock timeout and an RSS limit (the worker is killed and its namespace reset
+when either is exceeded), output is capped inside the worker, and CPU time is
+reported per call. The RSS limit is polled every MONITOR_INTERVAL; as a hard
+ceiling against allocations faster than that, the worker also sets RLIMIT_DATA
+to RLIMIT_FACTOR times the limit, so such an allocation raises MemoryError. A KernelPool keeps one kernel per named session, so calls in
+different sessions run concurrently while calls in one session stay ordered.
+
+Usage:
+    pool = KernelPool(task_dir, output_dir, size=4)
+    pool.execute("x = 1")
+    result = pool.execute("print(x)")
+    # {"ok": True, "stdout": "1\\n", "stderr": "", "error": None, "killed": None,
+    #  "truncated": 0, "wall_s": ..., "cpu_s": ..., "peak_rss_delta_mb": ...,
+    #  "process_peak_rss_mb": ..., "session": "default"}
+    pool.shutdown()
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import builtins
+import threading
+import traceback
+import subprocess
+from pathlib import Path
+from typing import Optional
+from collections import OrderedDict
+from contextlib import redirect_stdout, redirect_stderr
+from multiprocessing.connection import Connection
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_TIMEOUT = 300          # seconds per call
+DEFAULT_MAX_RSS_MB = 4096      # worker is killed above this resident set size
+DEFAULT_MAX_OUTPUT = 10000     # chars kept per stream
+STARTUP_TIMEOUT = 120          # seconds allowed for preloading libraries
+MONITOR_INTERVAL = 0.1         # seconds between timeout/RSS checks
+RLIMIT_FACTOR = 2              # worker data segment cap, as a multiple of the RSS limit
+
+
+def build_namespace(task_dir: Path, output_dir: Path) -> dict:
+    """Globals for agent code: preloaded scientific libraries plus task paths."""
+    ns = {
+        "__builtins__": builtins, "__name__": "__agent__",
+        "json": json, "Path": Path, "os": os,
+    }
+
+    try:
+        import numpy as np
+        ns["np"] = ns["numpy"] = np
+    except ImportError:
+        pass
+
+    try:
+        import pandas as pd
+        ns["pd"] = ns["pandas"] = pd
+    except ImportError:
+        pass
+
+    try:
+        import Bio
+        from Bio.PDB import PDBParser, NeighborSearch, PDBIO, Selection
+        from Bio.PDB.SASA import ShrakeRupley
+        from Bio.SeqUtils import seq1
+        from Bio import SeqIO
+        ns.update({
+            "Bio": Bio, "PDBParser": PDBParser, "ShrakeRupley": ShrakeRupley,
+            "NeighborSearch": NeighborSearch, "PDBIO": PDBIO, "Selection": Selection,
+            "seq1": seq1, "SeqIO": SeqIO
+        })
+    except ImportError:
+        pass
+
+    try:
+        from data_cache import DataCache
+        cache = DataCache()
+
+        def load_dataset(path, columns=None, categorical=False):
+            """DataFrame for a task data file, served from the shared columnar cache (same result as pd.read_csv)."""
+            path = Path(path)
+            return cache.load(path if path.is_absolute() else task_dir / path, columns, categorical)
+
+        ns["load_dataset"] = load_dataset
+        ns["DATA_CACHE"] = cache
+    except ImportError:
+        pass
+
+    try:
+        from cgm_engine import GlucoseCube
+
+        def glucose_cube(path="data_cgm.csv", meal_column="foods"):
+            """Dense (subject x meal x rep x minute) glucose array for a CGM table in the task directory."""
+            path = Path(path)
+            return GlucoseCube.from_file(path if path.is_absolute() else task_dir / path,
+                                         ns.get("DATA_CACHE"), meal_column)
+
+        def cgm_responses(path="data_cgm.csv", **kwargs):
+            """Baseline, peak, peak_delta, time_to_peak and iAUC for every subject/meal/rep."""
+            return glucose_cube(path).responses(**kwargs)
+
+        ns.update({"GlucoseCube": GlucoseCube, "glucose_cube": glucose_cube, "cgm_responses": cgm_responses})
+    except ImportError:
+        pass
+
+    try:
+        from omics_engine import FeatureTable, benjamini_hochberg
+
+        def load_features(path):
+            """FeatureTable (float32 features x samples + annotations) for a metabolomics/lipidomics file."""
+            path = Path(path)
+            return FeatureTable.from_file(path if path.is_absolute() else task_dir / path, ns.get("DATA_CACHE"))
+
+        ns.update({"FeatureTable": FeatureTable, "load_features": load_features,
+                   "benjamini_hochberg": benjamini_hochberg})
+    except ImportError:
+        pass
+
+    ns["TASK_DIR"] = task_dir
+    ns["OUTPUT_DIR"] = output_dir
+    ns["task_dir"] = str(task_dir)
+    ns["output_dir"] = str(output_dir)
+    return ns
+
+
+def process_rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of another process in MB, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# =============================================================================
+# Worker side
+# =============================================================================
+
+class CappedWriter(io.TextIOBase):
+    """Text sink that keeps the first `limit` chars and counts the rest."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts: list[str] = []
+        self.size = 0
+        self.dropped = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        room = max(self.limit - self.size, 0)
+        if room:
+            self.parts.append(s[:room])
+            self.size += min(len(s), room)
+        self.dropped += max(len(s) - room, 0)
+        return len(s)
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
+
+
+def max_rss_mb() -> Optional[float]:
+    """Peak RSS of this process over its lifetime (None without the resource module)."""
+    if resource is None:
+        return None
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 2**20 if sys.platform == "darwin" else 2**10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def limit_memory(max_mb: Optional[float]):
+    """Cap this process's data segment (heap and private mappings) at max_mb, where supported."""
+    if not max_mb or resource is None or not hasattr(resource, "RLIMIT_DATA"):
+        return
+    limit = int(max_mb * 2**20)
+    _, hard = resource.getrlimit(resource.RLIMIT_DATA)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, hard))
+    except (ValueError, OSError):
+        pass  # polling in the agent process still enforces the RSS limit
+
+
+def serve(conn: Connection, task_dir: str, output_dir: str, max_data_mb: Optional[float] = None):
+    """Worker loop: receive code, exec it in the persistent namespace, send back output."""
+    limit_memory(max_data_mb)
+    task_dir, output_dir = os.path.abspath(task_dir), os.path.abspath(output_dir)
+    os.chdir(task_dir)
+    ns = build_namespace(Path(task_dir), Path(output_dir))
+    try:
+        conn.send({"ready": True})
+    except OSError:  # the agent shut the kernel down before it finished starting
+        return
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if msg is None:
+            break
+
+        limit = msg.get("max_output", DEFAULT_MAX_OUTPUT)
+        stdout, stderr = CappedWriter(limit), CappedWriter(limit)
+        error = None
+        peak0 = max_rss_mb()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                exec(compile(msg["code"], "<run_python>", "exec"), ns)
+        except BaseException:  # SystemExit/KeyboardInterrupt from agent code must not kill the kernel
+            error = traceback.format_exc()
+            if len(error) > limit:
+                error = "... [traceback truncated]\n" + error[-limit:]
+
+        wall, cpu, peak = time.perf_counter() - wall0, time.process_time() - cpu0, max_rss_mb()
+        conn.send({
+            "ok": error is None, "stdout": stdout.getvalue(), "stderr": stderr.getvalue(),
+            "error": error, "killed": None, "truncated": stdout.dropped + stderr.dropped,
+            "wall_s": wall, "cpu_s": cpu,
+            # The process peak only ever grows, so a call's own cost is how far it raised it
+            "peak_rss_delta_mb": peak - peak0 if peak is not None else None,
+            "process_peak_rss_mb": peak,
+        })
+
+
+# =============================================================================
+# Agent side
+# =============================================================================
+
+class PythonKernel:
+    """A warm, resource-limited worker process with a persistent namespace."""
+
+    def __init__(
+        self,
+        task_dir: Path,
+        output_dir: Path,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_rss_mb: Optional[float] = DEFAULT_MAX_RSS_MB,
+        max_output: int = DEFAULT_MAX_OUTPUT
+    ):
+        self.task_dir = Path(task_dir)
+        self.output_dir = Path(output_dir)
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_output = max_output
+        self._lock = threading.Lock()
+        self._proc = None
+        self._conn = None
+        self._ready = False
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self):
+        """Launch the worker (returns immediately; libraries load in the background)."""
+        if self.alive:
+            return
+        # A fresh interpreter (not fork) so the worker never inherits the agent's HTTP
+        # client threads; messages go over a socketpair, leaving stdout free for agent code
+        parent_sock, child_sock = socket.socketpair()
+        max_data_mb = self.max_rss_mb * RLIMIT_FACTOR if self.max_rss_mb else 0
+        self._proc = subprocess.Popen(
+            [sys.executable, __file__, str(child_sock.fileno()), str(self.task_dir), str(self.output_dir),
+             str(max_data_mb)],
+            pass_fds=[child_sock.fileno()], stdin=subprocess.DEVNULL,
+        )
+        child_sock.close()
+        self._conn = Connection(parent_sock.detach())
+        self._ready = False
+
+    def _wait(self, timeout: Optional[float]) -> Optional[str]:
+        """Block until the worker replies; return a kill reason if a limit is hit first."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while not self._conn.poll(MONITOR_INTERVAL):
+            if self._proc.poll() is not None:
+                return None  # recv() will raise EOFError and report the crash
+            if deadline and time.monotonic() > deadline:
+                return "timeout"
+            if self.max_rss_mb:
+                rss = process_rss_mb(self._proc.pid)
+                if rss is not None and rss > self.max_rss_mb:
+                    return "memory"
+        return None
+
+    def execute(self, code: str, timeout: Optional[float] = None) -> dict:
+        """
+        Run code in the kernel namespace.
+
+        Args:
+            code: Python source to execute
+            timeout: Wall-clock limit in seconds (default: the kernel's timeout)
+
+        Returns:
+            Dict with 'ok', 'stdout', 'stderr', 'error' (formatted traceback or None),
+            'killed' (None, 'timeout', 'memory' or 'crashed'), 'truncated' (dropped
+            output chars), 'wall_s', 'cpu_s', 'peak_rss_delta_mb' (how much this call
+            raised the worker's peak RSS) and 'process_peak_rss_mb' (the worker's lifetime peak).
+        """
+        timeout = timeout or self.timeout
+        with self._lock:
+            self.start()
+            wall0 = time.perf_counter()
+            try:
+                if not self._ready:
+                    reason = self._wait(STARTUP_TIMEOUT)
+                    if reason == "timeout":
+                        return self._killed(reason, wall0,
+                                            f"Python kernel failed to start within {STARTUP_TIMEOUT}s")
+                    if reason == "memory":
+                        return self._killed(reason, wall0, f"Python kernel exceeded the {self.max_rss_mb} MB "
+                                                           "memory limit while starting")
+                    self._conn.recv()  # EOFError below if the worker crashed while starting
+                    self._ready = True
+                    wall0 = time.perf_counter()
+
+                self._conn.send({"code": code, "max_output": self.max_output})
+                reason = self._wait(timeout)
+                if reason == "timeout":
+                    return self._killed(reason, wall0, f"Execution timed out after {timeout}s")
+                if reason == "memory":
+                    return self._killed(reason, wall0, f"Execution exceeded the {self.max_rss_mb} MB memory limit")
+                return self._conn.recv()
+            except (EOFError, OSError):
+                # Worker died (e.g. os._exit or a segfault in an extension)
+                returncode = self._proc.wait() if self._proc else None
+                return self._killed("crashed", wall0, f"Python kernel died (exit code {returncode})")
+
+    def _killed(self, reason: str, wall0: float, message: str) -> dict:
+        self.shutdown(force=True)
+        return {
+            "ok": False, "stdout": "", "stderr": "", "killed": reason, "truncated": 0,
+            "error": f"{message}; the Python session was reset and its variables are lost.",
+            "wall_s": time.perf_counter() - wall0, "cpu_s": None,
+            "peak_rss_delta_mb": None, "process_peak_rss_mb": None,
+        }
+
+    def restart(self):
+        """Discard the namespace and start a fresh worker."""
+        self.shutdown()
+        self.start()
+
+    def shutdown(self, force: bool = False):
+        if self._conn is not None:
+            if not force:
+                try:
+                    self._conn.send(None)
+                except OSError:
+                    pass
+            self._conn.close()
+        if self._proc is not None:
+            if force:
+                self._proc.kill()
+            try:
+                self._proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+        self._proc = self._conn = None
+        self._ready = False
+
+
+class KernelPool:
+    """
+    One kernel per named session, at most `size` live workers.
+
+    Calls in different sessions run concurrently; calls in the same session are
+    serialized. When the pool is full, the least recently used idle session is
+    evicted (its namespace is lost); if every session is busy, callers wait.
+    """
+
+    def __init__(self, task_dir: Path, output_dir: Path, size: int = 4, **kernel_options):
+        self.task_dir = Path(task_dir)
+        self.output_dir = Path(output_dir)
+        self.size = size
+        self.kernel_options = kernel_options
+        self._sessions: "OrderedDict[str, PythonKernel]" = OrderedDict()
+        self._in_use: dict[str, int] = {}
+        self._cond = threading.Condition()
+
+    def _acquire(self, session: str) -> PythonKernel:
+        with self._cond:
+            while session not in self._sessions and len(self._sessions) >= self.size:
+                idle = [name for name in self._sessions if not self._in_use.get(name)]
+                if idle:
+                    self._sessions.pop(idle[0]).shutdown()
+                    break
+                self._cond.wait()
+
+            if session not in self._sessions:
+                self._sessions[session] = PythonKernel(self.task_dir, self.output_dir, **self.kernel_options)
+            self._sessions.move_to_end(session)
+            self._in_use[session] = self._in_use.get(session, 0) + 1
+            return self._sessions[session]
+
+    def _release(self, session: str):
+        with self._cond:
+            self._in_use[session] -= 1
+            if not self._in_use[session]:
+                del self._in_use[session]
+            self._cond.notify_all()
+
+    def start(self, session: str = "default"):
+        """Warm up a session's worker without running anything."""
+        kernel = self._acquire(session)
+        try:
+            with kernel._lock:  # not while another thread's execute() is (re)starting it
+                kernel.start()
+        finally:
+            self._release(session)
+
+    def execute(self, code: str, session: str = "default", timeout: Optional[float] = None) -> dict:
+        """Run code in the given session's kernel (see PythonKernel.execute)."""
+        kernel = self._acquire(session)
+        try:
+            return {**kernel.execute(code, timeout), "session": session}
+        finally:
+            self._release(session)
+
+    def sessions(self) -> list[str]:
+        with self._cond:
+            return list(self._sessions)
+
+    def shutdown(self):
+        with self._cond:
+            for kernel in self._sessions.values():
+                kernel.shutdown()
+            self._sessions.clear()
+
+
+if __name__ == "__main__":
+    fd, task_dir, output_dir, max_data_mb = sys.argv[1:5]
+    serve(Connection(int(fd)), task_dir, output_dir, float(max_data_mb))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget for the CLIs and the modules batch workers import.
+
+Every agent run, batch worker and `tamarind` invocation starts a fresh
+interpreter, so import time is paid on each one. This checks two things
+against fixed budgets:
+
+- import cost: `python -X importtime -c "import <module>"`, cumulative
+  microseconds of the module itself (interpreter startup excluded)
+- CLI wall time: a full `python <script> --help`-style run in a subprocess
+
+Read-only API commands such as `tamarind --list-jobs` cannot be timed offline,
+so their entry measures every import made before the first HTTP request.
+
+Each check reports the median of several runs; the script exits non-zero if
+any median exceeds its budget (listing the slowest imports of that check) or
+a CLI run exits non-zero (showing its stderr).
+
+Usage:
+    python startup_benchmark.py                 # check budgets
+    python startup_benchmark.py --repeats 9 --output runs/startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+TASKS_DIR = Path(__file__).parent.resolve()
+WORKFLOW_DIR = TASKS_DIR / "ph_sensitive_design"
+
+# (label, modules imported, working directory, budget in ms)
+IMPORT_BUDGETS = [
+    ("import tamarind_client", ["tamarind_client"], TASKS_DIR, 60),
+    ("import agent", ["agent"], TASKS_DIR, 150),
+    ("import workflow", ["workflow"], WORKFLOW_DIR, 60),
+    ("tamarind --list-jobs (before first request)", ["tamarind_client", "requests", "dotenv"], TASKS_DIR, 250),
+]
+
+# (label, argv, working directory, budget in ms)
+CLI_BUDGETS = [
+    ("tamarind (usage)", ["tamarind_client.py"], TASKS_DIR, 300),
+    ("tamarind --help", ["tamarind_client.py", "--help"], TASKS_DIR, 300),
+    ("agent.py --help", ["agent.py", "--help"], TASKS_DIR, 400),
+    ("workflow.py --help", ["workflow.py", "--help"], WORKFLOW_DIR, 300),
+]
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) rows from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))  # nesting kept as indentation
+    return rows
+
+
+def measure_imports(modules: list[str], cwd: Path) -> tuple[float, list]:
+    """Milliseconds spent importing the given modules in a fresh interpreter."""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                          capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    # Top-level entries (no indentation) requested by the code, not site's startup imports
+    top = {name.strip(): cumulative for name, _, cumulative in rows if not name.startswith(" ")}
+    return sum(top.get(m, 0) for m in modules) / 1000, rows
+
+
+def measure_cli(argv: list[str], cwd: Path) -> tuple[float, subprocess.CompletedProcess]:
+    """Wall milliseconds of a full CLI run, and the finished process."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *argv], cwd=cwd, capture_output=True, text=True)
+    return (time.perf_counter() - start) * 1000, proc
+
+
+def slowest_imports(rows: list, n: int = 8) -> list[str]:
+    ranked = sorted(rows, key=lambda r: r[1], reverse=True)[:n]
+    return [f"{name.strip()} {self_us / 1000:.1f} ms" for name, self_us, _ in ranked]
+
+
+def run_checks(repeats: int) -> list[dict]:
+    results = []
+    for label, modules, cwd, budget in IMPORT_BUDGETS:
+        samples, rows = [], []
+        for _ in range(repeats):
+            ms, rows = measure_imports(modules, cwd)
+            samples.append(ms)
+        results.append({"check": label, "kind": "import", "median_ms": statistics.median(samples),
+                        "budget_ms": budget, "slowest": slowest_imports(rows)})
+    for label, argv, cwd, budget in CLI_BUDGETS:
+        samples, error = [], None
+        for _ in range(repeats):
+            ms, proc = measure_cli(argv, cwd)
+            if proc.returncode != 0:
+                # A crash (e.g. on import) would otherwise pass, and may even look fast
+                error = f"exit {proc.returncode}: {proc.stderr.strip()[-2000:]}"
+                break
+            samples.append(ms)
+        results.append({"check": label, "kind": "cli", "median_ms": statistics.median(samples) if samples else None,
+                        "budget_ms": budget, "error": error})
+    return results
+
+
+def main():
+    p = argparse.ArgumentParser(description="Check import-time and CLI startup budgets")
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--output", help="Write results as JSON")
+    args = p.parse_args()
+
+    results = run_checks(args.repeats)
+    failed = [r for r in results if r.get("error")]
+    over = [r for r in results if not r.get("error") and r["median_ms"] > r["budget_ms"]]
+    width = max(len(r["check"]) for r in results)
+    for r in results:
+        if r in failed:
+            print(f"  {r['check']:<{width}}  {'':>7}    (budget {r['budget_ms']} ms)  FAILED")
+            print("      " + r["error"].replace("\n", "\n      "))
+            continue
+        flag = "OVER" if r in over else "ok"
+        print(f"  {r['check']:<{width}}  {r['median_ms']:7.1f} ms  (budget {r['budget_ms']} ms)  {flag}")
+        if r in over and r.get("slowest"):
+            print("      slowest imports: " + ", ".join(r["slowest"]))
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+    if over or failed:
+        print(f"\n{len(over)} check(s) over budget, {len(failed)} failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
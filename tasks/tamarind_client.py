@@ -10,13 +10,209 @@ API Documentation: https://app.tamarind.bio/api-docs/
 import os
 import time
 import json
+import uuid
 import zipfile
+import threading
+import contextvars
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, TYPE_CHECKING
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
-from dotenv import load_dotenv
+# requests (~0.1 s) and dotenv are imported on first use, so the CLI's usage
+# and --help output and modules that only need the constants stay fast
+if TYPE_CHECKING:
+    import requests
+
+COMPLETE_STATUSES = ("complete", "completed", "done", "finished", "success")
+FAILED_STATUSES = ("failed", "error", "cancelled")
+DOWNLOAD_CHUNK = 256 * 1024
+
+
+def job_name_of(job: dict) -> Optional[str]:
+    """Job name from a jobs listing entry (API uses JobName; tolerate other casings)."""
+    return job.get("JobName") or job.get("jobName") or job.get("name")
+
+
+def job_status_of(job: dict) -> str:
+    """Lowercased job status from a jobs listing entry."""
+    return (job.get("JobStatus") or job.get("status") or "").lower()
+
+
+# =============================================================================
+# Settings Validation
+# =============================================================================
+
+TRUE_WORDS = ("true", "yes", "y", "1", "on")
+FALSE_WORDS = ("false", "no", "n", "0", "off")
+
+
+class SettingsError(ValueError):
+    """Settings that do not match the tool's spec; `problems` lists every issue found."""
+    
+    def __init__(self, tool: str, problems: list[str]):
+        self.tool = tool
+        self.problems = problems
+        super().__init__(f"Invalid settings for {tool}: " + "; ".join(problems))
+
+
+def _to_number(value):
+    """int or float; numeric text keeps its integer-ness ("20" -> 20, "0.1" -> 0.1)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"expected a number, got {value!r}")
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    try:
+        return float(value) if isinstance(value, str) else value
+    except ValueError:
+        raise ValueError(f"expected a number, got {value!r}") from None
+
+
+def _to_int(value):
+    number = _to_number(value)
+    if isinstance(number, float):
+        if not number.is_integer():
+            raise ValueError(f"expected an integer, got {value!r}")
+        return int(number)
+    return number
+
+
+def _to_float(value):
+    return float(_to_number(value))
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    word = str(value).strip().lower()
+    if word in TRUE_WORDS:
+        return True
+    if word in FALSE_WORDS:
+        return False
+    raise ValueError(f"expected true/false, got {value!r}")
+
+
+def _to_list(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return [value]
+
+
+def _to_str(value):
+    if isinstance(value, (dict, list, bool)) or value is None:
+        raise ValueError(f"expected text, got {type(value).__name__}")
+    return str(value)
+
+
+# Spec "type" values (lowercased) -> coercion; unlisted types are passed through unchanged
+COERCERS = {
+    "int": _to_int, "integer": _to_int,
+    "number": _to_number, "float": _to_float, "double": _to_float,
+    "bool": _to_bool, "boolean": _to_bool, "checkbox": _to_bool,
+    "list": _to_list, "array": _to_list, "multiselect": _to_list,
+    "string": _to_str, "str": _to_str, "text": _to_str, "sequence": _to_str,
+}
+CHOICE_KEYS = ("options", "choices", "enum", "values")
+
+
+class SettingsValidator:
+    """
+    Checks and coerces settings against one tool's `settings` spec (from get_tools).
+    
+    The spec is compiled once into per-setting coercion functions, so validation
+    is a dictionary walk:
+    - numbers and booleans given as text are converted ("20" -> 20, "true" -> True)
+    - values of settings with options must be one of them (matched case-insensitively)
+    - min/max bounds are enforced when the spec has them
+    - keys differing from a setting only in case are renamed
+    - missing required settings and bad values are errors
+    - unknown keys are passed through with a warning (the spec can lag behind
+      what the API accepts), or are errors with strict=True; both with suggestions
+    
+    Usage:
+        validator = client.get_validator("proteinmpnn")
+        settings = validator.validate({"pdbFile": "x.pdb", "numSequences": "20"})
+    """
+    
+    def __init__(self, tool: str, spec: list[dict]):
+        self.tool = tool
+        self.fields: dict[str, tuple] = {}
+        self.required: list[str] = []
+        for field in spec or []:
+            name = field.get("name")
+            if not name:
+                continue
+            kind = str(field.get("type") or "").lower()
+            options = next((field[k] for k in CHOICE_KEYS if isinstance(field.get(k), list)), None)
+            if options is not None:
+                values = [o.get("value", o.get("name")) if isinstance(o, dict) else o for o in options]
+                options = {str(v).lower(): v for v in values}
+            coerce = COERCERS.get(kind)
+            if coerce is None and options is not None and kind not in ("list", "array", "multiselect"):
+                coerce = lambda value: value
+            self.fields[name] = (coerce, options, field.get("min"), field.get("max"))
+            if field.get("required") and field.get("default") is None:
+                self.required.append(name)
+        self._folded = {name.lower(): name for name in self.fields}
+    
+    def _check(self, name: str, value):
+        coerce, options, low, high = self.fields[name]
+        if coerce is not None:
+            value = coerce(value)
+        if options is not None:
+            picks = value if isinstance(value, list) else [value]
+            unknown = [v for v in picks if str(v).lower() not in options]
+            if unknown:
+                raise ValueError(f"{unknown[0]!r} is not one of {sorted(map(str, options.values()))}")
+            picks = [options[str(v).lower()] for v in picks]
+            value = picks if isinstance(value, list) else picks[0]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if low is not None and value < low:
+                raise ValueError(f"{value} is below the minimum {low}")
+            if high is not None and value > high:
+                raise ValueError(f"{value} is above the maximum {high}")
+        return value
+    
+    def validate(self, settings: dict, strict: bool = False) -> dict:
+        """
+        Coerced copy of `settings`.
+        
+        Args:
+            strict: Reject keys missing from the spec instead of passing them through
+        
+        Raises:
+            SettingsError: Listing every missing or invalid setting (and unknown ones when strict).
+        """
+        import difflib
+        
+        clean, given, problems = {}, set(), []
+        for key, value in settings.items():
+            name = key if key in self.fields else self._folded.get(str(key).lower())
+            if name is None:
+                close = difflib.get_close_matches(str(key), list(self.fields), n=1)
+                problem = f"unknown setting '{key}'" + (f" (did you mean '{close[0]}'?)" if close else "")
+                if strict:
+                    problems.append(problem)
+                else:
+                    print(f"Warning: {self.tool}: {problem}; sent unchanged")
+                    clean[key] = value
+                continue
+            given.add(name)
+            try:
+                clean[name] = self._check(name, value)
+            except (TypeError, ValueError) as e:
+                problems.append(f"'{name}': {e}")
+        missing = [name for name in self.required if name not in given or clean.get(name, 0) in (None, "")]
+        if missing:
+            problems.append("missing required " + ", ".join(f"'{m}'" for m in missing))
+        if problems:
+            raise SettingsError(self.tool, problems)
+        return clean
 
 
 class TamarindClient:
@@ -24,13 +220,19 @@ class TamarindClient:
     
     BASE_URL = "https://app.tamarind.bio/api/"
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, pool_size: int = 16, strict_settings: bool = False):
         """
         Initialize the Tamarind client.
         
         Args:
             api_key: Tamarind API key. If not provided, loads from TAMARIND_API_KEY env var.
+            pool_size: Connections kept open per host; every request (including
+                concurrent ones from JobManager and the bulk CLI commands) reuses them.
+            strict_settings: Reject settings missing from a tool's spec when validating
+                (default: warn and submit them as given)
         """
+        from dotenv import load_dotenv
+
         # Load .env from current directory or tasks directory
         load_dotenv()
         load_dotenv(Path(__file__).parent / ".env")
@@ -44,6 +246,26 @@ class TamarindClient:
         
         self._headers = {"x-api-key": self.api_key}
         self._tools_cache: Optional[list] = None
+        self._validators: dict[str, SettingsValidator] = {}
+        self.pool_size = pool_size
+        self.strict_settings = strict_settings
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self) -> "requests.Session":
+        """Shared keep-alive session, created on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
     
     def _request(
         self, 
@@ -52,10 +274,10 @@ class TamarindClient:
         params: Optional[dict] = None,
         json_data: Optional[dict] = None,
         files: Optional[dict] = None
-    ) -> requests.Response:
+    ) -> "requests.Response":
         """Make an authenticated request to the API."""
         url = f"{self.BASE_URL}{endpoint}"
-        response = requests.request(
+        response = self.session.request(
             method,
             url,
             headers=self._headers,
@@ -85,6 +307,7 @@ class TamarindClient:
         response = self._request("GET", "tools")
         response.raise_for_status()
         self._tools_cache = response.json()
+        self._validators = {}
         return self._tools_cache
     
     def get_tool_spec(self, name: str) -> Optional[dict]:
@@ -103,6 +326,38 @@ class TamarindClient:
                 return tool
         return None
     
+    def get_validator(self, name: str) -> SettingsValidator:
+        """
+        Settings validator for a tool, compiled from its spec on first use.
+        
+        Raises:
+            SettingsError: If the tool does not exist.
+        """
+        validator = self._validators.get(name)
+        if validator is None:
+            spec = self.get_tool_spec(name)
+            if spec is None:
+                import difflib
+                close = difflib.get_close_matches(str(name), self.list_tool_names(), n=3)
+                hint = f" (did you mean {', '.join(close)}?)" if close else ""
+                raise SettingsError(str(name), [f"unknown tool{hint}"])
+            validator = self._validators[name] = SettingsValidator(name, spec.get("settings", []))
+        return validator
+    
+    def validate_settings(self, tool: str, settings: dict, strict: Optional[bool] = None) -> dict:
+        """
+        Check settings against the tool's spec before submitting; returns the
+        coerced settings (see SettingsValidator).
+        
+        Args:
+            strict: Reject unknown keys (default: the client's strict_settings)
+        
+        Raises:
+            SettingsError: Listing every problem found.
+        """
+        strict = self.strict_settings if strict is None else strict
+        return self.get_validator(tool).validate(settings, strict=strict)
+    
     def list_tool_names(self) -> list[str]:
         """Get list of all available tool names."""
         return [t.get("name") for t in self.get_tools() if t.get("name")]
@@ -134,7 +389,8 @@ class TamarindClient:
         tool: str, 
         settings: dict, 
         job_name: Optional[str] = None,
-        job_email: Optional[str] = None
+        job_email: Optional[str] = None,
+        validate: bool = True
     ) -> dict:
         """
         Submit a job asynchronously (returns immediately with job info).
@@ -144,10 +400,16 @@ class TamarindClient:
             settings: Tool-specific settings dict
             job_name: Optional custom job name
             job_email: Optional email for notifications
+            validate: Check and coerce settings against the tool spec first
             
         Returns:
             Dict with job metadata including jobName, status, etc.
+            
+        Raises:
+            SettingsError: If validation finds a problem (nothing is submitted).
         """
+        if validate:
+            settings = self.validate_settings(tool, settings)
         if job_name is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             job_name = f"{tool}_{timestamp}"
@@ -184,7 +446,8 @@ class TamarindClient:
         settings: dict, 
         job_name: Optional[str] = None,
         timeout: int = 600,
-        poll_interval: int = 10
+        poll_interval: int = 10,
+        validate: bool = True
     ) -> dict:
         """
         Submit a job and wait for completion.
@@ -195,30 +458,47 @@ class TamarindClient:
             job_name: Optional custom job name
             timeout: Max seconds to wait for completion
             poll_interval: Seconds between status checks
+            validate: Check and coerce settings against the tool spec first
             
         Returns:
             Dict with job info and final status.
             
         Raises:
+            SettingsError: If validation finds a problem (nothing is submitted).
             TimeoutError: If job doesn't complete within timeout.
         """
-        job_info = self.submit_job_async(tool, settings, job_name)
+        job_info = self.submit_job_async(tool, settings, job_name, validate=validate)
         actual_job_name = job_info["job_name"]
         
         result = self.wait_for_job(actual_job_name, timeout, poll_interval)
         job_info["final_status"] = result
         return job_info
     
-    def submit_batch(self, jobs: list[dict]) -> list[dict]:
+    def submit_batch(self, jobs: list[dict], validate: bool = True) -> list[dict]:
         """
         Submit multiple jobs at once.
         
         Args:
             jobs: List of job dicts, each with 'tool', 'settings', optional 'job_name'
+            validate: Check every job's settings first; any problem rejects the whole batch
             
         Returns:
             List of job submission results.
+            
+        Raises:
+            SettingsError: Listing the problems of every invalid job (nothing is submitted).
         """
+        if validate:
+            checked, problems = [], []
+            for i, job in enumerate(jobs):
+                try:
+                    checked.append({**job, "settings": self.validate_settings(job["tool"], job.get("settings", {}))})
+                except SettingsError as e:
+                    label = job.get("job_name") or f"job {i}"
+                    problems += [f"{label} ({e.tool}): {p}" for p in e.problems]
+            if problems:
+                raise SettingsError("batch", problems)
+            jobs = checked
         response = self._request("POST", "submit-batch", json_data={"jobs": jobs})
         response.raise_for_status()
         return response.json()
@@ -231,16 +511,32 @@ class TamarindClient:
         """
         Get list of all jobs in your account.
         
+        The listing is paged: each response's startKey cursor is sent back
+        until the API stops returning one.
+        
         Returns:
             List of job info dicts.
         """
-        response = self._request("GET", "jobs")
-        response.raise_for_status()
-        data = response.json()
-        # API returns {"jobs": [...], "startKey": ..., "statuses": ...}
-        if isinstance(data, dict) and "jobs" in data:
-            return data["jobs"]
-        return data if isinstance(data, list) else []
+        jobs, start_key, seen = [], None, set()
+        while True:
+            params = None
+            if start_key:
+                params = {"startKey": start_key if isinstance(start_key, str) else json.dumps(start_key)}
+            response = self._request("GET", "jobs", params=params)
+            response.raise_for_status()
+            data = response.json()
+            # API returns {"jobs": [...], "startKey": ..., "statuses": ...}
+            if not (isinstance(data, dict) and "jobs" in data):
+                return jobs + (data if isinstance(data, list) else [])
+            jobs.extend(data["jobs"])
+            start_key = data.get("startKey")
+            if not start_key or not data["jobs"]:
+                return jobs
+            cursor = json.dumps(start_key, sort_keys=True, default=str)
+            if cursor in seen:
+                print(f"Warning: job listing returned startKey {cursor} twice; stopping at {len(jobs)} jobs")
+                return jobs
+            seen.add(cursor)
     
     def get_job_status(self, job_name: str) -> Optional[dict]:
         """
@@ -254,8 +550,7 @@ class TamarindClient:
         """
         jobs = self.get_jobs()
         for job in jobs:
-            name = job.get("JobName") or job.get("jobName") or job.get("name")
-            if name == job_name:
+            if job_name_of(job) == job_name:
                 return job
         return None
     
@@ -291,11 +586,11 @@ class TamarindClient:
                 continue
             
             # Handle both capitalized (API) and lowercase field names
-            job_status = (status.get("JobStatus") or status.get("status") or "").lower()
+            job_status = job_status_of(status)
             
-            if job_status in ("complete", "completed", "done", "finished", "success"):
+            if job_status in COMPLETE_STATUSES:
                 return status
-            elif job_status in ("failed", "error", "cancelled"):
+            elif job_status in FAILED_STATUSES:
                 return status
             
             print(f"Job '{job_name}' status: {job_status}. Waiting...")
@@ -325,15 +620,23 @@ class TamarindClient:
         self, 
         job_name: str, 
         output_dir: str = "./tmp",
-        extract: bool = True
+        extract: bool = True,
+        on_chunk: Optional[Callable[[int, Optional[int]], None]] = None
     ) -> Path:
         """
         Download job results to local directory.
         
+        The bundle is streamed to disk in chunks (never held in memory) under a
+        .part name and renamed when complete, so an interrupted download never
+        leaves a truncated zip behind.
+        
         Args:
             job_name: Name of the job
             output_dir: Directory to save results (created if doesn't exist)
             extract: If True, extract zip contents
+            on_chunk: Called as on_chunk(0, total_bytes) once the response starts
+                (total is None if unknown), then on_chunk(n, total) after each chunk
+                written; it may block (bandwidth limits) or raise to abort.
             
         Returns:
             Path to downloaded file or extracted directory.
@@ -348,14 +651,25 @@ class TamarindClient:
         # Response contains a URL to download from
         download_url = response.text.replace('"', '')
         
-        # Download the actual file
-        download_response = requests.get(download_url)
-        download_response.raise_for_status()
-        
-        # Save the zip file
+        # Download the actual file (presigned URL, so no API key header)
         zip_path = output_path / f"{job_name}.zip"
-        with open(zip_path, "wb") as f:
-            f.write(download_response.content)
+        part_path = zip_path.with_name(zip_path.name + ".part")
+        try:
+            with self.session.get(download_url, stream=True) as download_response:
+                download_response.raise_for_status()
+                length = download_response.headers.get("Content-Length")
+                total = int(length) if length and length.isdigit() else None
+                if on_chunk:
+                    on_chunk(0, total)
+                with open(part_path, "wb") as f:
+                    for chunk in download_response.iter_content(DOWNLOAD_CHUNK):
+                        f.write(chunk)
+                        if on_chunk:
+                            on_chunk(len(chunk), total)
+            os.replace(part_path, zip_path)
+        finally:
+            if part_path.exists():
+                part_path.unlink()
         
         if extract:
             extract_path = output_path / job_name
@@ -391,7 +705,7 @@ class TamarindClient:
         filename = filepath.name
         
         with open(filepath, "rb") as f:
-            response = requests.put(
+            response = self.session.put(
                 f"{self.BASE_URL}upload/{filename}",
                 headers=self._headers,
                 data=f.read()
@@ -453,6 +767,1006 @@ class TamarindClient:
         return "\n".join(lines)
 
 
+# =============================================================================
+# Background Job Tracking
+# =============================================================================
+
+class JobManager:
+    """
+    Track many asynchronous jobs without blocking the caller.
+    
+    Jobs are submitted concurrently; a background thread polls the job listing
+    once per tick for all tracked jobs and downloads results as jobs complete.
+    With dedupe=True, submitting the same tool and settings again returns the
+    existing job instead of a new one (useful when several agents share a manager).
+    With missing_polls=N, a job still absent from the listing after N polls is
+    marked failed instead of being waited on until the collect() timeout.
+    With poll=False no background thread is started (submit-only use); call
+    refresh() to update statuses.
+    
+    Usage:
+        manager = JobManager(client, download_dir="results")
+        names = manager.submit_many([{"tool": "esmfold", "settings": {"sequence": s}} for s in seqs])
+        ...                                   # do other work
+        manager.status()                      # current state of every job
+        manager.collect(wait=True)            # downloaded result paths
+    """
+    
+    def __init__(
+        self, 
+        client: TamarindClient, 
+        download_dir: Optional[str] = None,
+        poll_interval: int = 10,
+        max_workers: int = 8,
+        dedupe: bool = False,
+        missing_polls: Optional[int] = None,
+        poll: bool = True
+    ):
+        self.client = client
+        self.download_dir = Path(download_dir) if download_dir else None
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self.dedupe = dedupe
+        self.missing_polls = missing_polls
+        self.poll = poll
+        self._jobs: dict[str, dict] = {}
+        self._missing: dict[str, int] = {}  # job name -> consecutive polls absent from the listing
+        self._by_request: dict[str, str] = {}  # (tool, settings) key -> job name, when deduping
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def unique_job_name(tool: str) -> str:
+        """Timestamped job name that stays unique across concurrent submissions."""
+        return f"{tool}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    
+    def submit(self, tool: str, settings: dict, job_name: Optional[str] = None, validate: bool = True) -> dict:
+        """
+        Submit one job and start tracking it. Returns its tracking record.
+        
+        validate=False skips the local settings check (settings already validated by the caller).
+        """
+        job_name = job_name or self.unique_job_name(tool)
+        record = {
+            "job_name": job_name, "tool": tool, "status": "submitting",
+            "submitted_at": datetime.now().isoformat(), "result_path": None, "error": None
+        }
+        try:
+            if validate:
+                settings = self.client.validate_settings(tool, settings)
+        except Exception as e:  # SettingsError, or the tool listing could not be fetched
+            record.update(status="failed", error=str(e))
+            with self._lock:
+                self._jobs[job_name] = record
+            return dict(record)
+        key = json.dumps([tool, settings], sort_keys=True, default=str)
+        with self._lock:
+            if self.dedupe and key in self._by_request:
+                existing = self._jobs[self._by_request[key]]
+                if not (existing["error"] or existing["status"] in FAILED_STATUSES):
+                    return {**existing, "deduplicated": True}
+            self._jobs[job_name] = record
+            if self.dedupe:
+                self._by_request[key] = job_name
+        try:
+            self.client.submit_job_async(tool, settings, job_name, validate=False)
+            record["status"] = "submitted"
+        except Exception as e:
+            record.update(status="failed", error=f"Submission failed: {e}")
+        self._ensure_poller()
+        return dict(record)
+    
+    def submit_many(self, jobs: list[dict], validate: bool = True) -> list[dict]:
+        """
+        Submit several jobs concurrently.
+        
+        Args:
+            jobs: List of dicts with 'tool', 'settings' and optional 'job_name'
+            validate: Check settings locally before each submission (see submit())
+            
+        Returns:
+            Tracking records in the same order as `jobs`.
+        """
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            return list(pool.map(
+                lambda j: self.submit(j["tool"], j.get("settings", {}), j.get("job_name"), validate), jobs
+            ))
+    
+    def track(self, job_name: str, tool: str = "") -> dict:
+        """Track a job that was submitted elsewhere (e.g. restored from a checkpoint)."""
+        with self._lock:
+            record = self._jobs.setdefault(job_name, {
+                "job_name": job_name, "tool": tool, "status": "submitted",
+                "submitted_at": None, "result_path": None, "error": None
+            })
+        self._ensure_poller()
+        return dict(record)
+    
+    def restore(self, records: list[dict]):
+        """Resume tracking records saved from status() (e.g. in a checkpoint); unfinished jobs are polled again."""
+        with self._lock:
+            for record in records:
+                if "tool" in record:
+                    self._jobs[record["job_name"]] = dict(record)
+        if self._pending():
+            self._ensure_poller()
+    
+    # -------------------------------------------------------------------------
+    # Polling
+    # -------------------------------------------------------------------------
+    
+    def _pending(self) -> list[dict]:
+        with self._lock:
+            return [r for r in self._jobs.values() if not self._is_finished(r)]
+    
+    def _is_finished(self, record: dict) -> bool:
+        if record["status"] in FAILED_STATUSES or record["error"]:
+            return True
+        if record["status"] in COMPLETE_STATUSES:
+            return self.download_dir is None or record["result_path"] is not None
+        return False
+    
+    def _ensure_poller(self):
+        if not self.poll:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                # The poller runs in a copy of the starting caller's context (e.g. its session output)
+                self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._poll_loop,),
+                                                name="tamarind-jobs", daemon=True)
+                self._thread.start()
+    
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            if self._pending():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Job polling failed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+    
+    def refresh(self):
+        """Poll the job listing once and update every tracked job; download finished results."""
+        listing = {job_name_of(j): j for j in self.client.get_jobs()}
+        to_download = []
+        with self._lock:
+            for name, record in self._jobs.items():
+                job = listing.get(name)
+                if job is not None and not record["error"]:
+                    record["status"] = job_status_of(job) or record["status"]
+                    self._missing.pop(name, None)
+                elif job is None and self.missing_polls and not self._is_finished(record):
+                    self._missing[name] = self._missing.get(name, 0) + 1
+                    if self._missing[name] >= self.missing_polls:
+                        record["error"] = f"Job not in the job listing after {self._missing[name]} polls"
+                if (self.download_dir is not None and record["status"] in COMPLETE_STATUSES
+                        and record["result_path"] is None and not record["error"]):
+                    to_download.append(name)
+        
+        if to_download:
+            downloads = DownloadManager(self.client, self.download_dir, self.max_workers, min_free=0, retries=0)
+            for result in downloads.download(to_download):
+                with self._lock:
+                    if result["error"]:
+                        self._jobs[result["job_name"]]["error"] = f"Download failed: {result['error']}"
+                    else:
+                        self._jobs[result["job_name"]]["result_path"] = result["path"]
+    
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    
+    def status(self, job_names: Optional[list[str]] = None) -> list[dict]:
+        """Tracking records for the given jobs (default: all tracked jobs)."""
+        with self._lock:
+            names = job_names if job_names is not None else list(self._jobs)
+            return [dict(self._jobs[n]) if n in self._jobs else 
+                    {"job_name": n, "status": "unknown", "error": "Job is not tracked"} for n in names]
+    
+    def collect(
+        self, 
+        job_names: Optional[list[str]] = None, 
+        wait: bool = False, 
+        timeout: float = 600
+    ) -> list[dict]:
+        """
+        Return records of finished jobs, optionally waiting for all of them.
+        
+        Args:
+            job_names: Jobs to collect (default: all tracked jobs)
+            wait: If True, block until every requested job finished or timeout expires
+            timeout: Max seconds to wait
+        """
+        deadline = time.time() + timeout
+        while True:
+            records = self.status(job_names)
+            if not wait or all(self._is_finished(r) for r in records if "tool" in r):
+                return records
+            if time.time() > deadline:
+                return records
+            self._wake.set()  # poll now rather than at the next tick
+            time.sleep(min(self.poll_interval, max(deadline - time.time(), 0)))
+    
+    def shutdown(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+# =============================================================================
+# Bulk Downloads
+# =============================================================================
+
+DOWNLOAD_MARKER = ".tamarind_download.json"
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text) -> Optional[int]:
+    """Byte count from '500K', '10M', '2G' or a plain number (None/'' -> None)."""
+    if text in (None, ""):
+        return None
+    text = str(text).strip().upper().removesuffix("IB").removesuffix("B")
+    unit = text[-1] if text[-1:].isalpha() else ""
+    if unit not in SIZE_UNITS:
+        raise ValueError(f"Unknown size unit in {text!r}; use K, M, G or T")
+    return int(float(text[:len(text) - len(unit)]) * SIZE_UNITS[unit])
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+class DiskSpaceError(OSError):
+    """Not enough free space to store a download (and its extracted copy)."""
+
+
+class TokenBucket:
+    """
+    Rate limit shared by worker threads: `rate` units per second with a burst
+    of one second (bytes for download bandwidth, requests for bulk deletes).
+    """
+    
+    def __init__(self, rate: float):
+        self.rate = float(rate)
+        self._tokens = self.rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, n: int = 1):
+        """Consume n units of budget, sleeping while the bucket is in debt."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate) - n
+            self._last = now
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class DownloadManager:
+    """
+    Download many jobs' result bundles in parallel.
+    
+    - a worker pool shares the client's connection pool
+    - an optional global bandwidth cap throttles all workers together
+    - before each bundle is written, free disk space must cover it (twice when
+      extracting) plus every in-flight download and a reserve (min_free)
+    - bundles already downloaded are skipped: extracted directories carry a
+      completion marker, and zips only appear once fully written
+    - progress (jobs, bytes, rate) is reported every progress_interval seconds
+    
+    Usage:
+        manager = DownloadManager(client, "results", max_workers=8, bandwidth="20M", min_free="2G")
+        records = manager.download(job_names)
+        print(manager.report())
+    """
+    
+    def __init__(
+        self,
+        client: TamarindClient,
+        output_dir="results",
+        max_workers: int = 8,
+        bandwidth=None,
+        min_free="1G",
+        extract: bool = True,
+        skip_existing: bool = True,
+        retries: int = 2,
+        progress: Optional[Callable[[dict], None]] = None,
+        progress_interval: float = 2.0
+    ):
+        """
+        Args:
+            client: Tamarind client (its session is shared by all workers)
+            output_dir: Directory receiving <job>/ (extracted) or <job>.zip
+            max_workers: Parallel downloads
+            bandwidth: Global cap in bytes/s, e.g. 20_000_000 or "20M" (None = unlimited)
+            min_free: Free space to leave on the output filesystem, e.g. "1G"
+            extract: Extract bundles (as download_results does)
+            skip_existing: Skip jobs whose results are already complete locally
+            retries: Extra attempts per job after a failed download
+            progress: Called with stats() every progress_interval seconds while downloading
+        """
+        self.client = client
+        self.output_dir = Path(output_dir)
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(parse_size(bandwidth)) if bandwidth else None
+        self.min_free = parse_size(min_free) or 0
+        self.extract = extract
+        self.skip_existing = skip_existing
+        self.retries = retries
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._reserved = 0
+        self._stats = {}
+    
+    def existing(self, job_name: str) -> Optional[Path]:
+        """Local result of a job if a previous download completed."""
+        extracted = self.output_dir / job_name
+        if (extracted / DOWNLOAD_MARKER).exists():
+            return extracted
+        zipped = self.output_dir / f"{job_name}.zip"
+        if not self.extract and zipped.exists():
+            return zipped
+        return None
+    
+    def _check_space(self, total: Optional[int]) -> int:
+        """Reserve room for a bundle of `total` bytes or raise DiskSpaceError."""
+        import shutil
+        
+        need = (total or 0) * (2 if self.extract else 1)
+        with self._lock:
+            free = shutil.disk_usage(self.output_dir).free
+            if free - self._reserved - need < self.min_free:
+                raise DiskSpaceError(
+                    f"Need {format_bytes(need)} plus {format_bytes(self.min_free)} reserve, "
+                    f"but only {format_bytes(free - self._reserved)} is free in {self.output_dir}"
+                )
+            self._reserved += need
+        return need
+    
+    def _fetch(self, job_name: str) -> dict:
+        start = time.time()
+        record = {"job_name": job_name, "status": "downloaded", "path": None, "bytes": 0, "error": None}
+        if self.skip_existing and (path := self.existing(job_name)) is not None:
+            with self._lock:
+                self._stats["skipped"] += 1
+            return {**record, "status": "skipped", "path": str(path), "seconds": 0.0}
+        
+        for attempt in range(self.retries + 1):
+            reserved, received = 0, 0
+            
+            def on_chunk(n, total):
+                nonlocal reserved, received
+                if n == 0:
+                    reserved = self._check_space(total)
+                    return
+                if self.limiter:
+                    self.limiter.acquire(n)
+                received += n
+                with self._lock:
+                    self._stats["bytes"] += n
+            
+            try:
+                path = self.client.download_results(job_name, str(self.output_dir), self.extract, on_chunk)
+                if path.is_dir():
+                    (path / DOWNLOAD_MARKER).write_text(json.dumps({
+                        "job_name": job_name, "bytes": received, "downloaded_at": datetime.now().isoformat()
+                    }))
+                record.update(path=str(path), bytes=received, error=None)
+                break
+            except DiskSpaceError as e:
+                record.update(status="failed", error=str(e))
+                break
+            except Exception as e:
+                record.update(status="failed", error=f"{type(e).__name__}: {e}")
+                if attempt < self.retries:
+                    time.sleep(2 ** attempt)
+            finally:
+                with self._lock:
+                    self._reserved -= reserved
+        
+        with self._lock:
+            self._stats["failed" if record["error"] else "done"] += 1
+        record["status"] = "failed" if record["error"] else "downloaded"
+        return {**record, "seconds": time.time() - start}
+    
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        elapsed = max(time.time() - s["started"], 1e-9)
+        return {**s, "elapsed": elapsed, "rate": s["bytes"] / elapsed}
+    
+    def report(self) -> str:
+        s = self.stats()
+        finished = s["done"] + s["skipped"] + s["failed"]
+        return (f"{finished}/{s['total']} jobs ({s['done']} downloaded, {s['skipped']} skipped, "
+                f"{s['failed']} failed), {format_bytes(s['bytes'])} at {format_bytes(s['rate'])}/s")
+    
+    def download(self, job_names: list[str]) -> list[dict]:
+        """Download results of every job; returns one record per job in input order."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._stats = {"total": len(job_names), "done": 0, "skipped": 0, "failed": 0, "bytes": 0,
+                       "started": time.time()}
+        finished = threading.Event()
+        
+        def report_loop():
+            while not finished.wait(self.progress_interval):
+                self.progress(self.stats())
+        
+        reporter = threading.Thread(target=report_loop, daemon=True) if self.progress else None
+        if reporter:
+            reporter.start()
+        try:
+            with ThreadPoolExecutor(self.max_workers) as pool:
+                return list(pool.map(self._fetch, job_names))
+        finally:
+            finished.set()
+            if reporter:
+                reporter.join()
+                self.progress(self.stats())
+
+
+# =============================================================================
+# Retention Cleanup
+# =============================================================================
+
+# Listing fields that may carry an entry's creation time, in order of preference
+TIME_FIELDS = ("Created", "created", "createdAt", "CreatedAt", "dateCreated", "Date", "date",
+               "uploadedAt", "lastModified", "LastModified", "timestamp")
+AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_age(text) -> Optional[float]:
+    """Seconds from '90m', '12h', '30d', '2w' or a plain number of days (None/'' -> None)."""
+    if text in (None, ""):
+        return None
+    text = str(text).strip().lower()
+    if text[-1:] in AGE_UNITS:
+        return float(text[:-1]) * AGE_UNITS[text[-1]]
+    return float(text) * AGE_UNITS["d"]
+
+
+def created_at(entry) -> Optional[datetime]:
+    """Creation time of a job or file listing entry (ISO text or epoch s/ms), None if absent."""
+    if not isinstance(entry, dict):
+        return None
+    for field in TIME_FIELDS:
+        value = entry.get(field)
+        if value in (None, ""):
+            continue
+        try:
+            if isinstance(value, (int, float)) or str(value).replace(".", "", 1).isdigit():
+                value = float(value)
+                return datetime.fromtimestamp(value / 1000 if value > 1e11 else value)
+            stamp = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+            # Compare in local time, like the naive timestamps the API may return
+            return stamp.astimezone().replace(tzinfo=None) if stamp.tzinfo else stamp
+        except (ValueError, OverflowError, OSError):
+            continue
+    return None
+
+
+def file_name_of(entry) -> Optional[str]:
+    """File name from a files listing entry (plain names or dicts)."""
+    if isinstance(entry, str):
+        return entry
+    return entry.get("name") or entry.get("filename") or entry.get("fileName") or entry.get("key")
+
+
+class RetentionPolicy:
+    """
+    Which jobs and uploaded files to delete. An entry is selected only if it
+    matches every criterion given:
+    - older_than: created more than this many seconds ago (entries without a
+      timestamp are never selected by age)
+    - statuses: job status in this list (complete/failed cover all spellings);
+      without it, jobs still queued or running are kept unless include_active is set
+    - patterns: name matches one of these globs
+    - exclude: name matches none of these globs
+    
+    Usage:
+        policy = RetentionPolicy(older_than=parse_age("30d"), statuses=["complete", "failed"])
+        plan = plan_cleanup(policy, jobs=client.get_jobs())
+    """
+    
+    def __init__(
+        self,
+        older_than: Optional[float] = None,
+        statuses: Optional[list[str]] = None,
+        patterns: Optional[list[str]] = None,
+        exclude: Optional[list[str]] = None,
+        include_active: bool = False
+    ):
+        if older_than is None and not statuses and not patterns:
+            raise ValueError("A retention policy needs at least one of older_than, statuses or patterns")
+        self.older_than = older_than
+        self.statuses = statuses or []
+        self.patterns = patterns or []
+        self.exclude = exclude or []
+        self.include_active = include_active
+    
+    def reason(self, name: Optional[str], created: Optional[datetime], now: datetime,
+               status: Optional[str] = None) -> Optional[str]:
+        """Why an entry should be deleted, or None to keep it."""
+        from fnmatch import fnmatchcase
+        
+        if not name or any(fnmatchcase(name, p) for p in self.exclude):
+            return None
+        reasons = []
+        if status is not None:
+            if self.statuses:
+                if not any(status_matches(status, wanted) for wanted in self.statuses):
+                    return None
+                reasons.append(f"status {status}")
+            elif status not in COMPLETE_STATUSES + FAILED_STATUSES and not self.include_active:
+                return None
+        elif self.statuses:
+            return None  # files have no status
+        if self.older_than is not None:
+            if created is None or (now - created).total_seconds() < self.older_than:
+                return None
+            reasons.append(f"{(now - created).total_seconds() / 86400:.1f} days old")
+        if self.patterns:
+            if not any(fnmatchcase(name, p) for p in self.patterns):
+                return None
+            reasons.append("name matches")
+        return ", ".join(reasons)
+
+
+def plan_cleanup(
+    policy: RetentionPolicy,
+    jobs: Optional[list[dict]] = None,
+    files: Optional[list] = None,
+    now: Optional[datetime] = None
+) -> list[dict]:
+    """
+    Deletion set from one jobs listing and/or one files listing.
+    
+    Returns:
+        One record per entry to delete: kind ('job'/'file'), name, status,
+        type, created (ISO or None) and reason.
+    """
+    now = now or datetime.now()
+    plan = []
+    for job in jobs or []:
+        name, created, status = job_name_of(job), created_at(job), job_status_of(job)
+        reason = policy.reason(name, created, now, status)
+        if reason is not None:
+            plan.append({"kind": "job", "name": name, "status": status, "type": job.get("Type") or job.get("type", ""),
+                         "created": created.isoformat() if created else None, "reason": reason})
+    for entry in files or []:
+        name, created = file_name_of(entry), created_at(entry)
+        reason = policy.reason(name, created, now)
+        if reason is not None:
+            plan.append({"kind": "file", "name": name, "status": None, "type": "",
+                         "created": created.isoformat() if created else None, "reason": reason})
+    return plan
+
+
+def run_cleanup(
+    client: TamarindClient,
+    plan: list[dict],
+    max_workers: int = 8,
+    rate: Optional[float] = 10,
+    retries: int = 3
+) -> list[dict]:
+    """
+    Delete every entry of a plan concurrently.
+    
+    Args:
+        max_workers: Concurrent delete requests
+        rate: Deletes per second across all workers (None = unlimited)
+        retries: Extra attempts after a rate-limit (429) or server (5xx) error
+    
+    Returns:
+        The plan records with 'result' ('deleted', 'missing' or 'failed') and 'error'.
+    """
+    limiter = TokenBucket(rate) if rate else None
+    
+    def delete(record):
+        remove = client.delete_job if record["kind"] == "job" else client.delete_file
+        for attempt in range(retries + 1):
+            if limiter:
+                limiter.acquire()
+            try:
+                remove(record["name"])
+                return {**record, "result": "deleted", "error": None}
+            except Exception as e:
+                code = getattr(getattr(e, "response", None), "status_code", None)
+                if code == 404:
+                    return {**record, "result": "missing", "error": None}
+                if attempt == retries or (code is not None and code != 429 and code < 500):
+                    return {**record, "result": "failed", "error": f"{type(e).__name__}: {e}"}
+                time.sleep(2 ** attempt)
+    
+    with ThreadPoolExecutor(max_workers) as pool:
+        return list(pool.map(delete, plan))
+
+
+def summarize_cleanup(plan: list[dict]) -> str:
+    """Counts of a plan by kind and status/type, with the age range covered."""
+    lines = []
+    for kind in ("job", "file"):
+        entries = [r for r in plan if r["kind"] == kind]
+        if not entries:
+            continue
+        groups: dict[str, int] = {}
+        for r in entries:
+            key = " ".join(x for x in (r["type"], r["status"]) if x) or f"{kind}s"
+            groups[key] = groups.get(key, 0) + 1
+        dates = sorted(r["created"][:10] for r in entries if r["created"])
+        span = f", created {dates[0]} .. {dates[-1]}" if dates else ""
+        lines.append(f"{len(entries)} {kind}s{span}")
+        lines += [f"  {n:>6}  {key}" for key, n in sorted(groups.items(), key=lambda kv: -kv[1])[:15]]
+    return "\n".join(lines) or "Nothing to delete"
+
+
+# =============================================================================
+# Bulk CLI Commands
+# =============================================================================
+
+MANIFEST_VERSION = 1
+STATUS_GROUPS = {"complete": COMPLETE_STATUSES, "failed": FAILED_STATUSES}
+RESERVED_COLUMNS = ("tool", "job_name")
+
+
+def status_matches(status: str, wanted: Optional[str]) -> bool:
+    """Whether a job status matches a filter; 'complete' and 'failed' cover all their spellings."""
+    if not wanted:
+        return True
+    wanted = wanted.lower()
+    return status in STATUS_GROUPS.get(wanted, (wanted,))
+
+
+def parse_setting(text: str) -> tuple[str, object]:
+    """KEY=VALUE from the command line; VALUE is parsed as JSON when possible."""
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise ValueError(f"Expected KEY=VALUE, got {text!r}")
+    try:
+        return key.strip(), json.loads(value)
+    except ValueError:
+        return key.strip(), value
+
+
+def read_fasta(path) -> list[tuple[str, str]]:
+    """(header, sequence) records of a FASTA file."""
+    records, header, chunks = [], None, []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith(">"):
+                if header is not None:
+                    records.append((header, "".join(chunks)))
+                header, chunks = line[1:].split()[0] if line[1:].strip() else f"seq{len(records)}", []
+            elif line:
+                chunks.append(line)
+    if header is not None:
+        records.append((header, "".join(chunks)))
+    return records
+
+
+def read_job_manifest(
+    path, 
+    tool: Optional[str] = None, 
+    sequence_key: str = "sequence", 
+    settings: Optional[dict] = None,
+    name_prefix: Optional[str] = None
+) -> list[dict]:
+    """
+    Jobs to submit from a FASTA file (one job per record) or a CSV/TSV file
+    (one job per row; columns are settings, plus optional 'tool' and 'job_name').
+    
+    Args:
+        tool: Tool for every job (required unless the CSV has a 'tool' column)
+        sequence_key: Setting that receives each FASTA sequence
+        settings: Settings shared by every job (row values take precedence)
+        name_prefix: Name jobs <prefix>_<record id> instead of unique timestamped names
+    """
+    import csv
+    
+    path = Path(path)
+    jobs = []
+    if path.suffix.lower() in (".fa", ".fasta", ".faa", ".fas"):
+        for header, sequence in read_fasta(path):
+            jobs.append({"tool": tool, "source": header, "settings": {**(settings or {}), sequence_key: sequence}})
+    else:
+        with open(path, newline="") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            delimiter = "\t" if "\t" in sample.split("\n")[0] else ","
+            for i, row in enumerate(csv.DictReader(f, delimiter=delimiter)):
+                row_settings = {k: v for k, v in row.items() if k not in RESERVED_COLUMNS and v not in (None, "")}
+                jobs.append({"tool": row.get("tool") or tool, "source": row.get("job_name") or f"row{i + 1}",
+                             "job_name": row.get("job_name") or None,
+                             "settings": {**(settings or {}), **row_settings}})
+    
+    for job in jobs:
+        if not job["tool"]:
+            raise ValueError(f"No tool for {job['source']}: pass --tool or add a 'tool' column")
+        if not job.get("job_name"):
+            safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in job["source"])
+            job["job_name"] = f"{name_prefix}_{safe}" if name_prefix else JobManager.unique_job_name(job["tool"])
+    return jobs
+
+
+def write_manifest(path, jobs: list[dict], command: str, **fields):
+    """Atomically write a machine-readable job manifest (JSON)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({
+        "version": MANIFEST_VERSION, "command": command, "updated_at": datetime.now().isoformat(),
+        **fields, "jobs": jobs
+    }, indent=2, default=str))
+    os.replace(tmp, path)
+
+
+def load_manifest(path) -> list[dict]:
+    """Job records of a manifest written by write_manifest."""
+    with open(path) as f:
+        data = json.load(f)
+    return data["jobs"] if isinstance(data, dict) else data
+
+
+def status_counts(statuses: list[str]) -> str:
+    counts: dict[str, int] = {}
+    for status in statuses:
+        counts[status or "unknown"] = counts.get(status or "unknown", 0) + 1
+    return ", ".join(f"{n} {status}" for status, n in sorted(counts.items(), key=lambda kv: -kv[1]))
+
+
+def cmd_submit(client: TamarindClient, args) -> int:
+    """tamarind submit: one job per manifest row, submitted concurrently."""
+    shared = dict(parse_setting(s) for s in args.setting or [])
+    jobs = read_job_manifest(args.manifest, args.tool, args.sequence_key, shared, args.name_prefix)
+    
+    # Check every row before submitting any, so one bad row doesn't leave a half-submitted batch
+    problems = []
+    for job in jobs:
+        try:
+            job["settings"] = client.validate_settings(job["tool"], job["settings"], strict=args.strict)
+        except SettingsError as e:
+            problems.append(f"  {job['source']}: {e}")
+    if problems:
+        print(f"{len(problems)}/{len(jobs)} jobs have invalid settings; nothing submitted:")
+        print("\n".join(problems[:20]) + (f"\n  ... {len(problems) - 20} more" if len(problems) > 20 else ""))
+        return 1
+    print(f"Submitting {len(jobs)} jobs with {args.workers} workers...")
+    
+    manager = JobManager(client, max_workers=args.workers, poll=False)  # watch/download track the jobs
+    start = time.time()
+    try:
+        records = manager.submit_many(jobs, validate=False)  # validated above
+    finally:
+        manager.shutdown()
+    out = [{**r, "source": j["source"], "settings": j["settings"]} for j, r in zip(jobs, records)]
+    write_manifest(args.output, out, "submit", source=str(args.manifest))
+    
+    failed = [r for r in out if r["error"]]
+    print(f"Submitted {len(out) - len(failed)}/{len(out)} jobs in {time.time() - start:.1f}s; manifest: {args.output}")
+    for r in failed[:10]:
+        print(f"  {r['source']}: {r['error']}")
+    return 1 if failed else 0
+
+
+def _selected_jobs(args, listing: list[dict]) -> list[str]:
+    """Job names chosen by --manifest / --jobs / --all (filtered by --status against the listing)."""
+    if getattr(args, "all", False):
+        names = [job_name_of(j) for j in listing]
+    else:
+        names = list(args.jobs or [])
+        if args.manifest:
+            names += [r["job_name"] for r in load_manifest(args.manifest)]
+    if args.status:
+        statuses = {job_name_of(j): job_status_of(j) for j in listing}
+        names = [n for n in names if status_matches(statuses.get(n, ""), args.status)]
+    return list(dict.fromkeys(n for n in names if n))
+
+
+def render_table(rows: list[dict], started: float, max_rows: int = 30) -> str:
+    """Summary line plus one line per unfinished job (finished ones are only counted)."""
+    finished = COMPLETE_STATUSES + FAILED_STATUSES
+    active = [r for r in rows if r["status"] not in finished]
+    lines = [f"{datetime.now():%H:%M:%S}  {len(rows)} jobs: {status_counts([r['status'] for r in rows])}"
+             f"  (elapsed {time.time() - started:.0f}s)"]
+    if active:
+        width = max(len(r["job_name"]) for r in active[:max_rows])
+        lines.append(f"  {'JOB':<{width}}  {'TYPE':<14}  STATUS")
+        lines += [f"  {r['job_name']:<{width}}  {r['type'][:14]:<14}  {r['status']}" for r in active[:max_rows]]
+        if len(active) > max_rows:
+            lines.append(f"  ... {len(active) - max_rows} more unfinished")
+    return "\n".join(lines)
+
+
+def cmd_watch(client: TamarindClient, args) -> int:
+    """
+    tamarind watch: poll the job listing once per tick and show a live summary.
+    
+    Jobs not yet in the listing (e.g. just submitted) are shown as "unlisted" and
+    polled again; after --missing-polls consecutive absences they count as "missing".
+    Exits non-zero if any job ended failed or missing.
+    """
+    import sys
+    
+    live = sys.stdout.isatty() and not args.once
+    started = time.time()
+    names = None
+    absent: dict[str, int] = {}  # job name -> consecutive polls absent from the listing
+    try:
+        while True:
+            listing = client.get_jobs()  # the only request per tick, however many jobs are watched
+            if names is None:
+                names = _selected_jobs(args, listing)
+                if not names:
+                    print("No jobs selected")
+                    return 1
+            by_name = {job_name_of(j): j for j in listing}
+            rows = []
+            for n in names:
+                job = by_name.get(n)
+                if job is not None:
+                    absent.pop(n, None)
+                    status = job_status_of(job)
+                else:
+                    absent[n] = absent.get(n, 0) + 1
+                    status = "missing" if absent[n] >= args.missing_polls else "unlisted"
+                rows.append({"job_name": n, "type": (job or {}).get("Type") or (job or {}).get("type", ""),
+                             "status": status})
+            table = render_table(rows, started)
+            print(("\033[H\033[J" if live else "") + table, flush=True)
+            
+            if args.output:
+                write_manifest(args.output, rows, "watch")
+            done = all(r["status"] in COMPLETE_STATUSES + FAILED_STATUSES + ("missing",) for r in rows)
+            if args.once or done:
+                return 1 if any(r["status"] in FAILED_STATUSES + ("missing",) for r in rows) else 0
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+        return 130
+
+
+def cmd_download(client: TamarindClient, args) -> int:
+    """tamarind download: fetch result bundles of many jobs in parallel."""
+    listing = client.get_jobs()
+    names = _selected_jobs(args, listing)
+    if not names:
+        print("No jobs to download")
+        return 0
+    print(f"Downloading {len(names)} jobs to {args.output} with {args.workers} workers...")
+    
+    import sys
+    live = sys.stdout.isatty()
+    manager = DownloadManager(
+        client, args.output, args.workers, bandwidth=args.bandwidth, min_free=args.min_free,
+        extract=not args.no_extract, skip_existing=not args.force,
+        progress=lambda stats: print(("\r" if live else "") + f"[download] {manager.report()}",
+                                     end="" if live else "\n", flush=True)
+    )
+    records = manager.download(names)
+    if live:
+        print()
+    manifest = args.manifest_out or str(Path(args.output) / "download_manifest.json")
+    write_manifest(manifest, records, "download", output_dir=str(args.output), summary=manager.report())
+    
+    failed = [r for r in records if r["error"]]
+    print(f"{manager.report()}; manifest: {manifest}")
+    for r in failed[:10]:
+        print(f"  {r['job_name']}: {r['error']}")
+    return 1 if failed else 0
+
+
+def cmd_cleanup(client: TamarindClient, args) -> int:
+    """tamarind cleanup: delete jobs/files selected by a retention policy (dry run unless --apply)."""
+    try:
+        policy = RetentionPolicy(parse_age(args.older_than), args.status, args.match, args.exclude, args.include_active)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    jobs = client.get_jobs() if args.what in ("jobs", "all") else None
+    files = client.list_files() if args.what in ("files", "all") else None
+    plan = plan_cleanup(policy, jobs, files)
+    if args.limit is not None:
+        plan = plan[:args.limit]
+    listed = len(jobs or []) + len(files or [])
+    what = "jobs and files" if args.what == "all" else args.what
+    print(f"{len(plan)} of {listed} listed {what} selected for deletion")
+    print(summarize_cleanup(plan))
+    
+    if not args.apply:
+        for r in plan[:args.show]:
+            print(f"  would delete {r['kind']} {r['name']} ({r['reason']})")
+        if len(plan) > args.show:
+            print(f"  ... {len(plan) - args.show} more")
+        if args.report:
+            write_manifest(args.report, plan, "cleanup", dry_run=True)
+            print(f"Report: {args.report}")
+        if plan:
+            print("Dry run; rerun with --apply to delete")
+        return 0
+    
+    start = time.time()
+    records = run_cleanup(client, plan, args.workers, args.rate or None)
+    counts = status_counts([r["result"] for r in records])
+    print(f"Cleanup finished in {time.time() - start:.1f}s: {counts}")
+    for r in [r for r in records if r["result"] == "failed"][:10]:
+        print(f"  {r['kind']} {r['name']}: {r['error']}")
+    if args.report:
+        write_manifest(args.report, records, "cleanup", dry_run=False)
+        print(f"Report: {args.report}")
+    return 1 if any(r["result"] == "failed" for r in records) else 0
+
+
+def add_bulk_commands(parser):
+    """Register the submit / watch / download / cleanup subcommands on the CLI parser."""
+    commands = parser.add_subparsers(dest="command", metavar="{submit,watch,download,cleanup}")
+    
+    submit = commands.add_parser("submit", help="Submit one job per FASTA record or CSV row")
+    submit.add_argument("manifest", help="FASTA (.fa/.fasta) or CSV/TSV with one job per row")
+    submit.add_argument("--tool", help="Tool for every job (or a 'tool' CSV column)")
+    submit.add_argument("--setting", action="append", metavar="KEY=VALUE",
+                        help="Setting shared by every job (repeatable; VALUE parsed as JSON if possible)")
+    submit.add_argument("--sequence-key", default="sequence", help="Setting receiving FASTA sequences")
+    submit.add_argument("--name-prefix", help="Name jobs <prefix>_<record id>")
+    submit.add_argument("--workers", type=int, default=8, help="Concurrent submissions (default: 8)")
+    submit.add_argument("--output", default="jobs.json", help="Manifest to write (default: jobs.json)")
+    submit.add_argument("--strict", action="store_true",
+                        help="Reject settings missing from the tool spec (default: warn and submit them)")
+    submit.set_defaults(handler=cmd_submit)
+    
+    for name, help_text in (("watch", "Track many jobs with one listing request per tick"),
+                            ("download", "Download results of many jobs in parallel")):
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument("--manifest", help="Job manifest (from submit) selecting the jobs")
+        sub.add_argument("--jobs", nargs="+", help="Job names")
+        sub.add_argument("--all", action="store_true", help="Every job in the account")
+        sub.add_argument("--status", help="Only jobs with this status (complete/failed cover all spellings)")
+        if name == "watch":
+            sub.add_argument("--interval", type=float, default=10, help="Seconds between polls (default: 10)")
+            sub.add_argument("--once", action="store_true", help="Print one table and exit")
+            sub.add_argument("--missing-polls", type=int, default=6,
+                             help="Give up on a job absent from the listing this many polls in a row (default: 6)")
+            sub.add_argument("--output", help="Rewrite this manifest with current statuses every tick")
+            sub.set_defaults(handler=cmd_watch)
+        else:
+            sub.add_argument("--output", default="results", help="Download directory (default: results)")
+            sub.add_argument("--workers", type=int, default=8, help="Parallel downloads (default: 8)")
+            sub.add_argument("--bandwidth", help="Total bandwidth cap, e.g. 20M (bytes/s; default: unlimited)")
+            sub.add_argument("--min-free", default="1G", help="Free disk space to keep (default: 1G)")
+            sub.add_argument("--no-extract", action="store_true", help="Keep bundles as .zip files")
+            sub.add_argument("--force", action="store_true", help="Download again even if results exist")
+            sub.add_argument("--manifest-out", help="Manifest to write (default: <output>/download_manifest.json)")
+            sub.set_defaults(handler=cmd_download)
+    
+    cleanup = commands.add_parser("cleanup", help="Delete old jobs/files by retention policy (dry run by default)")
+    cleanup.add_argument("what", nargs="?", choices=("jobs", "files", "all"), default="jobs",
+                         help="What to clean up (default: jobs)")
+    cleanup.add_argument("--older-than", help="Created more than this long ago, e.g. 12h, 30d, 2w")
+    cleanup.add_argument("--status", action="append", help="Job status to delete (repeatable; complete/failed cover all spellings)")
+    cleanup.add_argument("--match", action="append", help="Name glob to delete, e.g. 'esmfold_2024*' (repeatable)")
+    cleanup.add_argument("--exclude", action="append", help="Name glob to keep (repeatable)")
+    cleanup.add_argument("--include-active", action="store_true", help="Also delete queued/running jobs")
+    cleanup.add_argument("--limit", type=int, help="Delete at most this many entries")
+    cleanup.add_argument("--apply", action="store_true", help="Actually delete (default: report only)")
+    cleanup.add_argument("--workers", type=int, default=8, help="Concurrent deletes (default: 8)")
+    cleanup.add_argument("--rate", type=float, default=10, help="Max deletes per second, 0 = unlimited (default: 10)")
+    cleanup.add_argument("--show", type=int, default=20, help="Entries listed in a dry run (default: 20)")
+    cleanup.add_argument("--report", help="Write the plan (or deletion results) as JSON")
+    cleanup.set_defaults(handler=cmd_cleanup)
+    return commands
+
+
 # =============================================================================
 # CLI Entry Point
 # =============================================================================
@@ -470,13 +1784,26 @@ def main():
     parser.add_argument("--list-files", action="store_true", help="List your files")
     parser.add_argument("--test-alphafold", action="store_true", help="Run test AlphaFold job")
     parser.add_argument("--test-esmfold", action="store_true", help="Run test ESMFold job (faster)")
+    add_bulk_commands(parser)
     
     args = parser.parse_args()
     
-    # Initialize client
+    if args.command:
+        try:
+            client = TamarindClient(api_key=args.api_key, pool_size=max(getattr(args, "workers", 8), 4))
+        except ValueError as e:
+            print(f"Error: {e}")
+            exit(1)
+        exit(args.handler(client, args))
+    
+    commands = [args.list_tools, args.search, args.tool_info, args.list_jobs,
+                args.list_files, args.test_alphafold, args.test_esmfold]
+    
+    # Initialize client (only when a command needs the API)
     try:
-        client = TamarindClient(api_key=args.api_key)
-        print("Tamarind client initialized successfully!\n")
+        client = TamarindClient(api_key=args.api_key) if any(commands) else None
+        if client:
+            print("Tamarind client initialized successfully!\n")
     except ValueError as e:
         print(f"Error: {e}")
         exit(1)
@@ -512,7 +1839,7 @@ def main():
         print("Your jobs:")
         print("-" * 50)
         for job in jobs[:20]:  # Show first 20
-            name = job.get("JobName") or job.get("jobName") or job.get("name")
+            name = job_name_of(job)
             status = job.get("JobStatus") or job.get("status")
             job_type = job.get("Type") or job.get("type", "")
             print(f"  - {name} ({job_type}): {status}")
@@ -577,14 +1904,17 @@ def main():
         print(f"Check status with --list-jobs")
     
     # Default: show usage if no args
-    if not any([args.list_tools, args.search, args.tool_info, args.list_jobs, 
-                args.list_files, args.test_alphafold, args.test_esmfold]):
+    if not any(commands):
         print("Quick usage examples:")
         print("-" * 50)
         print("  tamarind --list-tools")
         print("  tamarind --tool-info alphafold")
         print("  tamarind --list-jobs")
         print("  tamarind --test-esmfold")
+        print("  tamarind submit designs.fasta --tool esmfold --output jobs.json")
+        print("  tamarind watch --manifest jobs.json")
+        print("  tamarind download --all --status complete --output results")
+        print("  tamarind cleanup jobs --older-than 30d --status complete --status failed")
         print()
         print("Programmatic usage:")
         print("-" * 50)
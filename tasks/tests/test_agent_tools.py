@@ -0,0 +1,70 @@
+"""Tool-call scheduling within one assistant turn."""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+from agent import AgentTools
+from context_manager import HANDLE_PAGE_CHARS
+
+
+@pytest.fixture
+def tools(tmp_path):
+    (tmp_path / "task").mkdir()
+    tools = AgentTools(tmp_path / "task", tmp_path / "output")
+    yield tools
+    tools.close()
+
+
+def test_same_session_runs_in_issue_order(tools):
+    calls = [("run_python", {"code": "order = []"})]
+    calls += [("run_python", {"code": f"order.append({i})"}) for i in range(6)]
+    calls += [("run_python", {"code": "print(order)"})]
+    results = tools.execute_tools(calls)
+    assert results[-1].startswith("Output:\n[0, 1, 2, 3, 4, 5]")
+
+
+def test_read_after_write_sees_the_write(tools):
+    calls = [
+        ("write_file", {"path": "notes.txt", "content": "x" * 100_000}),
+        ("read_file", {"path": "notes.txt"}),
+        ("summarize_file", {"path": "./notes.txt"}),
+    ]
+    results = tools.execute_tools(calls)
+    assert not results[1].startswith("Error") and not results[2].startswith("Error")
+
+
+def test_python_after_write_sees_the_write(tools):
+    calls = [
+        ("write_file", {"path": "x.csv", "content": "a,b\n" + "1,2\n" * 50_000}),
+        ("run_python", {"code": "import pandas as pd; print(len(pd.read_csv('../output/x.csv')))"}),
+        ("read_file", {"path": "x.csv"}),
+    ]
+    results = tools.execute_tools(calls)
+    assert results[1].startswith("Output:\n50000")
+    assert not results[2].startswith("Error")
+
+
+def test_independent_calls_overlap(tools):
+    calls = [("run_python", {"code": "import time; time.sleep(1)", "session": s}) for s in ("a", "b", "c")]
+    tools.execute_tools([("run_python", {"code": "1", "session": s}) for s in ("a", "b", "c")])  # start kernels
+    start = time.perf_counter()
+    tools.execute_tools(calls)
+    assert time.perf_counter() - start < 2.5
+
+
+def test_offloaded_single_line_is_read_back_in_pages(tools):
+    result = "z" * 2_000_000
+    handle = tools.output_dir / "tool_results" / "run_python_call1.txt"
+    handle.parent.mkdir(parents=True)
+    handle.write_text(result)
+    
+    page = tools.read_file("tool_results/run_python_call1.txt")
+    assert len(page) < 2 * HANDLE_PAGE_CHARS
+    assert "continue with offset=0, column=4000" in page
+    page = tools.read_file("tool_results/run_python_call1.txt", offset=0, column=4000)
+    assert page.startswith("z" * HANDLE_PAGE_CHARS) and "column=8000" in page
@@ -0,0 +1,40 @@
+"""Token accounting for context compaction."""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from context_manager import ContextManager, llm_summarizer
+
+
+class FakeClient:
+    """Chat client returning a fixed summary with known usage."""
+    
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+    
+    def create(self, **kwargs):
+        usage = SimpleNamespace(prompt_tokens=9000, completion_tokens=100, total_tokens=9100)
+        message = SimpleNamespace(content="- did things")
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=message)])
+
+
+def test_summarizer_usage_is_recorded(tmp_path):
+    calls = []
+    
+    def on_usage(usage, seconds):
+        calls.append(usage)
+        context.record_usage(usage)
+    
+    context = ContextManager(tmp_path, "gpt-4o", budget_tokens=500, keep_recent=2,
+                             summarizer=llm_summarizer(FakeClient(), "gpt-4o", on_usage=on_usage))
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "task"}]
+    for i in range(10):
+        messages += [{"role": "assistant", "content": "x" * 1000}, {"role": "user", "content": f"go {i}"}]
+    
+    compacted = context.compact(messages)
+    assert len(compacted) < len(messages)
+    assert len(calls) == 1
+    assert context.usage["total_tokens"] == 9100 and context.usage["requests"] == 1
@@ -0,0 +1,32 @@
+"""Cached loads match pd.read_csv."""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_cache import DataCache
+
+
+def test_load_matches_read_csv(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("id,flag,name,value\n1,True,a,1.5\n2,,b,\n3,False,,2.0\n4,True,a,0.5\n")
+    cache = DataCache(tmp_path / "cache")
+
+    expected = pd.read_csv(path)
+    loaded = cache.load(path)
+    assert loaded.equals(expected)
+    assert loaded["flag"].iloc[0] is True and loaded["flag"].iloc[2] is False
+    assert cache.load(path).equals(expected)  # served from the converted entry
+
+
+def test_ragged_rows_raise_like_read_csv(tmp_path):
+    path = tmp_path / "ragged.csv"
+    path.write_text("a,b\n1,2\n3,4,5\n6,7\n")
+    with pytest.raises(pd.errors.ParserError):
+        pd.read_csv(path)
+    with pytest.raises(pd.errors.ParserError):
+        DataCache(tmp_path / "cache").load(path)
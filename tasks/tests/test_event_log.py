@@ -0,0 +1,23 @@
+"""Reopening an event log after a crash."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from event_log import EventLog, read_events
+
+
+def test_reopen_after_torn_line_keeps_new_events(tmp_path):
+    path = tmp_path / "events.jsonl"
+    with EventLog(path) as log:
+        log.event("run_start")
+        log.event("usage", total_tokens=10)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 2, "t": 1.0, "type": "mess')  # died mid-write
+    
+    with EventLog(path) as log:
+        assert log.event("resume") == 2
+        log.event("run_end")
+    
+    assert [e["type"] for e in read_events(path)] == ["run_start", "usage", "resume", "run_end"]
@@ -0,0 +1,45 @@
+"""Bounded reads of files with very long lines."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from file_tools import MAX_LINE_CHARS, read_lines, head_lines, tail_lines
+
+
+def test_single_oversized_line_is_paged(tmp_path):
+    path = tmp_path / "big.json"
+    text = '{"values": [' + ", ".join(f'"{i}é"' for i in range(200_000)) + "]}\n"
+    path.write_text(text)
+    
+    page = read_lines(path, max_chars=50_000)
+    assert len(page["text"]) <= 50_000
+    assert not page["eof"] and page["end"] == 0 and page["column"] > 0
+    
+    pages, offset, column = [page["text"]], page["end"], page["column"]
+    while not page["eof"]:
+        page = read_lines(path, offset, max_chars=50_000, column=column)
+        assert len(page["text"]) <= 50_000
+        pages.append(page["text"])
+        offset, column = page["end"], page["column"]
+    assert "".join(pages) == text
+
+
+def test_cut_line_resumes_before_following_lines(tmp_path):
+    path = tmp_path / "mixed.txt"
+    path.write_text("short\n" + "x" * 30 + "\nlast\n")
+    
+    first = read_lines(path, max_chars=10)
+    assert first["text"] == "short\n" and first["end"] == 1 and first["column"] == 0
+    second = read_lines(path, 1, max_chars=10)
+    assert second["text"] == "x" * 10 and (second["end"], second["column"]) == (1, 10)
+    rest = read_lines(path, 1, max_chars=100, column=10)
+    assert rest["text"] == "x" * 20 + "\nlast\n" and rest["eof"]
+
+
+def test_head_and_tail_clip_long_lines(tmp_path):
+    path = tmp_path / "one_line.txt"
+    path.write_text("y" * 2_000_000)
+    for lines in (head_lines(path, 5), tail_lines(path, 5)):
+        assert len(lines) == 1 and len(lines[0]) < MAX_LINE_CHARS + 100
@@ -0,0 +1,62 @@
+"""Append-only memory-mapped structure store."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ph_sensitive_design"))
+
+from structure_store import StructureStore
+
+
+def make_structure(n: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "coords": rng.normal(size=(n, 3)), "bfactors": rng.uniform(50, 95, n),
+        "resids": np.arange(1, n + 1), "atom_names": np.array(["CA"] * n),
+    }
+
+
+def test_append_reopen_read_round_trip(tmp_path):
+    store = StructureStore(tmp_path / "store")
+    structures = [make_structure(n, i) for i, n in enumerate((5, 0, 12, 7))]
+    for i, s in enumerate(structures):
+        assert store.append(**s, metadata={"header": f"d{i}"}) == i
+        mean = store.plddt(i)["plddt_mean"]  # readable right after its append
+        assert mean is None if not len(s["bfactors"]) else np.isclose(mean, s["bfactors"].mean(), rtol=1e-5)
+
+    reopened = StructureStore(tmp_path / "store")
+    assert len(reopened) == 4
+    assert [m["header"] for m in reopened.metadata()] == ["d0", "d1", "d2", "d3"]
+    for i, s in enumerate(structures):
+        np.testing.assert_allclose(reopened[i]["coords"], s["coords"].astype(np.float32))
+        np.testing.assert_array_equal(reopened[i]["resids"], s["resids"])
+    means = reopened.plddt_means()
+    assert np.isnan(means[1])
+    np.testing.assert_allclose(means[[0, 2, 3]], [structures[i]["bfactors"].mean() for i in (0, 2, 3)], rtol=1e-5)
+
+
+def test_torn_metadata_tail_is_rolled_back(tmp_path):
+    root = tmp_path / "store"
+    store = StructureStore(root)
+    store.append(**make_structure(4, 0), metadata={"header": "kept"})
+    # An append that died after its metadata line (half written) but before its offsets row
+    with open(root / "metadata.jsonl", "a") as f:
+        f.write('{"header": "orph')
+
+    reopened = StructureStore(root)
+    assert len(reopened) == 1
+    reopened.append(**make_structure(3, 1), metadata={"header": "next"})
+    assert [m["header"] for m in StructureStore(root).metadata()] == ["kept", "next"]
+    assert len(StructureStore(root)[1]["coords"]) == 3
+
+
+def test_reset_per_run_does_not_duplicate(tmp_path):
+    root = tmp_path / "structure_store"
+    for _ in range(2):  # two pipeline runs into the same output directory
+        store = StructureStore(root, reset=True)
+        for i in range(3):
+            store.append(**make_structure(4, i), metadata={"header": f"d{i}"})
+    assert len(StructureStore(root)) == 3
+    assert [m["header"] for m in StructureStore(root).metadata()] == ["d0", "d1", "d2"]
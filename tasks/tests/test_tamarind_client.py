@@ -0,0 +1,101 @@
+"""Paged job listing, the watch subcommand and settings validation."""
+
+import sys
+import json
+from types import SimpleNamespace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ph_sensitive_design"))
+
+import pytest
+
+from tamarind_client import TamarindClient, SettingsError, cmd_watch
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self.data
+
+
+class PagedClient(TamarindClient):
+    """Serves `total` jobs `page` at a time, with a dict startKey cursor like the API's."""
+    
+    def __init__(self, total: int, page: int):
+        super().__init__(api_key="test")
+        self.jobs = [{"JobName": f"job_{i}", "JobStatus": "Complete"} for i in range(total)]
+        self.page = page
+        self.requests = []
+    
+    def _request(self, method, endpoint, params=None, json_data=None, files=None):
+        self.requests.append(params)
+        start = json.loads(params["startKey"])["offset"] if params else 0
+        end = start + self.page
+        data = {"jobs": self.jobs[start:end]}
+        if end < len(self.jobs):
+            data["startKey"] = {"offset": end}
+        return FakeResponse(data)
+
+
+def test_get_jobs_follows_start_key():
+    client = PagedClient(total=25, page=10)
+    jobs = client.get_jobs()
+    assert [j["JobName"] for j in jobs] == [f"job_{i}" for i in range(25)]
+    assert len(client.requests) == 3 and client.requests[0] is None
+
+
+def watch_args(**kw):
+    return SimpleNamespace(**{"all": False, "manifest": None, "status": None, "once": False,
+                              "output": None, "interval": 0, "missing_polls": 3, **kw})
+
+
+def test_watch_waits_for_unlisted_jobs():
+    client = PagedClient(total=1, page=10)
+    listings = iter([[], [], [{"JobName": "job_0", "JobStatus": "Complete"}]])
+    client.get_jobs = lambda: next(listings)
+    assert cmd_watch(client, watch_args(jobs=["job_0"])) == 0
+
+
+def test_watch_fails_on_missing_or_failed_jobs():
+    client = PagedClient(total=1, page=10)
+    client.get_jobs = lambda: [{"JobName": "job_0", "JobStatus": "Failed"}]
+    assert cmd_watch(client, watch_args(jobs=["job_0"])) == 1
+    client.get_jobs = lambda: []
+    assert cmd_watch(client, watch_args(jobs=["job_0"])) == 1
+
+
+# Local copy of the ProteinMPNN spec that predates bias_AA_per_residue
+MPNN_SPEC = {"name": "proteinmpnn", "settings": [
+    {"name": "pdbFile", "type": "file", "required": True},
+    {"name": "numSequences", "type": "int", "min": 1, "max": 1000},
+    {"name": "temperature", "type": "number", "min": 0, "max": 1},
+]}
+
+
+def spec_client(**kw):
+    client = TamarindClient(api_key="test", **kw)
+    client._tools_cache = [MPNN_SPEC]
+    return client
+
+
+def test_workflow_mpnn_settings_pass_validation():
+    from workflow import mpnn_settings
+    
+    settings = mpnn_settings("data/scaffold.pdb", [3, 7], list(range(1, 21)), "A", 8)
+    clean = spec_client().validate_settings("proteinmpnn", settings)
+    assert clean["numSequences"] == 8 and clean["temperature"] == 0.1
+    assert clean["bias_AA_per_residue"] == settings["bias_AA_per_residue"]
+
+
+def test_unknown_keys_only_fail_when_strict():
+    settings = {"pdbFile": "x.pdb", "numSequencs": 4}
+    with pytest.raises(SettingsError, match="did you mean 'numSequences'"):
+        spec_client(strict_settings=True).validate_settings("proteinmpnn", settings)
+    with pytest.raises(SettingsError, match="above the maximum"):
+        spec_client().validate_settings("proteinmpnn", {"pdbFile": "x.pdb", "numSequences": 5000})
@@ -0,0 +1,25 @@
+"""Design clustering in the pH-sensitive design workflow."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ph_sensitive_design"))
+
+from workflow import cluster_designs, propagate_cluster_predictions
+
+
+def test_clusters_never_mix_networks():
+    designs = [
+        {"header": "net0_a", "sequence": "ACDEFGHIKL", "network_id": 0},
+        {"header": "net1_a", "sequence": "ACDEFGHIKL", "network_id": 1},
+        {"header": "net0_b", "sequence": "ACDEFGHIKM", "network_id": 0},
+        {"header": "net1_b", "sequence": "ACDEFGHIKM", "network_id": 1},
+    ]
+    clusters = cluster_designs(designs, identity_threshold=0.8)
+    for c in clusters:
+        assert len({designs[m]["network_id"] for m in c["members"]}) == 1
+    assert sorted(m for c in clusters for m in c["members"]) == [0, 1, 2, 3]
+    
+    rep_preds = [{"folded_network": designs[c["representative"]]["network_id"]} for c in clusters]
+    for p in propagate_cluster_predictions(designs, clusters, rep_preds):
+        assert p["folded_network"] == p["network_id"]